@@ -0,0 +1 @@
+"""Performance benchmarks and regression baselines (not part of the app)"""
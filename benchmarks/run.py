@@ -0,0 +1,432 @@
+"""Render and data-path benchmarks for every operation mode, checked against stored baselines.
+
+Usage (from the repository root):
+
+    python -m benchmarks.run                    # run and compare with benchmarks/baseline.json
+    python -m benchmarks.run --update           # run and store the results as the new baseline
+    python -m benchmarks.run --scales 10 1000   # skip the 100,000x data paths
+
+Startup is measured in a fresh interpreter: the first render of the
+default mode must stay within ``views.common.STARTUP_BUDGET_MS`` whatever
+the baseline says. Each mode view is then driven headlessly through
+Streamlit's AppTest (first run of a fresh session, then the median warm
+rerun, plus peak traced memory); process-wide caches stay warm from one
+mode to the next. The data paths (threat table prep, threat rollups,
+heavy-hitter and alert summaries, blocklist matching against 200,000
+CIDRs, map payload, risk scoring, audit logging, history queries) are
+timed on their own at multiples of the demo's data sizes. Rolling all 47
+defaced sites back from the snapshot store must stay within the
+advertised ``ulinzi.snapshots.RESTORE_TARGET_MS``. The scoring
+service is loaded by 200 concurrent keep-alive connections, and the
+account-sharded scorer replays a million transactions with 1, 2, 4, ...
+workers up to the core count, reporting its speedup over one worker.
+The USSD gateway takes 20,000 simulated *334# sessions arriving at once. A result
+slower than ``baseline * (1 + tolerance) + slack``, with a throughput
+below ``baseline / (1 + tolerance)`` or using more memory than allowed
+fails the run with exit status 1.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from ulinzi.audit import AuditLog, SegmentStore  # noqa: E402
+from ulinzi.blocklist import BlocklistIndex  # noqa: E402
+from ulinzi.fixtures import FixtureSites  # noqa: E402
+from ulinzi.history import TransactionHistory  # noqa: E402
+from ulinzi.risk import score_transactions  # noqa: E402
+from ulinzi.rollups import ThreatRollups  # noqa: E402
+from ulinzi.sketch import AlertDeduplicator, HeavyHitters  # noqa: E402
+from ulinzi.scoring import ScoringService  # noqa: E402
+from ulinzi.sharded import ShardedScorer, transaction_columns  # noqa: E402
+from ulinzi.snapshots import RESTORE_TARGET_MS, SnapshotStore  # noqa: E402
+from ulinzi.synthetic import generate_blocklists, generate_threats, generate_transactions  # noqa: E402
+from ulinzi.threats import ThreatTable  # noqa: E402
+from ulinzi.ussd import UssdGateway, simulate  # noqa: E402
+from views.common import STARTUP_BUDGET_MS  # noqa: E402
+
+APP = os.path.join(ROOT, "app.py")
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+MODES = (
+    "Dashboard Overview",
+    "⚔️ Sovereign Sentinel (Gov)",
+    "💸 Financial Sentinel (Bank)",
+    "🚨 Duress Protocol (Citizen)",
+    "🔍 Intelligence Core",
+)
+# What one demo session holds today: 50 threats, 10 transactions, ~10 audit events per visit.
+BASE_SIZES = {"threats": 50, "transactions": 10, "audit_events": 10}
+SCALES = (10, 1000, 100000)
+TIME_SLACK_S = 0.005
+MEMORY_SLACK_MB = 2.0
+
+
+def _slug(mode):
+    return mode.encode("ascii", "ignore").decode().strip().split(" (")[0].lower().replace(" ", "_")
+
+
+def _peak_mb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def measure(fn, setup=None, repeat=3):
+    """Best-of-``repeat`` wall time of ``fn(state)`` plus its peak traced memory (separate pass)"""
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        fn(state)
+        times.append(time.perf_counter() - start)
+    state = setup() if setup else None
+    return {"seconds": min(times), "peak_mb": _peak_mb(lambda: fn(state))}
+
+
+# --- Startup ---
+_STARTUP_SCRIPT = """
+import json, resource, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120).run()
+if at.exception:
+    raise SystemExit(at.exception[0].message)
+print(json.dumps({"first_render_ms": at.session_state.first_render_ms,
+                  "wall_seconds": time.perf_counter() - started,
+                  "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+
+def bench_startup(repeat=3):
+    """First render of a fresh process (script run only; cold = interpreter start to rendered page)"""
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", _STARTUP_SCRIPT, APP], cwd=ROOT, check=True,
+                             capture_output=True, text=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    best = min(runs, key=lambda run: run["first_render_ms"])
+    return {"startup/first_render": {"seconds": best["first_render_ms"] / 1e3,
+                                     "cold_seconds": min(run["wall_seconds"] for run in runs),
+                                     "peak_mb": best["rss_mb"]}}
+
+
+def over_budget(results):
+    """Startup and snapshot restore results beyond their budgets, independent of any baseline"""
+    lines = []
+    for name, budget_ms in (("startup/first_render", STARTUP_BUDGET_MS), ("data/snapshot_restore", RESTORE_TARGET_MS)):
+        result = results.get(name)
+        if result is not None and result["seconds"] * 1e3 > budget_ms:
+            lines.append(f"{name}: {result['seconds'] * 1e3:.0f}ms > budget {budget_ms}ms")
+    return lines
+
+
+# --- Mode renders ---
+def bench_modes(reruns=5):
+    """Cold and warm per-rerun script time plus peak memory for every mode"""
+    from streamlit.testing.v1 import AppTest
+
+    results = {}
+    for mode in MODES:
+        def run(at):
+            at.run()
+            if at.exception:
+                raise RuntimeError(f"{mode}: {at.exception[0].message}")
+
+        at = AppTest.from_file(APP, default_timeout=120)
+        start = time.perf_counter()
+        run(at)
+        at.sidebar.selectbox[0].select(mode)
+        run(at)
+        cold = time.perf_counter() - start
+        warm = []
+        for _ in range(reruns):
+            start = time.perf_counter()
+            run(at)
+            warm.append(time.perf_counter() - start)
+        peak = _peak_mb(lambda: run(at))
+        results[f"mode/{_slug(mode)}"] = {"cold_seconds": cold, "seconds": statistics.median(warm), "peak_mb": peak}
+    return results
+
+
+# --- Data paths ---
+def _threat_prep(threats):
+    table = ThreatTable()
+    table.append(threats)
+    table.level_counts()
+    table.critical_alerts(3)
+    return table
+
+
+def _threat_rollups(threats):
+    rollups = ThreatRollups()
+    rollups.add(threats)
+    for resolution, window in (("1min", "1h"), ("1h", "24h"), ("1d", "30D")):
+        rollups.rate(resolution, window)
+        rollups.series(resolution, window)
+        rollups.totals(resolution, window, by="region")
+    return rollups
+
+
+def _alert_summaries(threats):
+    sources = HeavyHitters(k=20)
+    sources.add(threats["source_ip"].to_numpy())
+    alerts = AlertDeduplicator()
+    alerts.add(threats)
+    sources.top(5)
+    alerts.recent(3)
+    return sources, alerts
+
+
+def bench_snapshot_restore(repeat=3):
+    """Roll every protected site back to its gold snapshot after all of them were defaced"""
+    with tempfile.TemporaryDirectory() as directory:
+        sites = FixtureSites(root=os.path.join(directory, "sites"))
+        try:
+            store = SnapshotStore(os.path.join(directory, "snapshots"))
+            store.commit(sites.root, ref="gold")
+
+            def deface_all():
+                for domain in sites.domains:
+                    sites.deface(domain)
+
+            result = measure(lambda _: store.restore("gold", sites.root), setup=deface_all, repeat=repeat)
+            result["stored_mb"] = store.usage()[1] / 2 ** 20
+        finally:
+            sites.close()
+    return {"data/snapshot_restore": result}
+
+
+def bench_data_paths(scales=SCALES, seed=0):
+    """Threat prep, rollups, summaries, blocklist matching, map payload, scoring, audit and history at each scale"""
+    results = {}
+    blocklist = BlocklistIndex.build(generate_blocklists(seed=seed))
+    for scale in scales:
+        repeat = 3 if scale < 100000 else 1
+        threats = generate_threats(n=BASE_SIZES["threats"] * scale, seed=seed)
+        transactions = generate_transactions(n=BASE_SIZES["transactions"] * scale, seed=seed)
+        events = BASE_SIZES["audit_events"] * scale
+
+        results[f"data/threat_prep@{scale}x"] = measure(lambda _: _threat_prep(threats), repeat=repeat)
+        results[f"data/threat_rollups@{scale}x"] = measure(lambda _: _threat_rollups(threats), repeat=repeat)
+        results[f"data/alert_summaries@{scale}x"] = measure(lambda _: _alert_summaries(threats), repeat=repeat)
+        results[f"data/blocklist_match@{scale}x"] = measure(
+            lambda _: blocklist.match(threats["source_ip"].to_numpy()), repeat=repeat)
+        results[f"data/map_payload@{scale}x"] = measure(
+            lambda table: table.map_payload(6), setup=lambda: _threat_prep(threats), repeat=repeat)
+        results[f"data/risk_scoring@{scale}x"] = measure(
+            lambda _: score_transactions(transactions["amount"].to_numpy(), transactions["hour"].to_numpy(),
+                                         transactions["location"], transactions["behavioral_anomaly"].to_numpy(),
+                                         transactions["sim_swap"].to_numpy()),
+            repeat=repeat)
+
+        def audit(log):
+            for i in range(events):
+                log.add("FINANCIAL_SENTINEL", f"Processing KES {i:,} transaction. Risk Score: 15", "INFO")
+            log.store.flush()
+
+        with tempfile.TemporaryDirectory() as directory:
+            results[f"data/audit_logging@{scale}x"] = measure(
+                audit, setup=lambda: AuditLog(store=SegmentStore(tempfile.mkdtemp(dir=directory))), repeat=repeat)
+
+        def history_query(history):
+            end = transactions["timestamp"].max()
+            selection = history.select(end - np.timedelta64(7, "D"), None, status=["FLAGGED", "BLOCKED"])
+            len(selection)
+            selection.page(0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            history = TransactionHistory(directory)
+            history.append(transactions)
+            history.flush()
+            results[f"data/history_query@{scale}x"] = measure(history_query, setup=lambda: history, repeat=repeat)
+    return results
+
+
+# --- Scoring service ---
+async def _load(port, connections, requests_per_connection, latencies):
+    body = json.dumps({"amount": 50000, "hour": 14, "location": "Nairobi (Home - Normal)"}).encode()
+    request = f"POST /score HTTP/1.1\r\nHost: bench\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+
+    async def client():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for _ in range(requests_per_connection):
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            await reader.readline()
+            length = 0
+            while (line := await reader.readline()) != b"\r\n":
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+        writer.close()
+
+    await asyncio.gather(*(client() for _ in range(connections)))
+
+
+def bench_scoring_service(connections=200, requests_per_connection=100, repeat=3):
+    """p99 client latency and throughput of concurrent keep-alive /score requests (service on its own loop
+    thread), from the fastest of ``repeat`` loads"""
+    service = ScoringService()
+    port = int(service.start_background().rsplit(":", 1)[1])
+    runs = []
+    for _ in range(repeat):
+        latencies = []
+        start = time.perf_counter()
+        asyncio.run(_load(port, connections, requests_per_connection, latencies))
+        runs.append((len(latencies) / (time.perf_counter() - start), latencies))
+    throughput, latencies = max(runs, key=lambda run: run[0])
+    peak = _peak_mb(lambda: asyncio.run(_load(port, connections, 10, [])))
+    return {"service/scoring_p99": {"seconds": float(np.percentile(latencies, 99)), "peak_mb": peak,
+                                    "throughput_rps": throughput, "mean_batch": service.stats()["mean_batch"]}}
+
+
+def worker_counts(limit=None):
+    """1, 2, 4, ... workers up to ``limit`` (default: the core count), always ending at the limit"""
+    limit = limit or os.cpu_count()
+    counts = [1 << i for i in range(limit.bit_length()) if 1 << i < limit]
+    return counts + [limit]
+
+
+def bench_sharded_scoring(workers=None, transactions=1000000, accounts=100000, batch=1 << 17):
+    """Transactions per second of the account-sharded scorer per worker count, with speedup over one worker"""
+    frame = generate_transactions(n=transactions, n_accounts=accounts, seed=0).sort_values("timestamp")
+    columns = transaction_columns(frame)
+    batches = [{name: column[start:start + batch] for name, column in columns.items()}
+               for start in range(0, transactions, batch)]
+    results = {}
+    for count in workers or worker_counts():
+        scorer = ShardedScorer(count, profile_capacity=accounts)
+        try:
+            start = time.perf_counter()
+            for columns in batches:
+                scorer.score(columns)
+            elapsed = time.perf_counter() - start
+            peak = _peak_mb(lambda: scorer.score(batches[0]))
+        finally:
+            scorer.close()
+        results[f"service/sharded_scoring@{count}w"] = {"seconds": elapsed, "peak_mb": peak,
+                                                         "throughput_rps": transactions / elapsed}
+    single = results.get("service/sharded_scoring@1w")
+    for result in results.values():
+        if single is not None:
+            result["speedup"] = single["seconds"] / result["seconds"]
+    return results
+
+
+def bench_ussd_gateway(sessions=20000):
+    """Wall time for ``sessions`` simulated USSD sessions arriving at once, keying without pause"""
+    gateway = UssdGateway()
+    url = gateway.start_background()
+    report = asyncio.run(simulate(url, sessions, think_ms=0.0, ramp_s=0.0))
+    peak = _peak_mb(lambda: asyncio.run(simulate(url, 1000, think_ms=0.0, ramp_s=0.0, seed=1)))
+    return {"service/ussd_sessions": {"seconds": report.elapsed_s, "peak_mb": peak,
+                                      "throughput_rps": report.sessions_per_s, "peak_sessions": gateway.peak}}
+
+
+# --- Baselines ---
+def compare(results, baseline, tolerance=0.5, memory_tolerance=0.5):
+    """Human-readable regressions of ``results`` against ``baseline`` results"""
+    regressions = []
+    for name, current in sorted(results.items()):
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        limit = reference["seconds"] * (1 + tolerance) + TIME_SLACK_S
+        if current["seconds"] > limit:
+            regressions.append(f"{name}: {current['seconds'] * 1e3:.1f}ms > {limit * 1e3:.1f}ms "
+                               f"(baseline {reference['seconds'] * 1e3:.1f}ms)")
+        if "throughput_rps" in reference and "throughput_rps" in current:
+            floor = reference["throughput_rps"] / (1 + tolerance)
+            if current["throughput_rps"] < floor:
+                regressions.append(f"{name}: {current['throughput_rps']:.0f} req/s < {floor:.0f} req/s "
+                                   f"(baseline {reference['throughput_rps']:.0f} req/s)")
+        limit = reference["peak_mb"] * (1 + memory_tolerance) + MEMORY_SLACK_MB
+        if current["peak_mb"] > limit:
+            regressions.append(f"{name}: peak {current['peak_mb']:.1f}MB > {limit:.1f}MB "
+                               f"(baseline {reference['peak_mb']:.1f}MB)")
+    return regressions
+
+
+def _report(results):
+    for name, result in sorted(results.items()):
+        cold = f"  cold {result['cold_seconds'] * 1e3:9.1f}ms" if "cold_seconds" in result else ""
+        rate = f"  {result['throughput_rps']:9.0f} req/s" if "throughput_rps" in result else ""
+        speedup = f"  x{result['speedup']:.2f}" if "speedup" in result else ""
+        print(f"{name:40s} {result['seconds'] * 1e3:10.2f}ms  peak {result['peak_mb']:8.1f}MB{cold}{rate}{speedup}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=list(SCALES))
+    parser.add_argument("--only", choices=("startup", "modes", "data", "service"))
+    parser.add_argument("--reruns", type=int, default=5)
+    parser.add_argument("--workers", type=int, nargs="+", help="sharded scorer worker counts (default 1, 2, 4, ... cores)")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed relative slowdown")
+    parser.add_argument("--memory-tolerance", type=float, default=0.5, help="allowed relative memory growth")
+    parser.add_argument("--update", action="store_true", help="store these results as the baseline")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        os.environ.setdefault("ULINZI_DATA_DIR", data_dir)
+        results = {}
+        if args.only in (None, "startup"):
+            results.update(bench_startup())
+        if args.only in (None, "modes"):
+            results.update(bench_modes(args.reruns))
+        if args.only in (None, "data"):
+            results.update(bench_data_paths(args.scales))
+            results.update(bench_snapshot_restore())
+        if args.only in (None, "service"):
+            results.update(bench_scoring_service())
+            results.update(bench_sharded_scoring(args.workers))
+            results.update(bench_ussd_gateway())
+    _report(results)
+    for line in over_budget(results):
+        print(f"OVER BUDGET {line}")
+
+    if args.update:
+        stored = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                stored = json.load(f).get("results", {})
+        stored.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"machine": {"python": platform.python_version(), "platform": platform.platform(),
+                                   "numpy": np.__version__},
+                       "results": stored}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+        return 1 if over_budget(results) else 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --update to create one")
+        return 1 if over_budget(results) else 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.tolerance, args.memory_tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return 1 if regressions or over_budget(results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
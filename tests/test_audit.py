@@ -0,0 +1,28 @@
+from ulinzi.audit import AuditLog, SegmentStore, _segment_name
+
+
+def _store(tmp_path, records=200):
+    store = SegmentStore(str(tmp_path), segment_bytes=2_000, max_segments=100, flush_every=10)
+    log = AuditLog(capacity=5, store=store, session="s1")
+    other = AuditLog(capacity=5, store=store, session="s2")
+    for i in range(records):
+        (log if i % 2 else other).add("EVENT", f"event {i}", ts=1_000.0 + i)
+    store.flush()
+    return store, log
+
+
+def test_tail_and_range_read_across_segments_by_session(tmp_path):
+    store, log = _store(tmp_path)
+    assert len(store.segments()) > 3
+    assert [record[0] for record in log.tail(20)] == [1_000.0 + i for i in range(199, 159, -2)]
+    assert [record[0] for record in log.range(1_010, 1_020)] == [1_011.0, 1_013.0, 1_015.0, 1_017.0, 1_019.0]
+    assert len(store.tail(1_000)) == 200
+
+
+def test_reads_skip_segments_deleted_after_listing(tmp_path):
+    store, log = _store(tmp_path)
+    listed = store.segments()
+    # A concurrent flush rotated the oldest segment away after it was listed.
+    store.segments = lambda: [_segment_name(1.0)] + listed
+    assert len(store.tail(1_000)) == 200
+    assert len(list(store.range(0, 2_000))) == 200
@@ -0,0 +1,42 @@
+import pytest
+
+from ulinzi.blocklist import MAX_LISTS, BlocklistIndex
+
+
+def _lists(n):
+    return {f"list{i}": [f"10.{i}.0.0/16"] for i in range(n)}
+
+
+def test_save_and_open_round_trip_with_every_list_code(tmp_path):
+    index = BlocklistIndex.build(_lists(MAX_LISTS - 1))
+    index.update(add=["192.0.2.0/24", "2001:db8::/32"], list_name="last")
+    index.save(str(tmp_path / "index"))
+
+    opened = BlocklistIndex.open(str(tmp_path / "index"))
+    assert len(opened.lists) == MAX_LISTS and len(opened) == MAX_LISTS + 1
+    codes = opened.match(["10.0.1.1", "10.126.1.1", "192.0.2.7", "2001:db8::1", "8.8.8.8"])
+    assert codes.tolist() == [0, MAX_LISTS - 2, MAX_LISTS - 1, MAX_LISTS - 1, -1]
+    assert opened.explain("192.0.2.7") == ("192.0.2.0/24", "last")
+    assert opened.explain("10.126.1.1") == ("10.126.0.0/16", f"list{MAX_LISTS - 2}")
+
+
+def test_list_beyond_the_int8_codes_is_refused_without_changes():
+    index = BlocklistIndex.build(_lists(MAX_LISTS))
+    with pytest.raises(ValueError):
+        index.update(add=["192.0.2.0/24"], remove=["10.0.0.0/16"], list_name="one too many")
+    assert len(index.lists) == MAX_LISTS
+    assert index.match(["10.0.1.1", "192.0.2.7"]).tolist() == [0, -1]
+    with pytest.raises(ValueError):
+        BlocklistIndex.build(_lists(MAX_LISTS + 1))
+
+
+def test_save_after_writes_once_the_delay_passes(tmp_path):
+    index = BlocklistIndex.build(_lists(2))
+    index.update(add=["192.0.2.0/24"], list_name="sovereign_sentinel")
+    index.save_after(str(tmp_path / "index"), delay=0.2)
+    timer = index._pending_save
+    index.save_after(str(tmp_path / "index"), delay=0.2)
+    assert index._pending_save is timer  # calls while a save is pending share it
+    timer.join()
+    opened = BlocklistIndex.open(str(tmp_path / "index"))
+    assert opened.explain("192.0.2.7") == ("192.0.2.0/24", "sovereign_sentinel")
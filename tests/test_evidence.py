@@ -0,0 +1,69 @@
+import json
+
+from ulinzi.evidence import EvidenceLog, verify_day, verify_inclusion
+
+DAY = 86_400.0
+START = 1_790_000_000.0  # 2026-09-21 UTC, mid-day
+
+
+class Clock:
+    def __init__(self, now=START):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _log(directory, clock, **kwargs):
+    return EvidenceLog(str(directory), sync_every=4, clock=clock, **kwargs)
+
+
+def _fill(log, clock, days=3, per_day=11):
+    receipts = []
+    for day in range(days):
+        clock.now = START + day * DAY
+        receipts += [log.append("alert", {"day": day, "n": n}) for n in range(per_day)]
+    log.sync()
+    return receipts
+
+
+def test_proofs_and_verify_across_day_rollover(tmp_path):
+    clock = Clock()
+    log = _log(tmp_path, clock, cached_days=1)
+    receipts = _fill(log, clock)
+    assert len(log.days()) == 3
+    for receipt in receipts:
+        leaf, proof, size, root = log.proof(receipt.index, receipt.day)
+        assert leaf.hex() == receipt.leaf and verify_inclusion(leaf, receipt.index, size, proof, root)
+        assert log.verify(receipt.index, receipt.day)
+    roots = {day: log.root(day) for day in log.days()}
+    log.close()
+
+    # Past days' roots from the cache match the ones rebuilt from disk by a fresh log.
+    reopened = _log(tmp_path, clock)
+    for day in reopened.days():
+        assert reopened.root(day) == roots[day]
+    prev = None
+    for day in reopened.days():
+        ok, records, root, prev = verify_day(reopened.path(day), prev)
+        assert ok and records == 11 and root == reopened.root(day)
+    assert prev.hex() == receipts[-1].chain
+
+
+def test_verify_detects_a_tampered_past_day_after_caching(tmp_path):
+    clock = Clock()
+    log = _log(tmp_path, clock)
+    receipts = _fill(log, clock)
+    first_day = receipts[0].day
+    assert log.verify(3, first_day)  # caches the first day's tree
+
+    path = log.path(first_day)
+    with open(path, encoding="utf-8") as f:
+        lines = f.readlines()
+    entry = json.loads(lines[3])
+    entry["data"]["n"] = 7
+    lines[3] = json.dumps(entry, sort_keys=True, separators=(",", ":")) + "\n"
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+    assert not log.verify(3, first_day)
+    assert log.verify(4, first_day)
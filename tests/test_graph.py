@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from ulinzi.graph import TransactionGraph
+
+START = np.datetime64("2026-01-01T00:00", "ns")
+
+
+def _edges(seed, n, accounts=40):
+    rng = np.random.default_rng(seed)
+    return (rng.integers(0, accounts, n), rng.integers(0, accounts, n), rng.integers(100, 10_000, n),
+            START + rng.integers(0, 3_600, n).astype("timedelta64[s]"))
+
+
+def _graph(*batches):
+    graph = TransactionGraph()
+    for batch in batches:
+        graph.add_edges(*batch)
+    return graph
+
+
+def _fresh(*batches):
+    """A graph built in one insert, so none of its caches predate the edges"""
+    return _graph(tuple(np.concatenate(column) for column in zip(*batches)))
+
+
+def test_degrees_cache_follows_inserts():
+    first, second = _edges(1, 500), _edges(2, 20)
+    graph = _graph(first)
+    graph.degrees()
+    graph.add_edges(*second)
+    pd.testing.assert_frame_equal(graph.degrees(), _fresh(first, second).degrees())
+
+
+def test_funnel_accounts_leaves_cached_degrees_untouched():
+    graph = _graph(_edges(1, 500))
+    columns = list(graph.degrees().columns)
+    graph.funnel_accounts("30min", min_fan_in=1, min_pass_share=0.0)
+    graph.funnel_accounts("5min", min_fan_in=1, min_pass_share=0.0)
+    assert list(graph.degrees().columns) == columns
+
+
+def test_inflow_index_is_rebuilt_after_an_insert():
+    first, second = _edges(1, 2_000), _edges(2, 300)
+    graph = _graph(first)
+    graph.pass_through("30min")
+    graph.add_edges(*second)
+    for window in ("30min", "5min"):
+        cached, fresh = graph.pass_through(window), _fresh(first, second).pass_through(window)
+        np.testing.assert_array_equal(cached.inflow, fresh.inflow)
+        np.testing.assert_array_equal(cached.edges, fresh.edges)
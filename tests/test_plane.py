@@ -0,0 +1,27 @@
+import pandas as pd
+
+from ulinzi.plane import DataPlane
+
+
+def _batch(locations):
+    return pd.DataFrame({"amount": range(len(locations)), "location": pd.Categorical(locations)})
+
+
+def test_publish_transactions_keeps_labels_first_seen_in_a_later_batch():
+    plane = DataPlane()
+    plane.publish_transactions(_batch(["Nairobi", "Nairobi"]))
+    before = plane.transactions()
+    plane.publish_transactions(_batch(["Mombasa", "Nairobi"]))
+    plane.publish_transactions(pd.DataFrame({"amount": [9], "location": ["Kisumu"]}))
+    location = plane.transactions()["location"]
+    assert isinstance(location.dtype, pd.CategoricalDtype)
+    assert location.tolist() == ["Nairobi", "Nairobi", "Mombasa", "Nairobi", "Kisumu"]
+    # Frames already handed to readers are never modified.
+    assert list(before["location"].cat.categories) == ["Nairobi"]
+
+
+def test_publish_transactions_trims_to_capacity():
+    plane = DataPlane(transaction_capacity=3)
+    for location in ("a", "b", "c", "d"):
+        plane.publish_transactions(_batch([location]))
+    assert plane.transactions()["location"].tolist() == ["b", "c", "d"]
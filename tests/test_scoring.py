@@ -0,0 +1,58 @@
+import asyncio
+import json
+
+import pytest
+
+from ulinzi.risk import LOCATION_PATTERNS
+from ulinzi.scoring import ScoringService, _parse
+
+GOOD = {"amount": 5000, "hour": 14, "location": LOCATION_PATTERNS[0]}
+
+
+def test_parse_accepts_a_valid_transaction():
+    assert _parse({**GOOD, "sim_swap": True, "account_id": 7}) == (
+        5000.0, 14, LOCATION_PATTERNS[0], False, True, False, 7, "7")
+
+
+@pytest.mark.parametrize("change", [
+    {"hour": 1e999}, {"hour": 3.7}, {"hour": 24}, {"hour": -1}, {"hour": "x"}, {"hour": None},
+    {"amount": float("nan")}, {"amount": 1e999}, {"amount": -1}, {"amount": [1]},
+    {"account_id": [1]}, {"account_id": 1e999}, {"account_id": "abc"},
+    {"sim_swap": "false"}, {"burst": 1}, {"behavioral_anomaly": None},
+    {"location": "Mars"},
+])
+def test_parse_rejects_bad_fields(change):
+    with pytest.raises(ValueError):
+        _parse({**GOOD, **change})
+
+
+def test_parse_rejects_missing_fields_and_non_objects():
+    with pytest.raises(ValueError, match="'hour'"):
+        _parse({"amount": 1})
+    with pytest.raises(ValueError):
+        _parse([GOOD])
+
+
+def _post(service, body):
+    status, payload, _ = asyncio.run(service._route("POST", "/score", body))
+    return status, payload
+
+
+@pytest.mark.parametrize("body", [
+    b'{"amount": 1, "hour": 1e999}',
+    b'{"amount": 1, "hour": 3, "account_id": [1]}',
+    b'{"amount": NaN, "hour": 3}',
+    b'{"amount": 1, "hour": 3, "sim_swap": "false"}',
+    b'{"transactions": []}',
+    b'not json',
+])
+def test_route_answers_bad_bodies_with_400(body):
+    status, payload = _post(ScoringService(), body)
+    assert status == 400 and payload["error"]
+
+
+def test_route_scores_a_good_body_and_refuses_oversized_batches():
+    status, payload = _post(ScoringService(), json.dumps(GOOD).encode())
+    assert status == 200 and payload["decision"]
+    status, _ = _post(ScoringService(max_pending=2), json.dumps({"transactions": [GOOD] * 3}).encode())
+    assert status == 413
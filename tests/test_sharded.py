@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ulinzi.sharded import AccountRows, ShardedScorer, shard_of, transaction_columns
+from ulinzi.synthetic import generate_transactions
+
+
+def _columns(n=2_000, seed=0):
+    frame = generate_transactions(n=n, n_accounts=200, seed=seed).sort_values("timestamp")
+    return transaction_columns(frame)
+
+
+def test_account_rows_are_dense_whatever_the_ids():
+    rows = AccountRows()
+    first = rows.rows([10**15, 7, 10**15])
+    assert sorted(set(first.tolist())) == [0, 1] and first[0] == first[2]
+    assert rows.rows([2**62, 7, 10**15]).tolist() == [2, first[1], first[0]]
+    assert len(rows) == 3
+
+
+def test_shards_spread_large_ids_and_send_unknown_ones_to_zero():
+    shards = shard_of(np.arange(10**12, 10**12 + 4_000), 4)
+    assert np.bincount(shards, minlength=4).min() > 800
+    assert shard_of([-1, -5], 4).tolist() == [0, 0]
+
+
+def test_pool_agrees_with_the_in_process_shard():
+    batches = [_columns(seed=seed) for seed in (0, 1)]
+    local, pool = ShardedScorer(0, profile_capacity=1_000), ShardedScorer(2, profile_capacity=1_000)
+    try:
+        for columns in batches:
+            expected, got = local.score(columns), pool.score(columns)
+            for name in expected:
+                np.testing.assert_array_equal(got[name], expected[name])
+    finally:
+        pool.close()
+
+
+@pytest.mark.parametrize("column, value", [("hour", 24), ("amount", np.nan), ("amount", -1.0), ("location", 99)])
+def test_a_bad_batch_changes_no_state(column, value):
+    scorer, fresh = ShardedScorer(0, profile_capacity=1_000), ShardedScorer(0, profile_capacity=1_000)
+    columns = _columns()
+    bad = {name: values.copy() for name, values in columns.items()}
+    bad[column][len(bad[column]) // 2] = value
+    with pytest.raises(ValueError, match=column):
+        scorer.score(bad)
+    assert scorer.scored == 0
+    expected, got = fresh.score(columns), scorer.score(columns)
+    for name in expected:
+        np.testing.assert_array_equal(got[name], expected[name])
+
+
+def test_transaction_columns_rejects_bad_hours():
+    frame = generate_transactions(n=10, n_accounts=5, seed=0)
+    frame["hour"] = 25
+    with pytest.raises(ValueError, match="hour"):
+        transaction_columns(pd.DataFrame(frame))
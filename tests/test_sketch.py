@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+
+from ulinzi.sketch import AlertDeduplicator
+
+
+def _events(now, offsets, types, sources):
+    return pd.DataFrame({"timestamp": [now + pd.Timedelta(seconds=s) for s in offsets],
+                         "threat_level": "critical", "type": types, "source_ip": sources})
+
+
+def test_one_second_buckets_at_todays_epoch():
+    alerts = AlertDeduplicator(window="1s")
+    now = pd.Timestamp("2026-10-18 12:00:00")
+    alerts.add(_events(now, [0, 0.5, 2], ["DDoS", "DDoS", "Phishing"], ["10.0.0.1", "10.0.0.1", "10.0.0.2"]))
+    alerts.add(_events(now, [-5], ["SIM Swap"], ["1.2.3.4"]))
+    assert [(a.type, a.source, a.count) for a in alerts.recent()] == [
+        ("Phishing", "10.0.0.2", 1), ("DDoS", "10.0.0.1", 2), ("SIM Swap", "1.2.3.4", 1)]
+    assert alerts.suppressed == 1
+
+
+@pytest.mark.parametrize("kwargs", [{"window": "500ms"}, {"types": [f"type {i}" for i in range(9)]}])
+def test_rejects_settings_that_do_not_fit_the_group_key(kwargs):
+    with pytest.raises(ValueError):
+        AlertDeduplicator(**kwargs)
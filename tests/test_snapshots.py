@@ -0,0 +1,49 @@
+import os
+import threading
+
+from ulinzi.snapshots import SnapshotStore
+
+
+def _tree(root, files):
+    for name, data in files.items():
+        path = os.path.join(root, *name.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+
+def _read(root):
+    out = {}
+    for base, _, names in os.walk(root):
+        for name in names:
+            with open(os.path.join(base, name), "rb") as f:
+                out[os.path.relpath(os.path.join(base, name), root).replace(os.sep, "/")] = f.read()
+    return out
+
+
+def test_restore_swaps_in_whole_files(tmp_path):
+    site = str(tmp_path / "site")
+    gold = {"a.gov/index.html": os.urandom(40_000), "a.gov/style.css": os.urandom(3_000),
+            "b.gov/index.html": os.urandom(20_000)}
+    _tree(site, gold)
+    store = SnapshotStore(str(tmp_path / "store"))
+    store.commit(site, ref="gold")
+
+    page = os.path.join(site, "a.gov", "index.html")
+    defaced = bytearray(gold["a.gov/index.html"])
+    defaced[10_000:10_100] = b"HACKED" * 16 + b"!!!!"
+    _tree(site, {"a.gov/index.html": bytes(defaced) + b"tail", "a.gov/evil.js": b"x"})
+    os.remove(os.path.join(site, "b.gov", "index.html"))
+    with open(page, "rb") as reader:  # a reader holding the page open keeps the defaced copy intact
+        result = store.restore("gold", site)
+        assert reader.read() == bytes(defaced) + b"tail"
+
+    assert _read(site) == gold
+    assert (result.files_created, result.files_removed) == (1, 1)
+    assert 0 < result.chunks_rewritten < len(store.manifest("gold")["a.gov/index.html"]) + 1
+    assert store.restore("gold", site).chunks_rewritten == 0
+    for thread in threading.enumerate():
+        if thread.name == "ulinzi-snapshot-retire":
+            thread.join()
+    assert os.listdir(tmp_path / "store" / "retired") == []
+    assert not [name for name in _read(site) if name.endswith(".tmp")]
@@ -0,0 +1,99 @@
+import asyncio
+
+from ulinzi.ussd import DURESS_PIN, MAX_PIN_ATTEMPTS, NORMAL_PIN, SCREENS, UssdGateway
+
+PHONE = "+254700000001"
+
+
+def _run(script):
+    """Run ``script(gateway, signals)`` on one event loop; ``signals`` collects on_duress calls"""
+    signals = []
+    gateway = UssdGateway(on_duress=lambda phone, amount, origin: signals.append((phone, amount)))
+
+    async def main():
+        return await script(gateway, signals)
+
+    return asyncio.run(main())
+
+
+async def _dial(gateway, session_id, *keys, phone=PHONE):
+    """Send the dial and every cumulative text of ``keys``; returns the screens"""
+    screens = [await gateway.respond(session_id, phone, "")]
+    for i in range(len(keys)):
+        screens.append(await gateway.respond(session_id, phone, "*".join(keys[:i + 1])))
+    return screens
+
+
+async def _lock(gateway):
+    await _dial(gateway, "lock", "1", "5000", *["0000"] * MAX_PIN_ATTEMPTS)
+    assert gateway.locked_out(PHONE)
+
+
+def test_duress_pin_signals_and_looks_like_the_normal_pin():
+    async def script(gateway, signals):
+        normal = await _dial(gateway, "a", "1", "5000", NORMAL_PIN)
+        duress = await _dial(gateway, "b", "1", "5000", DURESS_PIN, "1")
+        assert duress[3] == normal[3] == SCREENS["confirm"].format(amount=5000)
+        assert duress[4] == SCREENS["approved"].format(amount=5000)
+        assert signals == [(PHONE, 5000)]
+    _run(script)
+
+
+def test_wrong_pins_lock_the_phone_across_sessions():
+    async def script(gateway, signals):
+        first = await _dial(gateway, "a", "1", "5000", "0000", "0000")
+        assert first[-1] == SCREENS["retry_pin"].format(left=1)
+        second = await _dial(gateway, "b", "1", "5000", "0000")
+        assert second[-1].startswith("END Too many wrong PINs")
+        third = await _dial(gateway, "c", "1", "5000", NORMAL_PIN)
+        assert third[-1].startswith("END Too many wrong PINs")
+        assert gateway.locked_out(PHONE) and not gateway.locked_out("+254700000002")
+    _run(script)
+
+
+def test_duress_pin_is_signalled_while_locked_out():
+    async def script(gateway, signals):
+        await _lock(gateway)
+        screens = await _dial(gateway, "d", "1", "5000", DURESS_PIN)
+        assert screens[-1] == SCREENS["confirm"].format(amount=5000)
+        assert signals == [(PHONE, 5000)]
+        assert gateway.locked_out(PHONE)
+    _run(script)
+
+
+def test_lockout_lapses():
+    async def script(gateway, signals):
+        await _lock(gateway)
+        gateway.expire(now=1e12)
+        assert not gateway.locked_out(PHONE)
+        assert (await _dial(gateway, "e", "1", "5000", NORMAL_PIN))[-1].startswith("CON Withdraw")
+    _run(script)
+
+
+def test_retried_keypresses_resend_their_screen():
+    async def script(gateway, signals):
+        screens = await _dial(gateway, "a", "1", "5000")
+        assert await gateway.respond("a", PHONE, "1*5000") == screens[-1]
+        assert await gateway.respond("a", PHONE, "1") == screens[-1]  # stale, arrived late
+        assert await gateway.respond("a", PHONE, "1*5000*" + NORMAL_PIN) == SCREENS["confirm"].format(amount=5000)
+        assert gateway.outcomes["repeated"] == 2
+    _run(script)
+
+
+def test_retry_of_the_final_keypress_resends_the_final_screen():
+    async def script(gateway, signals):
+        final = (await _dial(gateway, "a", "2"))[-1]
+        assert final == SCREENS["balance"]
+        assert await gateway.respond("a", PHONE, "2") == final
+        assert await gateway.respond("a", "+254700000009", "2") == SCREENS["invalid"]
+        gateway.expire(now=1e12)
+        assert await gateway.respond("a", PHONE, "2") == SCREENS["expired"]
+    _run(script)
+
+
+def test_sessions_are_bound_to_their_phone():
+    async def script(gateway, signals):
+        await _dial(gateway, "a", "1")
+        assert await gateway.respond("a", "+254700000009", "1*5000") == SCREENS["invalid"]
+        assert await gateway.respond("a", PHONE, "1*5000") == SCREENS["pin"]
+    _run(script)
@@ -0,0 +1 @@
+"""Ulinzi-AI engine modules used by the Streamlit command center (app.py)"""
@@ -0,0 +1,238 @@
+"""Bounded audit log: in-memory ring buffer for the UI plus rotated on-disk segments.
+
+Every session's AuditLog writes to one shared SegmentStore. Records carry
+the writing log's ``session`` tag, so a log reading back past its ring
+only sees its own events; a log without a session reads the whole store.
+"""
+import atexit
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from itertools import islice
+
+SEGMENT_PREFIX = "audit-"
+SEGMENT_SUFFIX = ".jsonl"
+TAIL_BLOCK = 64 << 10
+
+
+def _segment_name(ts):
+    # Segment files are named by the first event's time so range reads can skip them by name.
+    return f"{SEGMENT_PREFIX}{int(ts * 1e6):020d}{SEGMENT_SUFFIX}"
+
+
+def _segment_start(name):
+    return int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]) / 1e6
+
+
+def _encode(record, session=None):
+    ts, event_type, message, status = record
+    data = {"ts": ts, "type": event_type, "msg": message, "status": status}
+    if session is not None:
+        data["session"] = session
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def _decode(line):
+    """(record, session) of one stored line"""
+    data = json.loads(line)
+    return (data["ts"], data["type"], data["msg"], data["status"]), data.get("session")
+
+
+def _reverse_lines(f, size, block=TAIL_BLOCK):
+    """Lines of a file from the last to the first, reading ``block`` bytes at a time from the end"""
+    end, rest = size, b""
+    while end > 0:
+        start = max(end - block, 0)
+        f.seek(start)
+        lines = (f.read(end - start) + rest).split(b"\n")
+        # The first piece may be the tail of a line that starts in an earlier block.
+        rest = lines.pop(0) if start else b""
+        for line in reversed(lines):
+            if line:
+                yield line
+        end = start
+    if rest:
+        yield rest
+
+
+def as_dict(record):
+    """Render a (ts, type, msg, status) record in the dashboard's log-entry shape"""
+    ts, event_type, message, status = record
+    return {"time": datetime.fromtimestamp(ts).strftime("%H:%M:%S"), "type": event_type,
+            "msg": message, "status": status}
+
+
+class SegmentStore:
+    """Append-only, time-ordered JSON-lines segments with batched flushes.
+
+    Writes are buffered and flushed every ``flush_every`` records or
+    ``flush_interval`` seconds; a segment is rotated once it passes
+    ``segment_bytes``, and the oldest segments are deleted beyond
+    ``max_segments``. Safe to share between threads (Streamlit sessions);
+    reads list the segments under the lock but read them outside it, so a
+    segment deleted in between is skipped.
+    """
+
+    def __init__(self, directory, segment_bytes=8 << 20, max_segments=64,
+                 flush_every=512, flush_interval=1.0):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        atexit.register(self.flush)
+
+    def segments(self):
+        """Segment file names, oldest first"""
+        return sorted(name for name in os.listdir(self.directory)
+                      if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX))
+
+    def append(self, record, session=None):
+        with self._lock:
+            self._pending.append((record, session))
+            if (len(self._pending) >= self.flush_every
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        segments = self.segments()
+        path = os.path.join(self.directory, segments[-1]) if segments else None
+        if path is None or os.path.getsize(path) >= self.segment_bytes:
+            path = os.path.join(self.directory, _segment_name(pending[0][0][0]))
+            segments.append(os.path.basename(path))
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("\n".join(_encode(record, session) for record, session in pending) + "\n")
+        for name in segments[:-self.max_segments]:
+            os.remove(os.path.join(self.directory, name))
+
+    def tail(self, n, session=None, since=None):
+        """Last ``n`` records, newest first (includes records not yet flushed).
+
+        Segments are read backwards from their ends, so the cost follows
+        ``n``, not the segment size. ``session`` keeps only that session's
+        records; ``since`` stops at the first record older than it.
+        """
+        with self._lock:
+            pending = self._pending[::-1]
+            segments = self.segments()
+        out = []
+        entries = itertools.chain(pending, (_decode(line) for name in reversed(segments)
+                                            for line in self._reverse(name)))
+        for record, tag in entries:
+            if len(out) >= n or (since is not None and record[0] < since):
+                break
+            if session is None or tag == session:
+                out.append(record)
+        return out
+
+    def _reverse(self, name):
+        try:
+            f = open(os.path.join(self.directory, name), "rb")
+        except FileNotFoundError:  # removed by retention since it was listed
+            return
+        with f:
+            yield from _reverse_lines(f, os.fstat(f.fileno()).st_size)
+
+    def range(self, start, end, session=None):
+        """Yield records with ``start <= ts < end`` in time order (epoch seconds), optionally of one ``session``"""
+        with self._lock:
+            pending = list(self._pending)
+            segments = self.segments()
+        starts = [_segment_start(name) for name in segments]
+        for i, name in enumerate(segments):
+            if starts[i] >= end or (i + 1 < len(starts) and starts[i + 1] < start):
+                continue
+            try:
+                f = open(os.path.join(self.directory, name), "rb")
+            except FileNotFoundError:  # removed by retention since it was listed
+                continue
+            with f:
+                f.seek(_seek_time(f, os.fstat(f.fileno()).st_size, start))
+                for line in f:
+                    record, tag = _decode(line)
+                    if record[0] >= end:
+                        break
+                    if record[0] >= start and (session is None or tag == session):
+                        yield record
+        for record, tag in pending:
+            if start <= record[0] < end and (session is None or tag == session):
+                yield record
+
+
+def _line_start(f, pos):
+    """Offset of the first line that starts at or after ``pos``"""
+    if pos == 0:
+        return 0
+    f.seek(pos - 1)
+    f.readline()
+    return f.tell()
+
+
+def _seek_time(f, size, ts):
+    """Byte offset of the first line in a time-ordered segment with time >= ``ts``"""
+    lo, hi = 0, size
+    while lo < hi:
+        mid = (lo + hi) // 2
+        f.seek(_line_start(f, mid))
+        line = f.readline()
+        if not line or _decode(line)[0][0] >= ts:
+            hi = mid
+        else:
+            lo = mid + 1
+    return _line_start(f, lo)
+
+
+class AuditLog:
+    """Fixed-size ring buffer of recent events, optionally persisted to a SegmentStore.
+
+    With a ``session`` tag, reads that go to the store return only this
+    log's events; without one they return every session's.
+    """
+
+    def __init__(self, capacity=500, store=None, session=None):
+        self._ring = deque(maxlen=capacity)
+        self.store = store
+        self.session = session
+        self.started = time.time()
+
+    def __len__(self):
+        return len(self._ring)
+
+    def add(self, event_type, message, status="INFO", ts=None):
+        record = (time.time() if ts is None else ts, event_type, message, status)
+        self.started = min(self.started, record[0])
+        self._ring.append(record)
+        if self.store is not None:
+            self.store.append(record, self.session)
+        return record
+
+    def tail(self, n=None):
+        """Most recent records, newest first; falls back to disk beyond the ring"""
+        if n is None or n <= len(self._ring):
+            return list(islice(reversed(self._ring), n))
+        if self.store is not None:
+            # A session's events all come after it started, so its disk read stops there.
+            return self.store.tail(n, self.session, self.started if self.session is not None else None)
+        return list(self._ring)[::-1]
+
+    def range(self, start, end):
+        """Records with ``start <= ts < end``, from disk when a store is attached"""
+        if self.store is not None:
+            return list(self.store.range(start, end, self.session))
+        return [record for record in self._ring if start <= record[0] < end]
@@ -0,0 +1,370 @@
+"""CIDR blocklist index: vectorized matching of source addresses against IP reputation lists.
+
+The ranges of every list are flattened into sorted, disjoint intervals,
+one table for IPv4 and one for IPv6. Each interval is labelled with the
+most specific CIDR that covers it, so matching a batch of addresses is
+one ``searchsorted`` over the interval starts. IPv4 keys are uint64.
+IPv6 keys are 17-byte big-endian strings, which sort like the integers
+and leave room for the end of ::/0.
+
+CIDRs nest or are disjoint, so every entry also records its parent, the
+next less specific entry covering it. ``update`` adds and removes CIDRs
+without a rebuild. Additions go to a small delta index consulted next to
+the base. A removed base entry is a tombstone, and a match on it falls
+back to its parent. ``compact`` folds both into a new base.
+
+``save`` writes the index as .npy files and ``open`` maps them with
+``mmap_mode="r"``, so worker processes share one copy through the page
+cache. Updates made in one process are visible to others once saved;
+``save_after`` batches the saves of frequent small updates.
+
+List codes are int8, so an index holds at most MAX_LISTS named lists.
+"""
+import io
+import ipaddress
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+V4, V6 = 4, 6
+_V4_CIDR = r"\d{1,3}(?:\.\d{1,3}){3}(?:/\d{1,2})?"
+_V6_BYTES = 17
+META = "meta.json"
+MAX_LISTS = int(np.iinfo(np.int8).max) + 1  # codes 0..127; -1 means unlisted
+_COLUMNS = ("start", "stop", "prefix", "list", "parent", "bounds", "owner")
+
+
+# --- Parsing ---
+def _v6_key(value):
+    return int(value).to_bytes(_V6_BYTES, "big")
+
+
+def parse_cidrs(cidrs):
+    """{family: (row positions, start, stop, prefix)} of the valid CIDRs (bare addresses are /32 or /128)"""
+    text = pd.Series(list(cidrs), dtype=object).astype(str).str.strip()
+    parsed = {}
+    is_v4 = text.str.fullmatch(_V4_CIDR).to_numpy(bool)
+    if is_v4.any():
+        # The C CSV reader splits "a.b.c.d/len" far faster than per-row string methods.
+        fields = pd.read_csv(io.StringIO("\n".join(text[is_v4]).replace("/", ".")), sep=".", header=None,
+                             names=range(5), dtype=float).to_numpy()
+        octets = fields[:, :4].astype(np.uint64)
+        prefix = np.nan_to_num(fields[:, 4], nan=32).astype(np.int16)
+        valid = (fields[:, :4] <= 255).all(axis=1) & (prefix <= 32)
+        address = (octets[:, 0] << np.uint64(24)) | (octets[:, 1] << np.uint64(16)) \
+            | (octets[:, 2] << np.uint64(8)) | octets[:, 3]
+        size = np.uint64(1) << (32 - prefix[valid]).astype(np.uint64)
+        start = address[valid] & ~(size - np.uint64(1))
+        parsed[V4] = (np.flatnonzero(is_v4)[valid], start, start + size, prefix[valid])
+    rows, start, stop, prefix = [], [], [], []
+    for row in np.flatnonzero(~is_v4 & text.str.contains(":", regex=False).to_numpy(bool)):
+        try:
+            network = ipaddress.IPv6Network(text.iat[row], strict=False)
+        except ValueError:
+            continue
+        rows.append(row)
+        start.append(_v6_key(network.network_address))
+        stop.append(_v6_key(int(network.network_address) + network.num_addresses))
+        prefix.append(network.prefixlen)
+    if rows:
+        parsed[V6] = (np.array(rows), np.array(start, f"S{_V6_BYTES}"), np.array(stop, f"S{_V6_BYTES}"),
+                      np.array(prefix, np.int16))
+    return parsed
+
+
+def parse_addresses(addresses):
+    """{family: (positions, keys)} for IPv4/IPv6 addresses (integers are IPv4, as in ``source_ip``)"""
+    addresses = np.asarray(addresses).ravel()
+    if addresses.dtype.kind in "iu":
+        return {V4: (np.arange(len(addresses)), addresses.astype(np.uint64))}
+    text = pd.Series(addresses, dtype=object).astype(str)
+    is_v6 = text.str.contains(":", regex=False).to_numpy(bool)
+    keys = {}
+    if not is_v6.all():
+        octets = text[~is_v6].str.split(".", expand=True).to_numpy(np.uint64)
+        keys[V4] = (np.flatnonzero(~is_v6), (octets[:, 0] << np.uint64(24)) | (octets[:, 1] << np.uint64(16))
+                    | (octets[:, 2] << np.uint64(8)) | octets[:, 3])
+    if is_v6.any():
+        keys[V6] = (np.flatnonzero(is_v6), np.array([_v6_key(ipaddress.IPv6Address(value)) for value in text[is_v6]],
+                                                     f"S{_V6_BYTES}"))
+    return keys
+
+
+def read_lists(paths):
+    """{list name (file name without extension): CIDR strings} from blocklist files, one CIDR per line, # comments"""
+    lists = {}
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding="utf-8") as f:
+            lists[name] = [fields[0] for fields in (line.split("#", 1)[0].split() for line in f) if fields]
+    return lists
+
+
+# --- Interval tables ---
+def _spans(lo, hi):
+    """Concatenated ``arange(lo[i], hi[i])`` for every i"""
+    lengths = hi - lo
+    return np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + np.repeat(lo, lengths)
+
+
+class _Ranges:
+    """One address family: entries sorted by (prefix, start) plus the disjoint intervals they own"""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.removed = None  # tombstones, allocated on the first removal so mapped columns stay shared
+
+    def __len__(self):
+        return len(self.columns["start"])
+
+    @classmethod
+    def build(cls, start, stop, prefix, lists):
+        order = np.lexsort((np.arange(len(start)), start, prefix))
+        start, stop, prefix, lists = start[order], stop[order], prefix[order], lists[order]
+        # Keep the first list's entry for a CIDR listed more than once.
+        first = np.r_[True, (start[1:] != start[:-1]) | (prefix[1:] != prefix[:-1])][:len(start)]
+        start, stop, prefix, lists = start[first], stop[first], prefix[first], lists[first]
+        bounds = np.unique(np.concatenate([start, stop]))
+        lo, hi = np.searchsorted(bounds, start), np.searchsorted(bounds, stop)
+        owner = np.full(len(bounds), -1, np.int64)
+        parent = np.full(len(start), -1, np.int64)
+        # Paint from the least specific prefix up; whatever a CIDR paints over is its parent.
+        edges = np.r_[0, np.flatnonzero(prefix[1:] != prefix[:-1]) + 1, len(prefix)]
+        for a, b in zip(edges[:-1], edges[1:]):
+            parent[a:b] = owner[lo[a:b]]
+            owner[_spans(lo[a:b], hi[a:b])] = np.repeat(np.arange(a, b), hi[a:b] - lo[a:b])
+        changes = np.r_[True, owner[1:] != owner[:-1]][:len(owner)]
+        return cls({"start": start, "stop": stop, "prefix": prefix, "list": lists, "parent": parent,
+                    "bounds": bounds[changes], "owner": owner[changes]})
+
+    def find(self, keys):
+        """Entry of the most specific live CIDR containing each key, or -1"""
+        bounds, owner = self.columns["bounds"], self.columns["owner"]
+        if not len(bounds):
+            return np.full(len(keys), -1, np.int64)
+        at = np.searchsorted(bounds, keys, side="right") - 1
+        hit = np.where(at >= 0, owner[np.maximum(at, 0)], -1)
+        if self.removed is not None:
+            parent = self.columns["parent"]
+            while True:
+                dead = hit >= 0
+                dead[dead] = self.removed[hit[dead]]
+                if not dead.any():
+                    break
+                hit[dead] = parent[hit[dead]]
+        return hit
+
+    def locate(self, start, prefix):
+        """Entry index of exactly this CIDR, or -1"""
+        columns = self.columns
+        a, b = np.searchsorted(columns["prefix"], prefix, side="left"), np.searchsorted(columns["prefix"], prefix, "right")
+        i = a + int(np.searchsorted(columns["start"][a:b], start))
+        return i if i < b and columns["start"][i] == start else -1
+
+    def live(self):
+        """(start, stop, prefix, list) of the entries not removed"""
+        keep = slice(None) if self.removed is None else ~self.removed
+        return tuple(np.asarray(self.columns[name][keep]) for name in ("start", "stop", "prefix", "list"))
+
+    def get(self, name, hit, default=-1):
+        """Column ``name`` of each hit entry, ``default`` where there is none"""
+        if not len(self):
+            return np.full(len(hit), default, self.columns[name].dtype)
+        return np.where(hit >= 0, self.columns[name][np.maximum(hit, 0)], default)
+
+
+def _empty(family):
+    dtype = np.uint64 if family == V4 else f"S{_V6_BYTES}"
+    return _Ranges.build(np.empty(0, dtype), np.empty(0, dtype), np.empty(0, np.int16), np.empty(0, np.int8))
+
+
+# --- Index ---
+class BlocklistIndex:
+    """Matches IPv4/IPv6 addresses against named CIDR lists; safe to share between threads.
+
+    ``match`` returns a list code per address (-1 when unlisted) and
+    ``lists`` names the codes. Where lists overlap, the most specific CIDR
+    wins.
+    """
+
+    def __init__(self, families, lists):
+        self.lists = list(lists)
+        self._base = families
+        self._added = {}  # (family, start, prefix) -> (stop, list code)
+        self._delta = {family: _empty(family) for family in (V4, V6)}
+        self._pending_save = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, lists):
+        """Index ``{list name: CIDR strings}``; earlier lists win for a CIDR listed twice"""
+        names = list(lists)
+        if len(names) > MAX_LISTS:
+            raise ValueError(f"{len(names)} lists given; an index holds at most {MAX_LISTS}")
+        cidrs = [cidr for name in names for cidr in lists[name]]
+        codes = np.repeat(np.arange(len(names), dtype=np.int8), [len(lists[name]) for name in names])
+        parsed = parse_cidrs(cidrs)
+        families = {}
+        for family in (V4, V6):
+            if family in parsed:
+                rows, start, stop, prefix = parsed[family]
+                families[family] = _Ranges.build(start, stop, prefix, codes[rows])
+            else:
+                families[family] = _empty(family)
+        return cls(families, names)
+
+    @classmethod
+    def from_files(cls, paths):
+        return cls.build(read_lists(paths))
+
+    def __len__(self):
+        with self._lock:
+            removed = sum(int(ranges.removed.sum()) for ranges in self._base.values() if ranges.removed is not None)
+            return sum(map(len, self._base.values())) - removed + len(self._added)
+
+    @property
+    def nbytes(self):
+        return sum(np.asarray(values).nbytes for ranges in self._base.values() for values in ranges.columns.values())
+
+    # --- Lookups ---
+    def _lookup(self, addresses):
+        """(family, positions, base entries, delta entries) for each family present in ``addresses``"""
+        with self._lock:
+            base, delta = dict(self._base), dict(self._delta)
+        for family, (positions, keys) in parse_addresses(addresses).items():
+            yield family, positions, base[family], base[family].find(keys), delta[family], delta[family].find(keys)
+
+    def match(self, addresses):
+        """int8 list code of the most specific CIDR containing each address, -1 when unlisted"""
+        addresses = np.asarray(addresses).ravel()
+        codes = np.full(len(addresses), -1, np.int8)
+        for _, positions, base, b, delta, d in self._lookup(addresses):
+            code = base.get("list", b)
+            if len(delta):
+                newer = (d >= 0) & (delta.get("prefix", d) >= base.get("prefix", b))
+                code = np.where(newer, delta.get("list", d), code)
+            codes[positions] = code
+        return codes
+
+    def contains(self, addresses):
+        return self.match(addresses) >= 0
+
+    def explain(self, address):
+        """(CIDR, list name) of the most specific entry containing one address, or None"""
+        for family, _, base, b, delta, d in self._lookup([address]):
+            found = [(ranges.columns["prefix"][hit[0]], ranges, hit[0]) for ranges, hit in ((delta, d), (base, b))
+                     if hit[0] >= 0]
+            if not found:
+                return None
+            prefix, ranges, entry = max(found, key=lambda item: item[0])
+            start = ranges.columns["start"][entry]
+            if family == V4:
+                network = ipaddress.IPv4Network((int(start), int(prefix)))
+            else:
+                # NumPy drops trailing NUL bytes from fixed-width strings; pad them back.
+                network = ipaddress.IPv6Network((int.from_bytes(start.ljust(_V6_BYTES, b"\0"), "big"), int(prefix)))
+            return str(network), self.lists[ranges.columns["list"][entry]]
+        return None
+
+    # --- Updates ---
+    def _code(self, list_name):
+        if list_name not in self.lists:
+            if len(self.lists) >= MAX_LISTS:
+                raise ValueError(f"cannot add list {list_name!r}: an index holds at most {MAX_LISTS} lists")
+            self.lists.append(list_name)
+        return self.lists.index(list_name)
+
+    def update(self, add=(), remove=(), list_name="manual"):
+        """Add CIDRs to ``list_name`` and remove CIDRs (from any list) without rebuilding the base.
+        Raises ValueError, changing nothing, when ``list_name`` would be list MAX_LISTS + 1."""
+        with self._lock:
+            parsed = parse_cidrs(add)
+            code = self._code(list_name) if parsed else None
+            for family, (_, start, stop, prefix) in parse_cidrs(remove).items():
+                base = self._base[family]
+                for key, length in zip(start, prefix):
+                    self._added.pop((family, key, int(length)), None)
+                    self._tombstone(base, base.locate(key, length), True)
+            for family, (_, start, stop, prefix) in parsed.items():
+                base = self._base[family]
+                for key, end, length in zip(start, stop, prefix):
+                    entry = base.locate(key, length)
+                    # Already in the base under this list: revive it; under another list: the delta replaces it.
+                    same = entry >= 0 and base.columns["list"][entry] == code
+                    self._tombstone(base, entry, not same)
+                    if not same:
+                        self._added[(family, key, int(length))] = (end, code)
+            self._delta = {family: self._delta_ranges(family) for family in (V4, V6)}
+
+    @staticmethod
+    def _tombstone(base, entry, removed):
+        if entry < 0 or (base.removed is None and not removed):
+            return
+        if base.removed is None:
+            base.removed = np.zeros(len(base), bool)
+        base.removed[entry] = removed
+
+    def _delta_ranges(self, family):
+        entries = [(key[1], stop, key[2], code) for key, (stop, code) in self._added.items() if key[0] == family]
+        if not entries:
+            return _empty(family)
+        start, stop, prefix, lists = zip(*entries)
+        dtype = np.uint64 if family == V4 else f"S{_V6_BYTES}"
+        return _Ranges.build(np.array(start, dtype), np.array(stop, dtype), np.array(prefix, np.int16),
+                             np.array(lists, np.int8))
+
+    def compact(self):
+        """Fold updates into a freshly built base (delta entries win over the base for the same CIDR)"""
+        with self._lock:
+            for family in (V4, V6):
+                parts = list(zip(self._delta[family].live(), self._base[family].live()))
+                self._base[family] = _Ranges.build(*(np.concatenate(columns) for columns in parts))
+            self._added = {}
+            self._delta = {family: _empty(family) for family in (V4, V6)}
+
+    # --- Persistence ---
+    def save(self, directory):
+        """Compact and write the index atomically (replacing any index already there)"""
+        self.compact()
+        tmp = f"{directory}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        for family, ranges in self._base.items():
+            os.makedirs(os.path.join(tmp, f"v{family}"))
+            for name in _COLUMNS:
+                np.save(os.path.join(tmp, f"v{family}", f"{name}.npy"), ranges.columns[name])
+        with open(os.path.join(tmp, META), "w", encoding="utf-8") as f:
+            json.dump({"lists": self.lists}, f)
+        old = f"{directory}.old"
+        if os.path.exists(directory):
+            shutil.rmtree(old, ignore_errors=True)
+            os.replace(directory, old)
+        os.replace(tmp, directory)
+        shutil.rmtree(old, ignore_errors=True)
+
+    def save_after(self, directory, delay=5.0):
+        """``save`` from a background timer within ``delay`` seconds; calls while one is pending share it"""
+        with self._lock:
+            if self._pending_save is not None:
+                return
+            self._pending_save = threading.Timer(delay, self._deferred_save, (directory,))
+            self._pending_save.daemon = False  # an exiting interpreter waits for the save instead of dropping it
+            self._pending_save.start()
+
+    def _deferred_save(self, directory):
+        with self._lock:
+            self._pending_save = None
+        self.save(directory)
+
+    @classmethod
+    def open(cls, directory):
+        """Memory-map a saved index read-only"""
+        with open(os.path.join(directory, META), encoding="utf-8") as f:
+            lists = json.load(f)["lists"]
+        families = {family: _Ranges({name: np.load(os.path.join(directory, f"v{family}", f"{name}.npy"), mmap_mode="r")
+                                     for name in _COLUMNS})
+                    for family in (V4, V6)}
+        return cls(families, lists)
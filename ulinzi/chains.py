@@ -0,0 +1,253 @@
+"""Streaming kill-chain correlator for the Intelligence Core's Chain Analysis Engine.
+
+Security events are mapped onto the five kill-chain stages and joined per
+account: an event at stage s extends the account's most recent stage s-1
+record if that chain started within ``window``. Only the latest record per
+account and stage is kept, and records whose chain started before the
+watermark minus ``window`` are evicted, so memory is bounded by the
+accounts active within the window rather than by total history.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+STAGES = ("Initial Access", "Lateral Movement", "Data Exfiltration", "Financial Transfer", "Money Laundering")
+# Event kind -> stage index; other kinds are ignored by the correlator.
+KIND_STAGES = {
+    "Phishing": 0,
+    "SIM Swap": 1,
+    "Data Exfiltration": 2,
+    "FLAGGED": 3,
+    "BLOCKED": 3,
+    "Pass-through": 4,
+}
+LEVEL_SEVERITY = {"low": 0.25, "medium": 0.5, "high": 0.75, "critical": 0.95}
+_UNSEEN = np.iinfo(np.int64).min  # also NaT when viewed as datetime64[ns]
+
+
+# --- Event adapters ---
+def threat_events(threats):
+    """Security events from threat rows that carry an ``account_id`` (rows without one are skipped)"""
+    threats = pd.DataFrame(threats)
+    if "account_id" not in threats:
+        threats = threats.iloc[:0].assign(account_id=0)
+    threats = threats[threats["account_id"].notna()]
+    return pd.DataFrame({
+        "timestamp": threats["timestamp"].to_numpy(),
+        "account_id": threats["account_id"].to_numpy(np.int64),
+        "kind": threats["type"].astype(str).to_numpy(),
+        "severity": threats["threat_level"].astype(str).map(LEVEL_SEVERITY).fillna(0.5).to_numpy(float),
+    })
+
+
+def transaction_events(transactions):
+    """Security events from flagged and blocked Financial Sentinel decisions"""
+    flagged = transactions[transactions["status"].astype(str) != "APPROVED"]
+    return pd.DataFrame({
+        "timestamp": flagged["timestamp"].to_numpy(),
+        "account_id": flagged["account_id"].to_numpy(np.int64),
+        "kind": flagged["status"].astype(str).to_numpy(),
+        "severity": flagged["risk_score"].to_numpy(float) / 100.0,
+    })
+
+
+def laundering_events(graph, window="30min"):
+    """Security events from a TransactionGraph's pass-through edges, keyed by sender"""
+    flows = graph.pass_through(window)
+    src = graph.nodes.accounts[graph.edges("src")[flows.edges]]
+    return pd.DataFrame({
+        "timestamp": graph.edges("ts")[flows.edges].view("datetime64[ns]"),
+        "account_id": src,
+        "kind": "Pass-through",
+        "severity": np.clip(flows.ratio[flows.edges], 0.0, 1.0) * 0.9,
+    })
+
+
+# --- Correlator ---
+def _take(records, index):
+    return {name: values[index] for name, values in records.items()}
+
+
+def _concat(a, b):
+    return {name: np.concatenate([a[name], b[name]]) for name in a}
+
+
+def _empty():
+    return {
+        "account": np.empty(0, np.int64),
+        "ts": np.empty(0, np.int64),
+        "start": np.empty(0, np.int64),
+        "times": np.empty((0, len(STAGES)), np.int64),
+        "weights": np.zeros((0, len(STAGES))),
+        "prevented": np.empty(0, np.uint8),
+    }
+
+
+class KillChainCorrelator:
+    """Links security events into per-account kill chains within a time window.
+
+    ``ingest`` takes batches of (timestamp, account_id, kind, severity);
+    chains reaching at least ``min_stages`` stages are emitted with a
+    confidence of 1 - prod(1 - severity) over their stages, and the
+    ``capacity`` most advanced ones are retained.
+    """
+
+    def __init__(self, window="1h", min_stages=2, capacity=1000):
+        self.window = pd.Timedelta(window).value
+        self.min_stages = min_stages
+        self.capacity = capacity
+        self.watermark = _UNSEEN
+        self.events = 0
+        self._state = [_empty() for _ in STAGES]
+        self._chains = pd.DataFrame()
+        self._lock = threading.Lock()
+
+    @property
+    def state_size(self):
+        """Records held across all stages (bounded by accounts active in the window)"""
+        return sum(len(records["account"]) for records in self._state)
+
+    def ingest(self, events):
+        """Correlate a batch of events; returns the chains it created or extended"""
+        events = pd.DataFrame(events)
+        stage = events["kind"].astype(str).map(KIND_STAGES).to_numpy()
+        keep = ~np.isnan(stage.astype(float))
+        ts = pd.to_datetime(events["timestamp"]).to_numpy("datetime64[ns]").view(np.int64)[keep]
+        order = np.argsort(ts, kind="stable")
+        batch = {
+            "ts": ts[order],
+            "account": events["account_id"].to_numpy(np.int64)[keep][order],
+            "stage": stage[keep].astype(np.int8)[order],
+            "severity": events["severity"].to_numpy(float)[keep][order],
+            "blocked": (events["kind"].astype(str).to_numpy() == "BLOCKED")[keep][order],
+        }
+        with self._lock:
+            self.events += len(batch["ts"])
+            if len(batch["ts"]):
+                self.watermark = max(self.watermark, int(batch["ts"][-1]))
+            return self._correlate(batch)
+
+    def _correlate(self, batch):
+        reached = []
+        for s in range(len(STAGES)):
+            mask = batch["stage"] == s
+            ts, account = batch["ts"][mask], batch["account"][mask]
+            if s == 0:
+                records = _empty()
+                records.update(account=account, ts=ts, start=ts.copy(),
+                               times=np.full((len(ts), len(STAGES)), _UNSEEN, np.int64),
+                               weights=np.zeros((len(ts), len(STAGES))),
+                               prevented=np.zeros(len(ts), np.uint8))
+                src = np.arange(len(ts))
+            else:
+                records, src = self._extend(ts, account, self._state[s - 1], reached[s - 1])
+            records["times"][:, s] = ts[src]
+            records["weights"][:, s] = batch["severity"][mask][src]
+            records["prevented"] |= (batch["blocked"][mask][src].astype(np.uint8) << s)
+            reached.append(records)
+        for s, records in enumerate(reached):
+            self._state[s] = self._merge(self._state[s], records)
+        return self._emit(reached)
+
+    def _extend(self, ts, account, state, fresh):
+        """Join stage-s events to the latest stage-(s-1) record of the same account.
+
+        Candidates come from earlier batches (``state``, sorted by account)
+        and from this batch (``fresh``, sorted by time); a candidate must not
+        be later than the event and its chain must have started within the
+        window.
+        """
+        n = len(ts)
+        best_start = np.full(n, _UNSEEN, np.int64)
+        from_state = np.full(n, -1, np.int64)
+        from_fresh = np.full(n, -1, np.int64)
+        if len(state["account"]) and n:
+            pos = np.minimum(np.searchsorted(state["account"], account), len(state["account"]) - 1)
+            hit = (state["account"][pos] == account) & (state["ts"][pos] <= ts)
+            from_state = np.where(hit, pos, -1)
+            best_start = np.where(hit, state["start"][pos], _UNSEEN)
+        if len(fresh["account"]) and n:
+            left = pd.DataFrame({"ts": ts, "account": account})
+            right = pd.DataFrame({"ts": fresh["ts"], "account": fresh["account"], "row": np.arange(len(fresh["ts"]))})
+            joined = pd.merge_asof(left, right.sort_values("ts", kind="stable"), on="ts", by="account",
+                                   direction="backward")
+            row = joined["row"].to_numpy()
+            found = ~np.isnan(row)
+            row = np.where(found, row, 0).astype(np.int64)
+            fresh_start = np.where(found, fresh["start"][row], _UNSEEN)
+            better = fresh_start > best_start
+            from_fresh = np.where(better, row, -1)
+            from_state = np.where(better, -1, from_state)
+            best_start = np.maximum(best_start, fresh_start)
+        ok = (best_start != _UNSEEN) & (ts - best_start <= self.window)
+        use_state = np.flatnonzero(ok & (from_state >= 0))
+        use_fresh = np.flatnonzero(ok & (from_fresh >= 0))
+        records = _concat(_take(state, from_state[use_state]), _take(fresh, from_fresh[use_fresh]))
+        src = np.concatenate([use_state, use_fresh])
+        records["account"] = account[src]
+        records["ts"] = ts[src]
+        return records, src
+
+    def _merge(self, state, records):
+        """Keep the latest record per account, dropping chains that can no longer grow"""
+        merged = _concat(state, records)
+        merged = _take(merged, merged["start"] >= self.watermark - self.window)
+        order = np.lexsort((merged["ts"], merged["account"]))
+        account = merged["account"][order]
+        last = np.append(account[1:] != account[:-1], True)[:len(account)]
+        return _take(merged, order[last])
+
+    def _emit(self, reached):
+        rows = []
+        for s in range(self.min_stages - 1, len(STAGES)):
+            records = reached[s]
+            if not len(records["account"]):
+                continue
+            times = records["times"].view("datetime64[ns]")
+            rows.append(pd.DataFrame({
+                "account_id": records["account"],
+                "start": records["start"].view("datetime64[ns]"),
+                "end": records["ts"].view("datetime64[ns]"),
+                "stages": s + 1,
+                "confidence": 1.0 - np.prod(1.0 - records["weights"], axis=1),
+                **{stage: times[:, i] for i, stage in enumerate(STAGES)},
+                **{f"w{i}": records["weights"][:, i] for i in range(len(STAGES))},
+                "prevented": records["prevented"],
+            }))
+        if not rows:
+            return pd.DataFrame()
+        emitted = pd.concat(rows, ignore_index=True)
+        chains = pd.concat([self._chains, emitted], ignore_index=True)
+        chains = chains.drop_duplicates(["account_id", "start"], keep="last")
+        chains = chains.sort_values(["stages", "confidence"], ascending=False, kind="stable")
+        self._chains = chains.head(self.capacity).reset_index(drop=True)
+        return emitted
+
+    # --- Views ---
+    def chains(self, limit=None):
+        """Retained chains, most advanced and most confident first"""
+        with self._lock:
+            chains = self._chains
+        return chains if limit is None else chains.head(limit)
+
+    def stage_table(self, chain):
+        """Per-stage rows (Stage, Time, Confidence, Status) for one chain row"""
+        rows = []
+        for i, stage in enumerate(STAGES):
+            seen = not pd.isna(chain[stage])
+            if not seen:
+                status = "Monitoring"
+            elif int(chain["prevented"]) >> i & 1:
+                status = "Prevented"
+            elif i >= 3:
+                status = "Tracked"
+            else:
+                status = "Detected"
+            rows.append({
+                "Stage": stage,
+                "Time": chain[stage].strftime("%H:%M:%S") if seen else "—",
+                "Confidence": int(round(chain[f"w{i}"] * 100)) if seen else 0,
+                "Status": status,
+            })
+        return pd.DataFrame(rows)
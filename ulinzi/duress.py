@@ -0,0 +1,194 @@
+"""Concurrent Code Red dispatcher for the Duress Protocol.
+
+Emergency actions form a dependency graph: each Action awaits only the
+actions it depends on, so independent ones (GPS fix, account freeze) fire
+together and the police alert leaves as soon as the GPS fix settles.
+``deps`` are hard dependencies whose values the action needs; ``after``
+are soft ones it merely waits for, receiving their ActionResult whatever
+the outcome, so the police alert and the evidence record never depend on
+another service being up. Every action has its own timeout and retry
+budget, and the report carries per-action timings plus time-to-alert
+measured from PIN entry.
+"""
+import asyncio
+import json
+import time
+import urllib.parse
+import uuid
+from collections import namedtuple
+
+ActionResult = namedtuple("ActionResult", "name status value attempts started_ms finished_ms error")
+DispatchReport = namedtuple("DispatchReport", "results elapsed_ms time_to_alert_ms")
+
+OK, FAILED, SKIPPED = "ok", "failed", "skipped"
+
+
+class Action:
+    """One emergency step: ``call(upstream)`` is a coroutine fed its dependencies.
+
+    ``upstream`` maps each of ``deps`` to its value (the action is skipped
+    if one of them did not succeed) and each of ``after`` to its
+    ActionResult, whatever its status.
+    """
+
+    def __init__(self, name, call, deps=(), timeout=2.0, retries=2, backoff=0.05, after=()):
+        self.name = name
+        self.call = call
+        self.deps = tuple(deps)
+        self.after = tuple(after)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+
+def _check_graph(actions):
+    names = {action.name for action in actions}
+    graph = {action.name: action.deps + action.after for action in actions}
+    for name, deps in graph.items():
+        missing = set(deps) - names
+        if missing:
+            raise ValueError(f"action {name!r} depends on unknown {sorted(missing)}")
+    done, visiting = set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"dependency cycle through {name!r}")
+        visiting.add(name)
+        for dep in graph[name]:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for name in graph:
+        visit(name)
+
+
+async def _attempt(action, upstream, origin):
+    started = (time.perf_counter() - origin) * 1e3
+    error = None
+    for attempt in range(1, action.retries + 2):
+        try:
+            value = await asyncio.wait_for(action.call(upstream), action.timeout)
+            return ActionResult(action.name, OK, value, attempt, started, (time.perf_counter() - origin) * 1e3, None)
+        except Exception as exc:  # any failure of one action is reported, never raised into the dispatch
+            error = exc
+            if attempt <= action.retries:
+                await asyncio.sleep(action.backoff * 2 ** (attempt - 1))
+    return ActionResult(action.name, FAILED, None, action.retries + 1, started,
+                        (time.perf_counter() - origin) * 1e3, repr(error))
+
+
+async def dispatch(actions, origin=None, alert="alert_police", on_done=None):
+    """Run ``actions`` as a dependency graph; returns a DispatchReport.
+
+    ``origin`` is the perf_counter() reading at PIN entry (default: now);
+    ``on_done(result)`` is called as each action settles. Actions whose
+    dependencies failed are reported as skipped.
+    """
+    _check_graph(actions)
+    origin = time.perf_counter() if origin is None else origin
+    tasks = {}
+
+    async def run(action):
+        upstream = {}
+        for dep in action.deps:
+            result = await tasks[dep]
+            if result.status != OK:
+                now = (time.perf_counter() - origin) * 1e3
+                skipped = ActionResult(action.name, SKIPPED, None, 0, now, now, f"{dep} {result.status}")
+                if on_done is not None:
+                    on_done(skipped)
+                return skipped
+            upstream[dep] = result.value
+        for dep in action.after:
+            upstream[dep] = await tasks[dep]
+        result = await _attempt(action, upstream, origin)
+        if on_done is not None:
+            on_done(result)
+        return result
+
+    # All tasks exist before any of them runs, so dependency lookups always resolve.
+    for action in actions:
+        tasks[action.name] = asyncio.ensure_future(run(action))
+    results = {result.name: result for result in await asyncio.gather(*tasks.values())}
+    alerted = results.get(alert)
+    time_to_alert = alerted.finished_ms if alerted is not None and alerted.status == OK else None
+    return DispatchReport(results, (time.perf_counter() - origin) * 1e3, time_to_alert)
+
+
+async def post_json(url, payload):
+    """Minimal HTTP/1.1 JSON POST on asyncio streams; non-2xx responses raise ConnectionError"""
+    parts = urllib.parse.urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    try:
+        body = json.dumps(payload).encode()
+        writer.write(
+            f"POST {parts.path or '/'} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+        status_line = (await reader.readline()).split()
+        if len(status_line) < 2 or not status_line[1].isdigit():
+            raise ConnectionError(f"POST {url} returned a malformed status line")
+        status = int(status_line[1])
+        while (await reader.readline()).strip():
+            pass
+        data = await reader.read()
+    finally:
+        writer.close()
+    if not 200 <= status < 300:
+        raise ConnectionError(f"POST {url} returned {status}")
+    return json.loads(data) if data else None
+
+
+# --- Code Red Protocol ---
+def code_red_actions(endpoints, account, amount, lat, lon, evidence_log=None, timeout=2.0, retries=2):
+    """The duress graph: locate and freeze in parallel, alert police once the fix settles, then log evidence.
+
+    ``endpoints`` maps "telco", "police" and "bank" to base URLs. The police
+    alert goes out with the telco fix, or with the (lat, lon) hint when
+    locating failed. The evidence record is always written, once, with
+    every upstream action's status and whatever values they produced.
+    """
+    dispatch_id = uuid.uuid4().hex
+
+    async def locate(upstream):
+        return await post_json(f"{endpoints['telco']}/locate", {"account": account, "hint": [lat, lon]})
+
+    async def freeze_account(upstream):
+        return await post_json(f"{endpoints['bank']}/freeze", {"account": account, "amount": amount})
+
+    async def alert_police(upstream):
+        fix = upstream["locate"]
+        location = fix.value if fix.status == OK else {"lat": lat, "lon": lon, "source": "hint"}
+        return await post_json(f"{endpoints['police']}/alert",
+                               {"account": account, "location": location, "kind": "DURESS"})
+
+    async def log_evidence(upstream):
+        if evidence_log is None:
+            return None
+        actions = {name: {"status": result.status, "value": result.value, "error": result.error}
+                   for name, result in upstream.items()}
+        return await asyncio.to_thread(evidence_log.append, "DURESS_SIGNAL",
+                                       {"dispatch": dispatch_id, "account": account, "amount": amount,
+                                        "hint": [lat, lon], "actions": actions})
+
+    def action(name, call, after=(), retries=retries):
+        return Action(name, call, timeout=timeout, retries=retries, after=after)
+
+    return [
+        action("locate", locate),
+        action("freeze_account", freeze_account),
+        action("alert_police", alert_police, ["locate"]),
+        # A timed-out append keeps running in its thread, so a retry would write the record twice.
+        action("log_evidence", log_evidence, ["locate", "freeze_account", "alert_police"], retries=0),
+    ]
+
+
+def run_code_red(endpoints, account, amount, lat, lon, evidence_log=None, origin=None, on_done=None):
+    """Blocking wrapper for worker threads: build the Code Red graph and dispatch it"""
+    actions = code_red_actions(endpoints, account, amount, lat, lon, evidence_log)
+    return asyncio.run(dispatch(actions, origin=origin, on_done=on_done))
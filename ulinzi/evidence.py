@@ -0,0 +1,326 @@
+"""Tamper-evident evidence log: hash chain plus an incremental Merkle tree per day.
+
+Each record is one JSON line in ``evidence-YYYY-MM-DD.jsonl``. Its leaf hash
+covers (seq, ts, kind, data); its ``chain`` value is sha256(previous chain +
+leaf), continuing across days. The Merkle tree follows RFC 6962 (0x00 leaf /
+0x01 node prefixes), so inclusion proofs are O(log n). Every fsync appends a
+checkpoint line with the tree size and root, which ``verify_day`` re-derives
+in a single streaming pass.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
+
+GENESIS = b"\x00" * 32
+FILE_PREFIX = "evidence-"
+FILE_SUFFIX = ".jsonl"
+
+Receipt = namedtuple("Receipt", "day index chain leaf")
+
+
+def _canonical(obj):
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def leaf_hash(seq, ts, kind, data):
+    return hashlib.sha256(b"\x00" + _canonical([seq, ts, kind, data])).digest()
+
+
+def node_hash(left, right):
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+
+def chain_hash(prev, leaf):
+    return hashlib.sha256(prev + leaf).digest()
+
+
+def _day(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+
+class MerkleTree:
+    """Append-only Merkle tree keeping every complete subtree, 32 bytes per node"""
+
+    def __init__(self):
+        self.levels = [bytearray()]
+        self.size = 0
+
+    def _node(self, level, index):
+        return bytes(self.levels[level][index * 32:(index + 1) * 32])
+
+    def append(self, leaf):
+        self.levels[0] += leaf
+        index, level = self.size, 0
+        self.size += 1
+        # Each completed right child closes its parent.
+        while index & 1:
+            parent = node_hash(self._node(level, index - 1), self._node(level, index))
+            level += 1
+            index >>= 1
+            if level == len(self.levels):
+                self.levels.append(bytearray())
+            self.levels[level] += parent
+
+    def _subtree(self, lo, hi):
+        """Root of leaves [lo, hi) under RFC 6962 splitting"""
+        width = hi - lo
+        if width & (width - 1) == 0 and lo % width == 0:
+            return self._node(width.bit_length() - 1, lo // width)
+        split = 1 << ((width - 1).bit_length() - 1)
+        return node_hash(self._subtree(lo, lo + split), self._subtree(lo + split, hi))
+
+    def root(self, size=None):
+        size = self.size if size is None else size
+        if size == 0:
+            return hashlib.sha256(b"").digest()
+        return self._subtree(0, size)
+
+    def proof(self, index, size=None):
+        """Audit path for leaf ``index`` in the tree of ``size`` leaves, leaf-to-root order"""
+        size = self.size if size is None else size
+        if not 0 <= index < size <= self.size:
+            raise IndexError(f"leaf {index} is not in a tree of {size} leaves")
+        path = []
+        lo, hi = 0, size
+        while hi - lo > 1:
+            split = 1 << ((hi - lo - 1).bit_length() - 1)
+            if index < lo + split:
+                path.append(self._subtree(lo + split, hi))
+                hi = lo + split
+            else:
+                path.append(self._subtree(lo, lo + split))
+                lo += split
+        return path[::-1]
+
+
+def verify_inclusion(leaf, index, size, proof, root):
+    """Check an RFC 6962 inclusion proof (RFC 9162 section 2.1.3.2)"""
+    if index >= size:
+        return False
+    fn, sn, r = index, size - 1, leaf
+    for p in proof:
+        if sn == 0:
+            return False
+        if fn & 1 or fn == sn:
+            r = node_hash(p, r)
+            while not fn & 1 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            r = node_hash(r, p)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and r == root
+
+
+class _Peaks:
+    """O(log n) streaming Merkle root, used when re-verifying a whole day"""
+
+    def __init__(self):
+        self.stack = []
+        self.size = 0
+
+    def append(self, leaf):
+        self.stack.append((leaf, 1))
+        self.size += 1
+        while len(self.stack) > 1 and self.stack[-1][1] == self.stack[-2][1]:
+            right, width = self.stack.pop()
+            left, _ = self.stack.pop()
+            self.stack.append((node_hash(left, right), width * 2))
+
+    def root(self):
+        if not self.stack:
+            return hashlib.sha256(b"").digest()
+        acc = self.stack[-1][0]
+        for node, _ in reversed(self.stack[:-1]):
+            acc = node_hash(node, acc)
+        return acc
+
+
+def _records(f):
+    """Yield (offset, end, parsed line) for a day file, stopping at a torn trailing line"""
+    offset = f.tell()
+    for line in f:
+        if not line.endswith(b"\n"):
+            return
+        yield offset, offset + len(line), json.loads(line)
+        offset += len(line)
+
+
+def verify_day(path, prev_chain=None):
+    """Stream one day file, checking the chain, every checkpoint root and the final root.
+
+    Returns (ok, records, root, last_chain). ``prev_chain`` is the previous
+    day's final chain value; by default the first record's own ``prev``
+    field is trusted.
+    """
+    peaks = _Peaks()
+    chain = prev_chain
+    with open(path, "rb") as f:
+        for _, _, entry in _records(f):
+            if "checkpoint" in entry:
+                if entry["checkpoint"] != peaks.size or bytes.fromhex(entry["root"]) != peaks.root():
+                    return False, peaks.size, peaks.root(), chain
+                continue
+            if chain is None:
+                chain = bytes.fromhex(entry["prev"])
+            if entry["seq"] != peaks.size:
+                return False, peaks.size, peaks.root(), chain
+            leaf = leaf_hash(entry["seq"], entry["ts"], entry["kind"], entry["data"])
+            chain = chain_hash(chain, leaf)
+            if chain.hex() != entry["chain"]:
+                return False, peaks.size, peaks.root(), chain
+            peaks.append(leaf)
+    return True, peaks.size, peaks.root(), chain
+
+
+class EvidenceLog:
+    """Append-only evidence store with batched fsyncs and O(log n) record verification.
+
+    Past days never change, so the trees and offsets of the last
+    ``cached_days`` past days read are kept in an LRU instead of being
+    rebuilt from their files on every proof or verify.
+    """
+
+    def __init__(self, directory, sync_every=1024, sync_interval=0.5, clock=time.time, cached_days=8):
+        self.directory = directory
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.clock = clock
+        self.cached_days = cached_days
+        self._past = OrderedDict()  # day -> (tree, offsets), least recently used first
+        self._lock = threading.Lock()
+        self._file = None
+        self._day = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.chain = GENESIS
+        os.makedirs(directory, exist_ok=True)
+        days = self.days()
+        if days:
+            self._open(days[-1])
+
+    def days(self):
+        return sorted(name[len(FILE_PREFIX):-len(FILE_SUFFIX)] for name in os.listdir(self.directory)
+                      if name.startswith(FILE_PREFIX) and name.endswith(FILE_SUFFIX))
+
+    def path(self, day):
+        return os.path.join(self.directory, f"{FILE_PREFIX}{day}{FILE_SUFFIX}")
+
+    def _load(self, day):
+        """Rebuild a day's tree and record offsets from its file; returns (tree, offsets, chain, end)"""
+        tree, offsets, chain, end = MerkleTree(), array("Q"), None, 0
+        with open(self.path(day), "rb") as f:
+            for offset, end, entry in _records(f):
+                if "checkpoint" not in entry:
+                    tree.append(leaf_hash(entry["seq"], entry["ts"], entry["kind"], entry["data"]))
+                    offsets.append(offset)
+                    chain = bytes.fromhex(entry["chain"])
+        return tree, offsets, chain, end
+
+    def _open(self, day):
+        self.tree, self.offsets, chain, end = self._load(day)
+        if chain is not None:
+            self.chain = chain
+        self._file = open(self.path(day), "ab")
+        # Drop a torn line left behind by a crash mid-write.
+        self._file.truncate(end)
+        self._file.seek(0, os.SEEK_END)
+        self._day = day
+
+    def _roll(self, day):
+        if self._file is not None:
+            self._sync_locked()
+            self._file.close()
+            self._cache(self._day, (self.tree, self.offsets))
+        self._file = open(self.path(day), "ab")
+        self._day = day
+        self.tree, self.offsets = MerkleTree(), array("Q")
+
+    def append(self, kind, data):
+        """Record one piece of evidence; returns a Receipt(day, index, chain, leaf)"""
+        with self._lock:
+            ts = self.clock()
+            day = _day(ts)
+            if day != self._day:
+                self._roll(day)
+            seq = self.tree.size
+            leaf = leaf_hash(seq, ts, kind, data)
+            prev, self.chain = self.chain, chain_hash(self.chain, leaf)
+            self.offsets.append(self._file.tell())
+            self._file.write(_canonical({"seq": seq, "ts": ts, "kind": kind, "data": data,
+                                         "prev": prev.hex(), "chain": self.chain.hex()}) + b"\n")
+            self.tree.append(leaf)
+            self._unsynced += 1
+            if (self._unsynced >= self.sync_every
+                    or time.monotonic() - self._last_sync >= self.sync_interval):
+                self._sync_locked()
+            return Receipt(day, seq, self.chain.hex(), leaf.hex())
+
+    def sync(self):
+        with self._lock:
+            self._sync_locked()
+
+    def _sync_locked(self):
+        self._last_sync = time.monotonic()
+        if not self._unsynced:
+            return
+        self._file.write(_canonical({"checkpoint": self.tree.size, "root": self.tree.root().hex(),
+                                     "chain": self.chain.hex()}) + b"\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._sync_locked()
+                self._file.close()
+                self._file = None
+
+    def _day_state(self, day):
+        if day is None or day == self._day:
+            if self._file is None:
+                raise LookupError("no evidence has been recorded yet")
+            self._file.flush()
+            return self.tree, self.offsets
+        state = self._past.pop(day, None)
+        if state is None:
+            state = self._load(day)[:2]
+        self._cache(day, state)
+        return state
+
+    def _cache(self, day, state):
+        self._past[day] = state
+        while len(self._past) > self.cached_days:
+            self._past.popitem(last=False)
+
+    def root(self, day=None):
+        with self._lock:
+            return self._day_state(day)[0].root()
+
+    def proof(self, index, day=None):
+        """(leaf, proof, size, root) for record ``index`` of ``day`` (default: today)"""
+        with self._lock:
+            tree, _ = self._day_state(day)
+            return (tree._node(0, index), tree.proof(index), tree.size, tree.root())
+
+    def read(self, index, day=None):
+        """The stored record ``index`` of ``day`` as a dict"""
+        with self._lock:
+            _, offsets = self._day_state(day)
+            with open(self.path(day or self._day), "rb") as f:
+                f.seek(offsets[index])
+                return json.loads(f.readline())
+
+    def verify(self, index, day=None):
+        """Re-hash record ``index`` from disk and check it against the current Merkle root"""
+        entry = self.read(index, day)
+        leaf = leaf_hash(entry["seq"], entry["ts"], entry["kind"], entry["data"])
+        stored_leaf, proof, size, root = self.proof(index, day)
+        return leaf == stored_leaf and verify_inclusion(leaf, index, size, proof, root)
@@ -0,0 +1,226 @@
+"""Local stand-in services for demos and load tests (no external network needed)"""
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# The 47 critical government domains watched by the Sovereign Sentinel.
+GOV_DOMAINS = tuple(
+    ["interior.go.ke", "treasury.go.ke", "health.go.ke", "education.go.ke", "defence.go.ke",
+     "foreignaffairs.go.ke", "ict.go.ke", "energy.go.ke", "transport.go.ke", "agriculture.go.ke",
+     "kra.go.ke", "ecitizen.go.ke", "president.go.ke", "parliament.go.ke", "judiciary.go.ke",
+     "iebc.or.ke", "centralbank.go.ke", "nps.go.ke", "dci.go.ke", "immigration.go.ke"]
+    + [f"county{i:02d}.go.ke" for i in range(1, 28)]
+)
+SNAPSHOT_SHAPE = (96, 128)
+CONTENT_TYPES = {".pgm": "image/x-portable-graymap", ".html": "text/html; charset=utf-8", ".css": "text/css"}
+
+# Shared by every portal, as on the real government web platform.
+PORTAL_CSS = "".join(
+    f".section-{i} {{ margin: {i % 5}rem 0; padding: {i % 3}rem; border-left: {i % 4}px solid #006600; }}\n"
+    for i in range(120)
+).encode()
+PORTAL_FOOTER = "".join(
+    f'<li><a href="https://www.{domain}">{domain}</a></li>\n' for domain in
+    ["interior.go.ke", "treasury.go.ke", "health.go.ke", "ecitizen.go.ke", "kra.go.ke", "president.go.ke"] * 8
+)
+
+
+def encode_pgm(pixels):
+    """Binary PGM (P5) bytes for a 2-D uint8 array"""
+    height, width = pixels.shape
+    return b"P5\n%d %d\n255\n" % (width, height) + np.ascontiguousarray(pixels, np.uint8).tobytes()
+
+
+def gold_snapshot(domain, shape=SNAPSHOT_SHAPE):
+    """Deterministic 'official portal' raster for a domain: header band, logo and text rows"""
+    rng = np.random.default_rng(int.from_bytes(domain.encode()[:8].ljust(8, b"\0"), "little"))
+    height, width = shape
+    page = np.full(shape, 235, np.uint8)
+    page[: height // 6] = 40 + rng.integers(0, 60)
+    yy, xx = np.mgrid[:height, :width]
+    logo = (yy - height // 12) ** 2 + (xx - width // 10) ** 2 < (height // 16) ** 2
+    page[logo] = 250
+    for row in range(height // 4, height - 8, 8):
+        length = int(rng.integers(width // 3, width - 16))
+        page[row:row + 3, 8:8 + length] = 90
+    return page
+
+
+def defaced_snapshot(domain, shape=SNAPSHOT_SHAPE):
+    """Raster of a defaced page: dark background, bright slogan block and noise"""
+    rng = np.random.default_rng(len(domain))
+    height, width = shape
+    page = rng.integers(0, 50, size=shape).astype(np.uint8)
+    page[height // 3: 2 * height // 3, width // 8: 7 * width // 8] = 220
+    page[height // 2 - 3: height // 2 + 3, width // 6: 5 * width // 6] = 20
+    return page
+
+
+def gold_site(domain):
+    """Files of a protected portal: templated index page, shared stylesheet and the gold snapshot"""
+    index = (f"<!DOCTYPE html>\n<html><head><title>{domain} | Republic of Kenya</title>\n"
+             '<link rel="stylesheet" href="static/portal.css"></head>\n'
+             f"<body><header><h1>{domain}</h1><p>Official Government Portal</p></header>\n"
+             f"<main>{''.join(f'<p class=section-{i}>Service {i} for citizens.</p>' for i in range(40))}</main>\n"
+             f"<footer><ul>\n{PORTAL_FOOTER}</ul></footer></body></html>\n")
+    return {"index.html": index.encode(), "static/portal.css": PORTAL_CSS,
+            "snapshot.pgm": encode_pgm(gold_snapshot(domain))}
+
+
+def defaced_site(domain):
+    """The portal after a defacement: slogan page and snapshot; the stylesheet is left alone"""
+    return {"index.html": b"<html><body style='background:#000'><h1>HACKED BY ANONYMOUS</h1></body></html>\n",
+            "snapshot.pgm": encode_pgm(defaced_snapshot(domain))}
+
+
+class _Server(ThreadingHTTPServer):
+    # Dozens of monitors connect at once; the default backlog of 5 drops SYNs.
+    request_queue_size = 256
+    daemon_threads = True
+
+
+class FixtureSites:
+    """HTTP server publishing every protected domain's files from ``root/<domain>/``.
+
+    The visual monitor polls ``/<domain>/snapshot.pgm``. ``deface`` and
+    ``restore`` rewrite a domain's files on disk, so the monitor has
+    something real to detect and a snapshot store something real to roll
+    back.
+    """
+
+    def __init__(self, domains=GOV_DOMAINS, root=None, host="127.0.0.1", port=0):
+        self.domains = tuple(domains)
+        self.root = root or tempfile.mkdtemp(prefix="ulinzi-sites-")
+        for domain in self.domains:
+            self.write(domain, gold_site(domain))
+        sites = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = os.path.normpath(os.path.join(sites.root, self.path.split("?")[0].strip("/")))
+                try:
+                    if not path.startswith(sites.root + os.sep):
+                        raise FileNotFoundError(path)
+                    with open(path, "rb") as f:
+                        body = f.read()
+                except (FileNotFoundError, IsADirectoryError):
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPES.get(os.path.splitext(path)[1], "application/octet-stream"))
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = _Server((host, port), Handler)
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def urls(self):
+        return {domain: f"{self.base_url}/{domain}/snapshot.pgm" for domain in self.domains}
+
+    def write(self, domain, files):
+        """Replace some of a domain's files ({relative path: bytes}), each atomically"""
+        for name, body in files.items():
+            path = os.path.join(self.root, domain, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(f"{path}.tmp", "wb") as f:
+                f.write(body)
+            os.replace(f"{path}.tmp", path)
+
+    def publish(self, domain, pixels):
+        self.write(domain, {"snapshot.pgm": encode_pgm(pixels)})
+
+    def deface(self, domain):
+        self.write(domain, defaced_site(domain))
+
+    def restore(self, domain):
+        self.write(domain, gold_site(domain))
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class EmergencyServices:
+    """Stand-in telco, police and bank endpoints with configurable latency and failures.
+
+    POST /telco/locate, /police/alert and /bank/freeze answer JSON after
+    ``latency[service]`` seconds; ``fail_next(service, n)`` makes the next
+    ``n`` calls to a service return 503 so retry paths can be exercised.
+    """
+
+    DEFAULT_LATENCY = {"telco": 0.3, "police": 0.2, "bank": 0.25}
+
+    def __init__(self, latency=None, host="127.0.0.1", port=0):
+        self.latency = dict(self.DEFAULT_LATENCY, **(latency or {}))
+        self.calls = {service: 0 for service in self.latency}
+        self._failures = {service: 0 for service in self.latency}
+        self._incidents = itertools.count(1)
+        self._lock = threading.Lock()
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                service = self.path.strip("/").split("/")[0]
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if service not in services.latency:
+                    self.send_error(404)
+                    return
+                time.sleep(services.latency[service])
+                with services._lock:
+                    services.calls[service] += 1
+                    failing = services._failures[service] > 0
+                    if failing:
+                        services._failures[service] -= 1
+                if failing:
+                    self.send_error(503)
+                    return
+                body = json.dumps(services._answer(service, payload)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = _Server((host, port), Handler)
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def _answer(self, service, payload):
+        if service == "telco":
+            lat, lon = payload.get("hint", (-1.2921, 36.8219))
+            return {"lat": lat, "lon": lon, "accuracy_m": 35}
+        if service == "police":
+            return {"incident": f"NPS-{next(self._incidents):06d}", "status": "DISPATCHED"}
+        return {"account": payload.get("account"), "frozen": True}
+
+    @property
+    def endpoints(self):
+        host, port = self.server.server_address[:2]
+        return {service: f"http://{host}:{port}/{service}" for service in self.latency}
+
+    def fail_next(self, service, n=1):
+        with self._lock:
+            self._failures[service] += n
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,286 @@
+"""Compact transaction graph for funnel-account detection in the Intelligence Core.
+
+Edges live in flat NumPy columns (node ids, amount, int64 ns timestamps).
+CSR (by sender) and CSC (by receiver) orderings are built from them. New
+edges land in an append buffer: degree queries read it directly, ordered
+views merge it into the base first, and it is merged automatically once it
+outgrows ``compact_ratio`` of the base. The orderings, the time-ranked
+inflow index behind ``pass_through`` and its results are cached until the
+next compaction; ``degrees`` is cached until the next insert.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+PassThrough = namedtuple("PassThrough", "edges inflow ratio")
+
+
+class _Columns:
+    """Growable set of parallel NumPy arrays (amortized O(1) append)"""
+
+    def __init__(self, dtypes, capacity=1024):
+        self.size = 0
+        self._data = {name: np.empty(capacity, dtype) for name, dtype in dtypes.items()}
+
+    def __getitem__(self, name):
+        return self._data[name][:self.size]
+
+    def extend(self, **columns):
+        n = len(next(iter(columns.values())))
+        need = self.size + n
+        capacity = len(next(iter(self._data.values())))
+        if need > capacity:
+            capacity = max(need, capacity * 2)
+            for name, array in self._data.items():
+                grown = np.empty(capacity, array.dtype)
+                grown[:self.size] = array[:self.size]
+                self._data[name] = grown
+        for name, values in columns.items():
+            self._data[name][self.size:need] = values
+        self.size = need
+
+    def clear(self):
+        self.size = 0
+
+
+class _NodeMap:
+    """Account id -> dense node id, assigned in order of first appearance"""
+
+    def __init__(self):
+        self.accounts = np.empty(0, np.int64)   # node id -> account
+        self._sorted = np.empty(0, np.int64)    # accounts, sorted
+        self._order = np.empty(0, np.int64)     # node ids matching _sorted
+
+    def __len__(self):
+        return len(self.accounts)
+
+    def lookup(self, accounts):
+        """Node ids for ``accounts`` (-1 where unknown)"""
+        accounts = np.asarray(accounts, np.int64)
+        if not len(self._sorted):
+            return np.full(accounts.shape, -1, np.int64)
+        pos = np.minimum(np.searchsorted(self._sorted, accounts), len(self._sorted) - 1)
+        return np.where(self._sorted[pos] == accounts, self._order[pos], -1)
+
+    def encode(self, accounts):
+        """Node ids for ``accounts``, registering new ones"""
+        accounts = np.asarray(accounts, np.int64)
+        ids = self.lookup(accounts)
+        unknown = ids < 0
+        if unknown.any():
+            new, first = np.unique(accounts[unknown], return_index=True)
+            new = new[np.argsort(first)]
+            new_ids = np.arange(len(self.accounts), len(self.accounts) + len(new))
+            self.accounts = np.concatenate([self.accounts, new])
+            order = np.argsort(new)
+            pos = np.searchsorted(self._sorted, new[order])
+            self._sorted = np.insert(self._sorted, pos, new[order])
+            self._order = np.insert(self._order, pos, new_ids[order])
+            ids = self.lookup(accounts)
+        return ids
+
+
+def _distinct(keys):
+    """Sorted distinct values of an int64 array (a plain sort beats np.unique's hashing here)"""
+    keys = np.sort(keys)
+    return keys[np.r_[True, keys[1:] != keys[:-1]][:len(keys)]]
+
+
+def _gather(indptr, values, nodes):
+    """Concatenate ``values[indptr[v]:indptr[v+1]]`` for every v in ``nodes``"""
+    starts = indptr[nodes]
+    lengths = indptr[nodes + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return values[:0]
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return values[offsets + np.arange(total)]
+
+
+class TransactionGraph:
+    """Directed multigraph of transfers with CSR/CSC views and incremental inserts"""
+
+    def __init__(self, compact_ratio=0.1):
+        self.nodes = _NodeMap()
+        self.compact_ratio = compact_ratio
+        dtypes = {"src": np.int32, "dst": np.int32, "amount": np.int64, "ts": np.int64}
+        self._base = _Columns(dtypes)
+        self._delta = _Columns(dtypes)
+        self._csr = self._csc = None
+        self._inflow = None
+        self._flows = {}
+        self._degrees = None
+
+    @property
+    def n_nodes(self):
+        return len(self.nodes)
+
+    @property
+    def n_edges(self):
+        return self._base.size + self._delta.size
+
+    def add_edges(self, src, dst, amount, timestamp):
+        """Insert transfers (account ids, KES amounts, datetime64 or int64 ns timestamps)"""
+        src = self.nodes.encode(src)
+        dst = self.nodes.encode(dst)
+        ts = np.asarray(timestamp)
+        if ts.dtype.kind == "M":
+            ts = ts.astype("datetime64[ns]").view(np.int64)
+        self._delta.extend(src=src, dst=dst, amount=amount, ts=ts)
+        if self._delta.size > self.compact_ratio * max(self._base.size, 1024):
+            self.compact()
+
+    def add_frame(self, frame, src="src", dst="dst", amount="amount", timestamp="timestamp"):
+        self.add_edges(frame[src].to_numpy(), frame[dst].to_numpy(),
+                       frame[amount].to_numpy(), frame[timestamp].to_numpy())
+
+    def compact(self):
+        """Merge the append buffer into the base columns and drop the cached orderings"""
+        if self._delta.size:
+            self._base.extend(**{name: self._delta[name] for name in ("src", "dst", "amount", "ts")})
+            self._delta.clear()
+            self._csr = self._csc = None
+            self._inflow = None
+            self._flows = {}
+
+    def edges(self, name):
+        """Column ``name`` over all edges (base then buffered)"""
+        if not self._delta.size:
+            return self._base[name]
+        return np.concatenate([self._base[name], self._delta[name]])
+
+    def _ordering(self, key):
+        """(indptr, edge order) of the base edges grouped by ``key`` and sorted by time"""
+        order = np.lexsort((self._base["ts"], self._base[key]))
+        indptr = np.zeros(self.n_nodes + 1, np.int64)
+        np.cumsum(np.bincount(self._base[key], minlength=self.n_nodes), out=indptr[1:])
+        return indptr, order
+
+    def csr(self):
+        """Out-edges: (indptr, edge ids) grouped by sender; compacts first"""
+        self.compact()
+        if self._csr is None or len(self._csr[0]) != self.n_nodes + 1:
+            self._csr = self._ordering("src")
+        return self._csr
+
+    def csc(self):
+        """In-edges: (indptr, edge ids) grouped by receiver; compacts first"""
+        self.compact()
+        if self._csc is None or len(self._csc[0]) != self.n_nodes + 1:
+            self._csc = self._ordering("dst")
+        return self._csc
+
+    # --- Vectorized queries ---
+    def degrees(self):
+        """DataFrame per node: edge counts, distinct counterparties and amounts in each direction"""
+        if self._degrees is not None and self._degrees[0] == self.n_edges:
+            return self._degrees[1]
+        src, dst, amount = self.edges("src"), self.edges("dst"), self.edges("amount")
+        n = self.n_nodes
+        degrees = pd.DataFrame({
+            "account": self.nodes.accounts,
+            "in_edges": np.bincount(dst, minlength=n),
+            "out_edges": np.bincount(src, minlength=n),
+            "fan_in": np.bincount(_distinct(dst.astype(np.int64) * n + src) // n, minlength=n),
+            "fan_out": np.bincount(_distinct(src.astype(np.int64) * n + dst) // n, minlength=n),
+            "in_amount": np.bincount(dst, amount, minlength=n).astype(np.int64),
+            "out_amount": np.bincount(src, amount, minlength=n).astype(np.int64),
+        })
+        self._degrees = (self.n_edges, degrees)
+        return degrees
+
+    def reachable(self, accounts, k, direction="out"):
+        """Hop distance (0..k) from ``accounts`` to every node, -1 where unreachable"""
+        indptr, order = self.csr() if direction == "out" else self.csc()
+        other = self._base["dst" if direction == "out" else "src"][order]
+        distance = np.full(self.n_nodes, -1, np.int64)
+        frontier = self.nodes.lookup(accounts)
+        frontier = np.unique(frontier[frontier >= 0])
+        distance[frontier] = 0
+        for hop in range(1, k + 1):
+            if not len(frontier):
+                break
+            nxt = np.unique(_gather(indptr, other, frontier))
+            nxt = nxt[distance[nxt] < 0]
+            distance[nxt] = hop
+            frontier = nxt
+        return distance
+
+    def pass_through(self, window="30min", min_ratio=0.8, max_ratio=1.05):
+        """Out-edges that forward most of what their sender received within ``window``.
+
+        For every edge v -> w at time t, ``inflow`` is the total v received in
+        [t - window, t]; the edge is a pass-through when amount / inflow lies
+        in [min_ratio, max_ratio]. Returns PassThrough(edge mask, inflow, ratio)
+        over edges in ``edges()`` order.
+        """
+        self.compact()
+        key = (window, min_ratio, max_ratio)
+        if key in self._flows:
+            return self._flows[key]
+        src, amount, ts = self._base["src"], self._base["amount"], self._base["ts"]
+        times, in_keys, in_cum, hi = self._inflow_index()
+        # Only the start of each edge's window depends on ``window``.
+        stride = np.int64(len(ts) + 1)
+        lo_keys = src.astype(np.int64) * stride + np.searchsorted(times, ts - pd.Timedelta(window).value, side="left")
+        lo = np.searchsorted(in_keys, lo_keys, side="right")
+        inflow = in_cum[hi] - in_cum[lo]
+        ratio = np.divide(amount, inflow, out=np.zeros(len(amount)), where=inflow > 0)
+        self._flows[key] = PassThrough((ratio >= min_ratio) & (ratio <= max_ratio), inflow, ratio)
+        return self._flows[key]
+
+    def _inflow_index(self):
+        """Window-independent half of ``pass_through``, built once per compaction.
+
+        Timestamps are ranked so (node, time) packs into one sortable int64
+        key; returns (sorted times, in-edge keys in CSC order, cumulative
+        in-edge amounts, and per edge the end of its sender's inflow up to it).
+        """
+        if self._inflow is None:
+            src, dst, amount, ts = self._base["src"], self._base["dst"], self._base["amount"], self._base["ts"]
+            times = np.sort(ts)
+            stride = np.int64(len(ts) + 1)
+            _, order = self.csc()
+            rank = np.searchsorted(times, ts, side="right")
+            in_keys = dst[order].astype(np.int64) * stride + rank[order]
+            in_cum = np.concatenate([[0], np.cumsum(amount[order])])
+            hi = np.searchsorted(in_keys, src.astype(np.int64) * stride + rank, side="right")
+            self._inflow = (times, in_keys, in_cum, hi)
+        return self._inflow
+
+    def funnel_accounts(self, window="30min", min_fan_in=5, min_pass_share=0.6, limit=20):
+        """Accounts with wide fan-in that rapidly forward most of their inflow.
+
+        ``pass_share`` is the fraction of an account's outflow sent as
+        pass-through edges; ``score`` weighs it by log fan-in.
+        """
+        flows = self.pass_through(window)
+        src, amount = self._base["src"], self._base["amount"]
+        stats = self.degrees().copy()
+        passed = np.bincount(src[flows.edges], amount[flows.edges], minlength=self.n_nodes)
+        stats["pass_share"] = np.divide(passed, stats["out_amount"], out=np.zeros(self.n_nodes),
+                                        where=stats["out_amount"].to_numpy() > 0)
+        stats["score"] = stats["pass_share"] * np.log1p(stats["fan_in"])
+        funnels = stats[(stats["fan_in"] >= min_fan_in) & (stats["pass_share"] >= min_pass_share)]
+        return funnels.sort_values("score", ascending=False).head(limit).reset_index(drop=True)
+
+    def trace_chains(self, accounts, window="30min", max_hops=4):
+        """Follow the largest pass-through hop out of each account; returns account paths"""
+        flows = self.pass_through(window)
+        indptr, order = self.csr()
+        dst, amount = self._base["dst"], self._base["amount"]
+        chains = []
+        for start in self.nodes.lookup(accounts):
+            if start < 0:
+                continue
+            path = [int(start)]
+            while len(path) <= max_hops:
+                out = order[indptr[path[-1]]:indptr[path[-1] + 1]]
+                out = out[flows.edges[out]]
+                out = out[~np.isin(dst[out], path)]
+                if not len(out):
+                    break
+                path.append(int(dst[out[np.argmax(amount[out])]]))
+            chains.append(self.nodes.accounts[path].tolist())
+        return chains
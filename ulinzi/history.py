@@ -0,0 +1,239 @@
+"""Typed, columnar transaction history in memory-mapped segments.
+
+Transactions are buffered in memory and sealed into immutable segments
+of ``segment_rows`` rows: one directory per segment holding one .npy file
+per column, sorted by timestamp. Timestamps are int64 nanoseconds,
+amounts int64 KES and location/type/status int8 category codes, with the
+vocabularies kept in ``schema.json``. Segments are opened with
+``mmap_mode="r"``, so a time window is a searchsorted slice of the mapped
+columns and filters read only the pages of the columns they test. A page
+of results is the only thing ever materialized.
+"""
+import atexit
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+from ulinzi.risk import LOCATION_PATTERNS
+from ulinzi.synthetic import TRANSACTION_STATUSES, TRANSACTION_TYPES
+
+# Column -> storage dtype; categorical columns are stored as int8 codes into CATEGORIES.
+SCHEMA = {
+    "timestamp": np.int64,
+    "account_id": np.int64,
+    "amount": np.int64,
+    "hour": np.int8,
+    "location": np.int8,
+    "type": np.int8,
+    "status": np.int8,
+    "risk_score": np.int16,
+    "behavioral_anomaly": np.bool_,
+    "sim_swap": np.bool_,
+}
+CATEGORIES = {
+    "location": LOCATION_PATTERNS,
+    "type": TRANSACTION_TYPES,
+    "status": TRANSACTION_STATUSES,
+}
+SEGMENT_PREFIX = "segment-"
+
+
+def _ns(value):
+    """int64 nanoseconds since the epoch from a Timestamp-like value (None passes through)"""
+    return None if value is None else pd.Timestamp(value).value
+
+
+def _take(values, rows):
+    """``values`` at ``rows``: a view for an ascending range, a gather for anything else"""
+    if isinstance(rows, range) and rows.step == 1:
+        return values[rows.start:rows.stop]
+    return values[np.asarray(rows)]
+
+
+class _Segment:
+    """One sealed segment: read-only memory-mapped columns sorted by timestamp"""
+
+    def __init__(self, path):
+        self.path = path
+        self.columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in SCHEMA}
+        self.start = int(self.columns["timestamp"][0])
+        self.end = int(self.columns["timestamp"][-1])
+
+    def __len__(self):
+        return len(self.columns["timestamp"])
+
+
+class Selection:
+    """Rows matching a query: per-segment views of the mapped columns plus matching row indices"""
+
+    def __init__(self, parts, categories):
+        self._parts = parts  # (columns, rows) pairs, newest segment first; rows is a range or an index array
+        self._categories = categories
+
+    def __len__(self):
+        return sum(len(rows) for _, rows in self._parts)
+
+    def sum(self, column):
+        return sum(int(_take(columns[column], rows).sum(dtype=np.int64)) for columns, rows in self._parts)
+
+    def page(self, number, size=50):
+        """Page ``number`` (from 0) of ``size`` rows, newest first, as a typed DataFrame"""
+        skip, remaining, pieces = number * size, size, []
+        for columns, rows in self._parts:
+            if not remaining:
+                break
+            if skip >= len(rows):
+                skip -= len(rows)
+                continue
+            newest = rows[::-1][skip:skip + remaining]
+            pieces.append((columns, newest))
+            remaining -= len(newest)
+            skip = 0
+        return self._frame(pieces)
+
+    def frame(self):
+        """Every matching row in time order (materializes the whole selection)"""
+        return self._frame([(columns, rows) for columns, rows in reversed(self._parts)])
+
+    def _frame(self, pieces):
+        data = {}
+        for name, dtype in SCHEMA.items():
+            values = np.concatenate([_take(columns[name], rows) for columns, rows in pieces]) if pieces \
+                else np.empty(0, dtype)
+            if name == "timestamp":
+                values = values.view("datetime64[ns]")
+            elif name in self._categories:
+                values = pd.Categorical.from_codes(values, categories=list(self._categories[name]))
+            data[name] = values
+        return pd.DataFrame(data)
+
+
+class TransactionHistory:
+    """Append-only transaction store for months of history; safe to share between threads.
+
+    ``append`` takes frames shaped like ``synthetic.generate_transactions``;
+    rows are sealed into a segment every ``segment_rows`` rows, on
+    ``flush`` and at exit. ``select`` answers time-window and filter
+    queries without loading the segments.
+    """
+
+    def __init__(self, directory, segment_rows=1 << 18):
+        self.directory = directory
+        self.segment_rows = segment_rows
+        self._pending = []
+        self._pending_rows = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        schema = os.path.join(directory, "schema.json")
+        if os.path.exists(schema):
+            with open(schema, encoding="utf-8") as f:
+                self.categories = {name: tuple(labels) for name, labels in json.load(f).items()}
+        else:
+            self.categories = dict(CATEGORIES)
+            with open(schema, "w", encoding="utf-8") as f:
+                json.dump(self.categories, f)
+        self._segments = [_Segment(os.path.join(directory, name)) for name in sorted(os.listdir(directory))
+                          if name.startswith(SEGMENT_PREFIX) and not name.endswith(".tmp")]
+        atexit.register(self.flush)
+
+    def __len__(self):
+        with self._lock:
+            return sum(map(len, self._segments)) + self._pending_rows
+
+    @property
+    def segments(self):
+        return len(self._segments)
+
+    def _typed(self, frame):
+        columns = {}
+        for name, dtype in SCHEMA.items():
+            if name == "timestamp":
+                columns[name] = pd.to_datetime(frame[name]).to_numpy("datetime64[ns]").view(np.int64)
+            elif name in self.categories:
+                categorical = pd.Categorical(frame[name].astype(str), categories=list(self.categories[name]))
+                columns[name] = categorical.codes.astype(np.int8)
+            else:
+                columns[name] = frame[name].to_numpy(dtype)
+        return columns
+
+    # --- Writes ---
+    def append(self, frame):
+        """Add transactions (DataFrame or dict of columns)"""
+        columns = self._typed(pd.DataFrame(frame))
+        rows = len(columns["timestamp"])
+        if not rows:
+            return
+        with self._lock:
+            self._pending.append(columns)
+            self._pending_rows += rows
+            while self._pending_rows >= self.segment_rows:
+                self._seal(self.segment_rows)
+
+    def flush(self):
+        """Seal everything still buffered into a segment"""
+        with self._lock:
+            if self._pending_rows:
+                self._seal(self._pending_rows)
+
+    def _seal(self, rows):
+        pending = {name: np.concatenate([part[name] for part in self._pending]) for name in SCHEMA}
+        order = np.argsort(pending["timestamp"][:rows], kind="stable")
+        name = f"{SEGMENT_PREFIX}{len(self._segments):08d}"
+        path = os.path.join(self.directory, name)
+        tmp = f"{path}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for column, values in pending.items():
+            np.save(os.path.join(tmp, f"{column}.npy"), values[:rows][order])
+        os.replace(tmp, path)
+        self._segments.append(_Segment(path))
+        rest = {column: values[rows:] for column, values in pending.items()}
+        self._pending = [rest] if len(rest["timestamp"]) else []
+        self._pending_rows -= rows
+
+    # --- Queries ---
+    def select(self, start=None, end=None, min_amount=None, max_amount=None, **equals):
+        """Rows with ``start <= timestamp < end`` matching every filter.
+
+        ``equals`` maps a column to one value or a list of accepted values,
+        e.g. ``status=["FLAGGED", "BLOCKED"]`` or ``account_id=4821``.
+        """
+        start, end = _ns(start), _ns(end)
+        with self._lock:
+            segments = list(self._segments)
+            pending = [dict(part) for part in self._pending]
+        sources = [segment.columns for segment in segments
+                   if (start is None or segment.end >= start) and (end is None or segment.start < end)]
+        if pending:
+            merged = {name: np.concatenate([part[name] for part in pending]) for name in SCHEMA}
+            order = np.argsort(merged["timestamp"], kind="stable")
+            sources.append({name: values[order] for name, values in merged.items()})
+        parts = []
+        for columns in reversed(sources):
+            ts = columns["timestamp"]
+            lo = 0 if start is None else int(np.searchsorted(ts, start, side="left"))
+            hi = len(ts) if end is None else int(np.searchsorted(ts, end, side="left"))
+            if lo >= hi:
+                continue
+            if min_amount is None and max_amount is None and not equals:
+                parts.append((columns, range(lo, hi)))
+                continue
+            mask = np.ones(hi - lo, bool)
+            if min_amount is not None:
+                mask &= columns["amount"][lo:hi] >= min_amount
+            if max_amount is not None:
+                mask &= columns["amount"][lo:hi] <= max_amount
+            for name, accepted in equals.items():
+                accepted = np.atleast_1d(accepted)
+                if name in self.categories:
+                    accepted = [self.categories[name].index(label) for label in accepted
+                                if label in self.categories[name]]
+                mask &= np.isin(columns[name][lo:hi], accepted)
+            rows = lo + np.flatnonzero(mask)
+            if len(rows):
+                parts.append((columns, rows))
+        return Selection(parts, self.categories)
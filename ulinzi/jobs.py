@@ -0,0 +1,105 @@
+"""Background job executor for long-running operator workflows.
+
+A workflow is a list of (name, fn) steps run on a shared thread pool; each
+``fn(job)`` may call ``job.update`` to report progress inside its step and
+returns a value stored in ``job.results[name]``. The UI polls
+``JobExecutor.get`` instead of blocking the script thread, and every step's
+wall-clock latency is recorded on the job.
+"""
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class Job:
+    """Progress, per-step latencies and results of one submitted workflow"""
+
+    def __init__(self, job_id, name, step_names):
+        self.id = job_id
+        self.name = name
+        self.step_names = list(step_names)
+        self.status = QUEUED
+        self.step = None
+        self.progress = 0.0
+        self.message = ""
+        self.step_latencies_ms = []
+        self.results = {}
+        self.error = None
+        self.submitted = time.time()
+        self._started = None
+        self._finished = None
+
+    @property
+    def done(self):
+        return self.status in (DONE, FAILED)
+
+    @property
+    def elapsed_ms(self):
+        """Wall-clock time from start to finish (or to now while running)"""
+        if self._started is None:
+            return 0.0
+        end = self._finished if self._finished is not None else time.perf_counter()
+        return (end - self._started) * 1e3
+
+    def update(self, fraction, message=None):
+        """Report progress within the current step (0..1)"""
+        index = self.step_names.index(self.step)
+        self.progress = (index + min(max(fraction, 0.0), 1.0)) / len(self.step_names)
+        if message is not None:
+            self.message = message
+
+
+class JobExecutor:
+    """Thread-pool runner shared by every session; keeps the most recent ``history`` jobs"""
+
+    def __init__(self, max_workers=16, history=256):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ulinzi-job")
+        self._jobs = OrderedDict()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.history = history
+
+    def submit(self, name, steps):
+        """Queue a workflow of (name, fn) steps; returns the Job"""
+        steps = list(steps)
+        job = Job(next(self._ids), name, [step_name for step_name, _ in steps])
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.history:
+                oldest = next(iter(self._jobs.values()))
+                if not oldest.done:
+                    break
+                self._jobs.popitem(last=False)
+        self._pool.submit(self._run, job, steps)
+        return job
+
+    def get(self, job_id):
+        """The job with ``job_id``, or None once it has aged out of history"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _run(self, job, steps):
+        job.status = RUNNING
+        job._started = time.perf_counter()
+        try:
+            for index, (name, fn) in enumerate(steps):
+                job.step = name
+                job.progress = index / len(steps)
+                start = time.perf_counter()
+                job.results[name] = fn(job)
+                job.step_latencies_ms.append((name, (time.perf_counter() - start) * 1e3))
+            job.progress = 1.0
+            job.status = DONE
+        except Exception as exc:
+            job.error = exc
+            job.status = FAILED
+        finally:
+            job._finished = time.perf_counter()
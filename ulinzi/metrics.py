@@ -0,0 +1,181 @@
+"""Low-overhead latency histograms with Prometheus text export.
+
+Histograms are HDR-style: nanosecond values fall into log-spaced buckets
+with 2**SUB_BITS linear sub-buckets per power of two (under 3.2% relative
+error). ``record`` is a bit_length, a shift and a list increment, cheap
+enough for every hot path; it takes no lock, so concurrent increments of
+the same bucket may very rarely be lost.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SUB_BITS = 5
+MAX_SHIFT = 36  # values beyond ~2**42 ns (73 minutes) land in the last bucket
+# Bucket bounds (seconds) for the Prometheus export.
+EXPORT_BOUNDS = (1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2,
+                 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def bucket_index(ns):
+    """Bucket of a non-negative nanosecond value"""
+    shift = ns.bit_length() - SUB_BITS - 1
+    if shift <= 0:
+        return ns
+    return (shift << SUB_BITS) + (ns >> shift)
+
+
+def bucket_bounds(index):
+    """[low, high) nanosecond range covered by a bucket"""
+    if index < 2 << SUB_BITS:
+        return index, index + 1
+    shift = (index >> SUB_BITS) - 1
+    low = (index - (shift << SUB_BITS)) << shift
+    return low, low + (1 << shift)
+
+
+class Histogram:
+    """Latency distribution of one operation, in nanoseconds"""
+
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self.counts = [0] * ((MAX_SHIFT + 2) << SUB_BITS)
+        self.total_ns = 0
+        self._last = len(self.counts) - 1
+
+    def record(self, ns):
+        shift = ns.bit_length() - SUB_BITS - 1
+        index = ns if shift <= 0 else (shift << SUB_BITS) + (ns >> shift)
+        self.counts[index if index < self._last else self._last] += 1
+        self.total_ns += ns
+
+    def record_ms(self, ms):
+        self.record(max(int(ms * 1e6), 0))
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(time.perf_counter_ns() - start)
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def percentiles(self, *qs):
+        """Values (ms) at the given percentiles (0-100), None while empty"""
+        counts = list(self.counts)
+        total = sum(counts)
+        if not total:
+            return [None] * len(qs)
+        targets = sorted((max(q / 100.0 * total, 1), i) for i, q in enumerate(qs))
+        out = [None] * len(qs)
+        seen, t = 0, 0
+        for index, count in enumerate(counts):
+            seen += count
+            while t < len(targets) and seen >= targets[t][0]:
+                low, high = bucket_bounds(index)
+                out[targets[t][1]] = (low + high - 1) / 2 / 1e6
+                t += 1
+            if t == len(targets):
+                break
+        return out
+
+    def cumulative(self, bounds_s=EXPORT_BOUNDS):
+        """Counts at or below each bound (seconds), by bucket upper edge"""
+        counts = list(self.counts)
+        out, seen, index = [], 0, 0
+        for bound in bounds_s:
+            limit = bound * 1e9
+            while index < len(counts) and bucket_bounds(index)[1] <= limit:
+                seen += counts[index]
+                index += 1
+            out.append(seen)
+        return out
+
+
+class Registry:
+    """Named histograms shared by the whole process"""
+
+    def __init__(self, namespace="ulinzi"):
+        self.namespace = namespace
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name, help=""):
+        """The histogram called ``name``, created on first use"""
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, Histogram(name, help))
+        return histogram
+
+    def histograms(self):
+        with self._lock:
+            return list(self._histograms.values())
+
+    def summary(self):
+        """Rows of (name, count, p50, p95, p99) in ms"""
+        return [(h.name, h.count, *h.percentiles(50, 95, 99)) for h in self.histograms()]
+
+    def prometheus(self):
+        """Prometheus text exposition of every histogram (seconds)"""
+        lines = []
+        for h in self.histograms():
+            metric = f"{self.namespace}_{h.name}_seconds"
+            lines.append(f"# HELP {metric} {h.help or h.name}")
+            lines.append(f"# TYPE {metric} histogram")
+            for bound, seen in zip(EXPORT_BOUNDS, h.cumulative()):
+                lines.append(f'{metric}_bucket{{le="{bound:g}"}} {seen}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {h.count}')
+            lines.append(f"{metric}_sum {h.total_ns / 1e9:.9f}")
+            lines.append(f"{metric}_count {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Write the exposition to ``path`` atomically (node-exporter textfile style)"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def serve(self, host="127.0.0.1", port=9464):
+        """Serve ``GET /metrics`` from a daemon thread; returns the server"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def format_ms(ms):
+    """Compact latency label: µs below a millisecond, otherwise ms"""
+    if ms is None:
+        return "—"
+    if ms < 1:
+        return f"{ms * 1e3:.0f}µs"
+    return f"{ms:.1f}ms" if ms < 100 else f"{ms:.0f}ms"
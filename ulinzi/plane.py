@@ -0,0 +1,145 @@
+"""Process-wide data plane shared by every command-center session.
+
+One DataPlane holds the threat table with its time rollups, the
+heaviest attack sources and deduplicated alerts, the recent transactions
+and the module status board. Every write goes through a ``publish_*``
+method, which bumps ``version`` and appends a Delta to a bounded change
+log. Sessions keep only the version they last rendered and ask for
+``changes(since)``: the deltas since then, or None once those have
+fallen off the log, in which case the session simply re-reads the
+current state. Views over the shared data are memoized per version, so
+memory and CPU stay flat however many sessions are watching.
+"""
+import threading
+from collections import deque, namedtuple
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from ulinzi.rollups import ThreatRollups
+from ulinzi.sketch import AlertDeduplicator, HeavyHitters, ip_codes
+from ulinzi.threats import THREAT_CAPACITY, ThreatTable
+
+Delta = namedtuple("Delta", "version kind payload")
+Snapshot = namedtuple("Snapshot", "version threats transactions status")
+
+
+class DataPlane:
+    """Shared threats, recent transactions and module status with a versioned change log.
+
+    The threat tables keep their most recent ``threat_capacity`` events;
+    the transactions frame and status dict are replaced, never mutated, on
+    publish, so readers can hold on to them without copying. Sinks run
+    after the plane's lock is released, so a slow sink never holds up
+    readers or other publishers. Keeps the last ``transaction_capacity``
+    transactions and ``history`` deltas; safe to share between threads.
+    With a ``blocklist`` (a BlocklistIndex), events from listed sources are
+    also kept in ``blocked``.
+    """
+
+    def __init__(self, transaction_capacity=1000, history=1024, blocklist=None, threat_capacity=THREAT_CAPACITY):
+        self.threats = ThreatTable(capacity=threat_capacity)
+        self.blocklist = blocklist
+        self.blocked = ThreatTable(capacity=threat_capacity)  # events whose source is on the blocklist
+        self.rollups = ThreatRollups(self.threats.levels, self.threats.types)
+        self.sources = HeavyHitters(k=20)
+        self.alerts = AlertDeduplicator(min_level="critical", levels=self.threats.levels, types=self.threats.types)
+        self.transaction_capacity = transaction_capacity
+        self.version = 0
+        self._transactions = pd.DataFrame()
+        self._status = {}
+        self._log = deque(maxlen=history)
+        self._sinks = {"threats": [], "transactions": []}
+        self._lock = threading.Lock()
+
+    def _publish(self, kind, payload):
+        self.version += 1
+        self._log.append(Delta(self.version, kind, payload))
+        return self.version
+
+    # --- Ingestion ---
+    def add_sink(self, kind, sink):
+        """Also hand every published batch of ``kind`` to ``sink(batch)`` (e.g. a persistent store)"""
+        with self._lock:
+            self._sinks[kind].append(sink)
+
+    def publish_threats(self, batch):
+        """Append threat events (DataFrame or list of dicts); returns the new version"""
+        batch = pd.DataFrame(batch)
+        with self._lock:
+            self.threats.append(batch)
+            self.rollups.add(batch)
+            if "source_ip" in batch:
+                sources = ip_codes(batch["source_ip"])
+                self.sources.add(sources)
+                if self.blocklist is not None:
+                    listed = self.blocklist.contains(sources)
+                    if listed.any():
+                        self.blocked.append(batch[listed])
+            self.alerts.add(batch)
+            sinks = list(self._sinks["threats"])
+            version = self._publish("threats", len(batch))
+        for sink in sinks:
+            sink(batch)
+        return version
+
+    def publish_transactions(self, frame):
+        """Append typed transactions, keeping the most recent ``transaction_capacity``"""
+        batch = pd.DataFrame(frame)
+        with self._lock:
+            frame, current = batch.copy(deep=False), self._transactions
+            if len(current.columns):
+                # Give both sides the union of their categories, so the concatenated columns stay
+                # categorical and labels first seen in this batch are kept rather than turned into NaN.
+                current = current.copy(deep=False)
+                for column in current.select_dtypes("category"):
+                    if column in frame:
+                        categories = union_categoricals([current[column], frame[column].astype("category")],
+                                                        ignore_order=True).categories
+                        current[column] = current[column].cat.set_categories(categories)
+                        frame[column] = pd.Categorical(frame[column], categories=categories)
+                frame = pd.concat([current, frame], ignore_index=True)
+            self._transactions = frame.tail(self.transaction_capacity).reset_index(drop=True)
+            sinks = list(self._sinks["transactions"])
+            version = self._publish("transactions", len(batch))
+        for sink in sinks:
+            sink(batch)
+        return version
+
+    def set_status(self, module, status):
+        with self._lock:
+            self._status = {**self._status, module: status}
+            return self._publish("status", (module, status))
+
+    def start_feed(self, batches, kind="threats"):
+        """Publish every batch of an iterator (e.g. ``synthetic.live_feed``) from one daemon thread"""
+        publish = {"threats": self.publish_threats, "transactions": self.publish_transactions}[kind]
+
+        def run():
+            for batch in batches:
+                publish(batch)
+
+        thread = threading.Thread(target=run, name=f"ulinzi-feed-{kind}", daemon=True)
+        thread.start()
+        return thread
+
+    # --- Subscriptions ---
+    def transactions(self):
+        return self._transactions
+
+    def status(self):
+        return self._status
+
+    def snapshot(self):
+        """Current Snapshot; its frame and status dict are never modified afterwards"""
+        with self._lock:
+            return Snapshot(self.version, self.threats, self._transactions, self._status)
+
+    def changes(self, since):
+        """Deltas published after version ``since``, or None when the log no longer reaches back that far"""
+        with self._lock:
+            if since >= self.version:
+                return []
+            if not self._log or self._log[0].version > since + 1:
+                return None
+            return [delta for delta in self._log if delta.version > since]
@@ -0,0 +1,181 @@
+"""Per-account behavioral baselines for the Financial Sentinel.
+
+Every statistic lives in a preallocated NumPy array indexed by account id
+(about 100 bytes per account): Welford mean/variance of log amounts, an
+exponentially decayed activity count, an hour-of-day histogram and
+location-pattern counts. Batches update and assess in one vectorized pass,
+and the whole store snapshots to a single .npz file.
+"""
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from ulinzi.risk import LOCATION_PATTERNS, location_codes
+
+Assessment = namedtuple("Assessment", "anomaly history amount_z hour_share location_share activity_ratio")
+
+MIN_HISTORY = 5          # transactions before an account's baseline is trusted
+AMOUNT_Z = 3.0           # |z| of log amount that is anomalous on its own
+RARE_SHARE = 0.05        # hour / location share below which it counts as unusual
+ACTIVITY_SPIKE = 5.0     # decayed activity vs. the long-run rate that counts as a burst
+_COUNTER_LIMIT = 60000   # uint16 histograms are halved before they can overflow
+
+_FIELDS = {
+    "count": (np.uint32, ()),
+    "mean": (np.float64, ()),
+    "m2": (np.float64, ()),
+    "activity": (np.float32, ()),
+    "first_seen": (np.float64, ()),
+    "last_seen": (np.float64, ()),
+    "hours": (np.uint16, (24,)),
+    "locations": (np.uint16, (len(LOCATION_PATTERNS),)),
+}
+
+
+def _seconds(timestamps):
+    """Epoch seconds (float64) from datetime64 values or numbers"""
+    timestamps = np.asarray(timestamps)
+    if timestamps.dtype.kind == "M":
+        return timestamps.astype("datetime64[ns]").view(np.int64) / 1e9
+    return timestamps.astype(np.float64)
+
+
+class ProfileStore:
+    """Array-backed behavioral profiles, one row per account id.
+
+    ``capacity`` rows are allocated up front and doubled when a larger
+    account id arrives. Activity decays with ``halflife``; safe to share
+    between threads.
+    """
+
+    def __init__(self, capacity=1 << 17, halflife="1d"):
+        self.halflife = pd.Timedelta(halflife).total_seconds()
+        self._tau = self.halflife / np.log(2)
+        self._arrays = {name: np.zeros((capacity,) + shape, dtype) for name, (dtype, shape) in _FIELDS.items()}
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self):
+        return len(self._arrays["count"])
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self._arrays.values())
+
+    def __len__(self):
+        """Accounts with at least one transaction"""
+        return int(np.count_nonzero(self._arrays["count"]))
+
+    def _reserve(self, size):
+        if size <= self.capacity:
+            return
+        capacity = max(size, 2 * self.capacity)
+        for name, array in self._arrays.items():
+            grown = np.zeros((capacity,) + array.shape[1:], array.dtype)
+            grown[:len(array)] = array
+            self._arrays[name] = grown
+
+    def update(self, accounts, amounts, hours, locations, timestamps):
+        """Fold a batch of transactions into their accounts' profiles"""
+        accounts = np.asarray(accounts, np.int64).ravel()
+        if not len(accounts):
+            return
+        x = np.log1p(np.asarray(amounts, np.float64).ravel())
+        hours = np.asarray(hours, np.int64).ravel() % 24
+        codes = location_codes(locations).ravel().astype(np.int64)
+        t = np.broadcast_to(_seconds(timestamps), accounts.shape)
+        with self._lock:
+            self._reserve(int(accounts.max()) + 1)
+            a = self._arrays
+            uniq, inv, n = np.unique(accounts, return_inverse=True, return_counts=True)
+            # Chan et al. parallel combination of the batch's per-account moments.
+            batch_mean = np.bincount(inv, x) / n
+            batch_m2 = np.bincount(inv, (x - batch_mean[inv]) ** 2)
+            prior = a["count"][uniq].astype(np.float64)
+            total = prior + n
+            delta = batch_mean - a["mean"][uniq]
+            a["mean"][uniq] += delta * n / total
+            a["m2"][uniq] += batch_m2 + delta ** 2 * prior * n / total
+            a["count"][uniq] = total
+            # Decay the activity count to the batch's latest event, then add each event's weight.
+            latest = np.full(len(uniq), -np.inf)
+            np.maximum.at(latest, inv, t)
+            earliest = np.full(len(uniq), np.inf)
+            np.minimum.at(earliest, inv, t)
+            weights = np.bincount(inv, np.exp(-(latest[inv] - t) / self._tau))
+            decay = np.exp(-np.maximum(latest - a["last_seen"][uniq], 0.0) / self._tau)
+            a["activity"][uniq] = a["activity"][uniq] * decay + weights
+            a["first_seen"][uniq] = np.where(prior == 0, earliest, a["first_seen"][uniq])
+            a["last_seen"][uniq] = np.maximum(a["last_seen"][uniq], latest)
+            for name, column in (("hours", hours), ("locations", codes)):
+                full = uniq[a[name][uniq].max(axis=1) >= _COUNTER_LIMIT]
+                a[name][full] >>= 1
+                np.add.at(a[name], (accounts, column), 1)
+
+    def assess(self, accounts, amounts, hours, locations, timestamps):
+        """Compare transactions with their accounts' baselines; returns an Assessment of arrays.
+
+        A transaction is anomalous when its amount is ``AMOUNT_Z`` standard
+        deviations from the account's usual (log) amount, when both its hour
+        and its location are rare for the account, or when the account's
+        recent activity is ``ACTIVITY_SPIKE`` times its long-run rate.
+        Accounts with fewer than ``MIN_HISTORY`` transactions are never
+        flagged.
+        """
+        accounts = np.asarray(accounts, np.int64).ravel()
+        x = np.log1p(np.asarray(amounts, np.float64).ravel())
+        hours = np.asarray(hours, np.int64).ravel() % 24
+        codes = location_codes(locations).ravel().astype(np.int64)
+        t = np.broadcast_to(_seconds(timestamps), accounts.shape)
+        with self._lock:
+            a = self._arrays
+            known = accounts < self.capacity
+            rows = np.where(known, accounts, 0)
+            count = np.where(known, a["count"][rows], 0).astype(np.float64)
+            mean, m2 = a["mean"][rows], a["m2"][rows]
+            hour_count = a["hours"][rows, hours].astype(np.float64)
+            hour_total = np.where(known, a["hours"][rows].sum(axis=1, dtype=np.float64), 0.0)
+            location_count = a["locations"][rows, codes].astype(np.float64)
+            location_total = np.where(known, a["locations"][rows].sum(axis=1, dtype=np.float64), 0.0)
+            activity = a["activity"][rows] * np.exp(-np.maximum(t - a["last_seen"][rows], 0.0) / self._tau) + 1.0
+            age = np.maximum(t - a["first_seen"][rows], self.halflife)
+        std = np.sqrt(np.divide(m2, count - 1, out=np.zeros_like(m2), where=count > 1))
+        amount_z = np.divide(x - mean, std, out=np.zeros_like(x), where=std > 0)
+        hour_share = np.divide(hour_count, hour_total, out=np.zeros_like(x), where=hour_total > 0)
+        location_share = np.divide(location_count, location_total, out=np.zeros_like(x), where=location_total > 0)
+        expected = count / age * self._tau
+        activity_ratio = activity / np.maximum(expected, 1.0)
+        history = count >= MIN_HISTORY
+        anomaly = history & (
+            (np.abs(amount_z) >= AMOUNT_Z)
+            | ((hour_share < RARE_SHARE) & (location_share < RARE_SHARE))
+            | (activity_ratio >= ACTIVITY_SPIKE)
+        )
+        return Assessment(anomaly, count.astype(np.int64), amount_z, hour_share, location_share, activity_ratio)
+
+    def update_frame(self, df):
+        """Fold a transactions frame (timestamp, account_id, amount, hour, location) into the store"""
+        self.update(df["account_id"].to_numpy(), df["amount"].to_numpy(), df["hour"].to_numpy(),
+                    df["location"], df["timestamp"].to_numpy())
+
+    # --- Persistence ---
+    def snapshot(self, path):
+        """Write every array to ``path`` (.npz) atomically"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{path}.tmp.npz"
+        with self._lock:
+            np.savez(tmp, halflife=self.halflife, **self._arrays)
+            os.replace(tmp, path)
+
+    @classmethod
+    def restore(cls, path):
+        """Load a store written by ``snapshot``"""
+        with np.load(path) as data:
+            store = cls(capacity=0, halflife=pd.Timedelta(seconds=float(data["halflife"])))
+            store._arrays = {name: data[name] for name in _FIELDS}
+        return store
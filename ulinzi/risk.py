@@ -0,0 +1,110 @@
+"""Financial Sentinel risk rules, vectorized over whole transaction batches"""
+import numpy as np
+import pandas as pd
+
+# --- Rule tables ---
+# Location patterns offered by the Financial Sentinel simulator, in UI order.
+LOCATION_PATTERNS = (
+    "Nairobi (Home - Normal)",
+    "Mombasa (Known Travel)",
+    "Bomet (New/Anomalous)",
+    "International (High Risk)",
+    "3 AM Anomaly",
+)
+# Points added for the location class, and extra points when it is off-hours.
+LOCATION_POINTS = np.array([0, 0, 20, 35, 0], dtype=np.int16)
+LOCATION_OFF_HOURS_POINTS = np.array([0, 0, 0, 0, 30], dtype=np.int16)
+
+BASE_SCORE = 15
+AMOUNT_TIERS = ((50000, 15), (200000, 25), (500000, 35))
+OFF_HOURS_POINTS = 25
+BEHAVIORAL_POINTS = 25
+BURST_POINTS = 30
+SIM_SWAP_SCORE = 99
+MAX_SCORE = 100
+
+CHALLENGE_THRESHOLD = 50
+BLOCK_THRESHOLD = 85
+DECISIONS = ("APPROVE", "CHALLENGE", "BLOCK")
+APPROVE, CHALLENGE, BLOCK = 0, 1, 2
+
+_LOCATION_INDEX = {name: i for i, name in enumerate(LOCATION_PATTERNS)}
+
+
+def _class_table(labels):
+    # Trailing 0 so that a -1 (missing) code also lands on the home class.
+    return np.array([_LOCATION_INDEX.get(label, 0) for label in labels] + [0], dtype=np.int8)
+
+
+def location_codes(locations):
+    """Map location labels to LOCATION_PATTERNS indices (unknown labels and out-of-range codes score as home)"""
+    if isinstance(getattr(locations, "dtype", None), pd.CategoricalDtype):
+        categorical = pd.Categorical(locations)
+        return _class_table(categorical.categories)[categorical.codes]
+    locations = np.asarray(locations)
+    if locations.dtype.kind in "iu":
+        known = (locations >= 0) & (locations < len(LOCATION_PATTERNS))
+        return np.where(known, locations, 0).astype(np.int8, copy=False)
+    codes, uniques = pd.factorize(locations.ravel())
+    return _class_table(uniques)[codes].reshape(locations.shape)
+
+
+def score_transactions(amount, hour, location, behavioral_anomaly=False, sim_swap=False, burst=False):
+    """Score a batch of transactions in one vectorized pass.
+
+    Every argument is a scalar or an array broadcastable to the batch shape;
+    ``location`` may hold LOCATION_PATTERNS labels or their integer codes.
+    Returns an int16 array of risk scores in [0, 100].
+    """
+    amount = np.asarray(amount)
+    hour = np.asarray(hour)
+    codes = location_codes(location)
+
+    score = np.full(np.broadcast_shapes(amount.shape, hour.shape, codes.shape), BASE_SCORE, dtype=np.int16)
+    for threshold, points in AMOUNT_TIERS:
+        score += (amount > threshold).astype(np.int16) * np.int16(points)
+
+    off_hours = (hour < 5) | (hour > 23)
+    score += off_hours.astype(np.int16) * np.int16(OFF_HOURS_POINTS)
+    score += np.where(off_hours, LOCATION_OFF_HOURS_POINTS[codes], np.int16(0))
+    score += LOCATION_POINTS[codes]
+    score += np.asarray(behavioral_anomaly, dtype=bool).astype(np.int16) * np.int16(BEHAVIORAL_POINTS)
+    score += np.asarray(burst, dtype=bool).astype(np.int16) * np.int16(BURST_POINTS)
+
+    score = np.where(np.asarray(sim_swap, dtype=bool), np.int16(SIM_SWAP_SCORE), score)
+    return np.minimum(score, MAX_SCORE).astype(np.int16, copy=False)
+
+
+def decide(risk_score):
+    """Map risk scores to APPROVE (0) / CHALLENGE (1) / BLOCK (2) codes"""
+    risk_score = np.asarray(risk_score)
+    return (risk_score > CHALLENGE_THRESHOLD).astype(np.int8) + (risk_score > BLOCK_THRESHOLD).astype(np.int8)
+
+
+def score_frame(df, amount="amount", hour="hour", location="location",
+                behavioral_anomaly="behavioral_anomaly", sim_swap="sim_swap", burst="burst"):
+    """Score a DataFrame of transactions; missing flag columns count as False.
+
+    Returns a copy of ``df`` with ``risk_score`` and ``decision`` columns added.
+    """
+    flags = {}
+    for name in (behavioral_anomaly, sim_swap, burst):
+        flags[name] = df[name].to_numpy(dtype=bool) if name in df else False
+    scores = score_transactions(
+        df[amount].to_numpy(),
+        df[hour].to_numpy(),
+        df[location],
+        flags[behavioral_anomaly],
+        flags[sim_swap],
+        flags[burst],
+    )
+    out = df.copy()
+    out["risk_score"] = scores
+    out["decision"] = np.asarray(DECISIONS, dtype=object)[decide(scores)]
+    return out
+
+
+def score_transaction(amount, hour, location, behavioral_anomaly=False, sim_swap=False, burst=False):
+    """Score a single transaction with the batch rules; returns (risk_score, decision)"""
+    score = int(score_transactions(amount, hour, location, behavioral_anomaly, sim_swap, burst))
+    return score, DECISIONS[int(decide(score))]
@@ -0,0 +1,132 @@
+"""Incremental threat rollups for the Threat Analytics panel.
+
+Every ingested event is counted once per resolution into a tumbling
+bucket keyed by (threat level, type, region). Each resolution is a ring
+of fixed length, which sets its retention: one-minute buckets cover the
+last six hours, hourly ones a week and daily ones a year. Older detail is
+dropped as the ring wraps while the coarser rings keep the totals, which
+is the downsampling. Like the velocity counters, a slot remembers the tick
+it was last written, so stale buckets are recognized rather than swept.
+Queries read at most one ring, whatever the raw event volume.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from ulinzi.synthetic import KENYA_HOTSPOTS, THREAT_LEVELS, THREAT_TYPES
+
+# name -> (bucket width, buckets retained)
+RESOLUTIONS = {
+    "1min": (pd.Timedelta("1min"), 360),
+    "1h": (pd.Timedelta("1h"), 168),
+    "1d": (pd.Timedelta("1D"), 365),
+}
+DIMENSIONS = ("threat_level", "type", "region")
+_NEVER = np.iinfo(np.int64).min
+
+
+def _codes(values, vocabulary):
+    if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype) and list(values.cat.categories) == vocabulary:
+        return values.cat.codes.to_numpy(np.int64)
+    return pd.Categorical(values, categories=vocabulary).codes.astype(np.int64)
+
+
+class ThreatRollups:
+    """Tumbling-window threat counts by level, type and region at several resolutions; safe to share between threads"""
+
+    def __init__(self, levels=THREAT_LEVELS, types=THREAT_TYPES, regions=KENYA_HOTSPOTS, resolutions=RESOLUTIONS):
+        self.levels = list(levels)
+        self.types = list(types)
+        self.regions = list(regions)
+        self._centers = np.array([regions[name][:2] for name in self.regions], dtype=float)
+        self.resolutions = {name: (width.value, n) for name, (width, n) in resolutions.items()}
+        shape = (len(self.levels), len(self.types), len(self.regions))
+        self._counts = {name: np.zeros((n,) + shape, np.int64) for name, (_, n) in self.resolutions.items()}
+        self._ticks = {name: np.full(n, _NEVER, np.int64) for name, (_, n) in self.resolutions.items()}
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def region_codes(self, lat, lon):
+        """Index of the nearest KENYA_HOTSPOTS region for each position"""
+        lat, lon = np.asarray(lat, float), np.asarray(lon, float)
+        # One pass per hotspot keeps memory at a few arrays of len(lat), not len(lat) x regions.
+        best = np.full(len(lat), np.inf)
+        codes = np.zeros(len(lat), np.int64)
+        for code, (center_lat, center_lon) in enumerate(self._centers):
+            distance = (lat - center_lat) ** 2 + (lon - center_lon) ** 2
+            closer = distance < best
+            best[closer] = distance[closer]
+            codes[closer] = code
+        return codes
+
+    def add(self, frame):
+        """Count a batch of events (timestamp, lat, lon, threat_level, type columns)"""
+        frame = pd.DataFrame(frame)
+        if not len(frame):
+            return
+        ts = pd.to_datetime(frame["timestamp"]).to_numpy("datetime64[ns]").view(np.int64)
+        level = _codes(frame["threat_level"], self.levels)
+        kind = _codes(frame["type"], self.types)
+        known = (level >= 0) & (kind >= 0)
+        ts = ts[known]
+        if not len(ts):
+            return
+        region = self.region_codes(frame["lat"].to_numpy()[known], frame["lon"].to_numpy()[known])
+        cell = np.ravel_multi_index((level[known], kind[known], region),
+                                    (len(self.levels), len(self.types), len(self.regions)))
+        with self._lock:
+            self.total += len(ts)
+            for name, (width, n) in self.resolutions.items():
+                self._fold(name, ts // width, cell, n)
+
+    def _fold(self, name, tick, cell, n):
+        counts, ticks = self._counts[name], self._ticks[name]
+        # Events a full lap behind the newest bucket are past this resolution's retention.
+        keep = tick > max(int(tick.max()), int(ticks.max())) - n
+        tick, cell = tick[keep], cell[keep]
+        slot = tick % n
+        newest = np.full(n, _NEVER, np.int64)
+        np.maximum.at(newest, slot, tick)
+        lapped = newest > ticks
+        counts[lapped] = 0
+        ticks[lapped] = newest[lapped]
+        current = tick == ticks[slot]
+        flat = counts.reshape(n, -1)
+        np.add.at(flat, (slot[current], cell[current]), 1)
+
+    # --- Queries ---
+    def _window(self, resolution, window, now):
+        width, n = self.resolutions[resolution]
+        now = pd.Timestamp.now().value if now is None else pd.Timestamp(now).value
+        buckets = n if window is None else min(max(int(-(-pd.Timedelta(window).value // width)), 1), n)
+        last = now // width
+        wanted = np.arange(last - buckets + 1, last + 1)
+        with self._lock:
+            slot = wanted % n
+            live = self._ticks[resolution][slot] == wanted
+            counts = np.where(live[:, None, None, None], self._counts[resolution][slot], 0)
+        return wanted * width, counts
+
+    def _labels(self, by):
+        return {"threat_level": self.levels, "type": self.types, "region": self.regions}[by]
+
+    def series(self, resolution="1min", window=None, by="threat_level", now=None):
+        """Counts per bucket (rows, zero-filled, oldest first) and ``by`` value (columns)"""
+        starts, counts = self._window(resolution, window, now)
+        axes = tuple(i + 1 for i, name in enumerate(DIMENSIONS) if name != by)
+        return pd.DataFrame(counts.sum(axis=axes), index=pd.DatetimeIndex(starts, name="bucket"),
+                            columns=pd.Index(self._labels(by), name=by))
+
+    def totals(self, resolution="1h", window=None, by="threat_level", now=None):
+        """Counts per ``by`` value over the window"""
+        return self.series(resolution, window, by, now).sum().rename("count")
+
+    def rate(self, resolution="1min", window="1h", now=None):
+        """(events per minute over ``window``, the same for the window before it)"""
+        span = pd.Timedelta(window)
+        now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+        current = int(self.totals(resolution, span, now=now).sum())
+        previous = int(self.totals(resolution, span, now=now - span).sum())
+        minutes = span / pd.Timedelta("1min")
+        return current / minutes, previous / minutes
@@ -0,0 +1,316 @@
+"""Standalone asyncio HTTP scoring service for the USSD, mobile and internet-banking channels.
+
+Requests from every connection go into one queue; a single batcher task
+drains whatever has accumulated and scores it with the Financial
+Sentinel rules in one vectorized pass, so batches grow with load while
+an idle service answers immediately. Once ``max_pending`` transactions
+are waiting, new requests are refused with 503 and Retry-After instead of
+queueing without bound; a single batch larger than ``max_pending`` could
+never be accepted, so it gets 413.
+
+    python -m ulinzi.scoring --port 8700
+
+POST /score takes one transaction object, or {"transactions": [...]}, with
+amount, hour (0-23) and optional location (one of LOCATION_PATTERNS),
+behavioral_anomaly, sim_swap, burst, account_id and device_id; a bad
+field gets 400 naming it. GET /stats returns counters and latency
+percentiles as JSON, and GET /metrics returns the Prometheus exposition.
+"""
+import argparse
+import asyncio
+import json
+import math
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+from ulinzi.metrics import Registry
+from ulinzi.risk import DECISIONS, LOCATION_PATTERNS, decide, score_transactions
+
+MAX_BODY = 1 << 20
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 503: "Service Unavailable"}
+
+
+class Overloaded(Exception):
+    """More than ``max_pending`` transactions are already waiting to be scored"""
+
+
+class BatchTooLarge(Exception):
+    """A single batch holds more than ``max_pending`` transactions, so it can never be queued"""
+
+
+def _flag(item, name):
+    value = item.get(name, False)
+    if not isinstance(value, bool):
+        raise ValueError(f"{name} must be true or false, got {value!r}")
+    return value
+
+
+def _parse(item):
+    """(amount, hour, location, behavioral_anomaly, sim_swap, burst, account_id, device_id) of one request item"""
+    if not isinstance(item, dict):
+        raise ValueError("each transaction must be a JSON object")
+    try:
+        amount, hour = float(item["amount"]), float(item["hour"])
+    except KeyError as exc:
+        raise ValueError(f"missing field {exc.args[0]!r}") from None
+    except (TypeError, ValueError):
+        raise ValueError("amount and hour must be numbers") from None
+    if not (math.isfinite(amount) and amount >= 0):
+        raise ValueError(f"amount must be a finite number of at least 0, got {amount}")
+    if not (hour.is_integer() and 0 <= hour <= 23):
+        raise ValueError(f"hour must be a whole number from 0 to 23, got {hour:g}")
+    location = str(item.get("location", LOCATION_PATTERNS[0]))
+    if location not in LOCATION_PATTERNS:
+        raise ValueError(f"location must be one of {list(LOCATION_PATTERNS)}, got {location!r}")
+    account = item.get("account_id")
+    try:
+        account = -1 if account is None else int(account)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"account_id must be an integer, got {account!r}") from None
+    device = str(item.get("device_id", account))
+    return (amount, int(hour), location, _flag(item, "behavioral_anomaly"), _flag(item, "sim_swap"),
+            _flag(item, "burst"), account, device)
+
+
+class ScoringService:
+    """Micro-batching scorer shared by every connection of one event loop.
+
+    With ``profiles`` (a ProfileStore) and ``velocity`` (a VelocityMonitor),
+    transactions carrying an ``account_id`` also get the behavioral,
+    SIM-swap and burst signals from those engines; flags sent by the
+    client are OR-ed in. ``max_wait_ms`` optionally holds a part-full
+    batch open for more requests.
+    """
+
+    def __init__(self, max_batch=1024, max_pending=20000, max_wait_ms=0.0, profiles=None, velocity=None,
+                 registry=None):
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.max_wait = max_wait_ms / 1e3
+        self.profiles = profiles
+        self.velocity = velocity
+        self.registry = registry or Registry()
+        self.pending = 0
+        self.requests = 0
+        self.rejected = 0
+        self.batches = 0
+        self.scored = 0
+        self._queue = None
+        self._batcher = None
+
+    # --- Batching ---
+    async def score(self, transactions):
+        """Score parsed transactions (see ``_parse``); returns one result dict each"""
+        if self._batcher is None:
+            self._queue = asyncio.Queue()
+            self._batcher = asyncio.ensure_future(self._run())
+        if len(transactions) > self.max_pending:
+            self.rejected += 1
+            raise BatchTooLarge()
+        if self.pending + len(transactions) > self.max_pending:
+            self.rejected += 1
+            raise Overloaded()
+        self.pending += len(transactions)
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((transactions, future))
+        try:
+            return await future
+        finally:
+            self.pending -= len(transactions)
+
+    def _drain(self, items, size):
+        while size < self.max_batch and not self._queue.empty():
+            item = self._queue.get_nowait()
+            items.append(item)
+            size += len(item[0])
+        return size
+
+    async def _run(self):
+        while True:
+            items = [await self._queue.get()]
+            # Let connections that are already readable enqueue before the batch closes.
+            await asyncio.sleep(0)
+            size = self._drain(items, len(items[0][0]))
+            if self.max_wait and size < self.max_batch:
+                await asyncio.sleep(self.max_wait)
+                size = self._drain(items, size)
+            rows = [row for transactions, _ in items for row in transactions]
+            try:
+                with self.registry.histogram("scoring_batch", "Vectorized evaluation of one micro-batch").time():
+                    results = self.evaluate(rows)
+            except Exception as exc:  # a bad batch must not take the batcher down
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            self.batches += 1
+            self.scored += len(rows)
+            start = 0
+            for transactions, future in items:
+                if not future.done():
+                    future.set_result(results[start:start + len(transactions)])
+                start += len(transactions)
+
+    def evaluate(self, rows):
+        """Score a list of parsed transactions in one vectorized pass"""
+        amount, hour, location, behavioral, sim_swap, burst, account, device = (np.array(column) for column in zip(*rows))
+        known = account >= 0
+        if known.any() and (self.profiles is not None or self.velocity is not None):
+            now = np.datetime64(time.time_ns(), "ns")
+            if self.profiles is not None:
+                profile = self.profiles.assess(account[known], amount[known], hour[known], location[known], now)
+                behavioral[known] |= profile.anomaly
+            if self.velocity is not None:
+                check = self.velocity.assess(account[known], device[known], now)
+                sim_swap[known] |= check.sim_swap
+                burst[known] |= check.burst
+        scores = score_transactions(amount, hour, location, behavioral, sim_swap, burst)
+        decisions = decide(scores)
+        return [{"risk_score": int(score), "decision": DECISIONS[code], "behavioral_anomaly": bool(b),
+                 "sim_swap": bool(s), "burst": bool(u)}
+                for score, code, b, s, u in zip(scores.tolist(), decisions.tolist(), behavioral, sim_swap, burst)]
+
+    def stats(self):
+        latency = self.registry.histogram("scoring_request")
+        batch = self.registry.histogram("scoring_batch")
+        return {
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "pending": self.pending,
+            "batches": self.batches,
+            "scored": self.scored,
+            "mean_batch": self.scored / self.batches if self.batches else 0.0,
+            "request_ms": dict(zip(("p50", "p95", "p99"), latency.percentiles(50, 95, 99))),
+            "batch_ms": dict(zip(("p50", "p95", "p99"), batch.percentiles(50, 95, 99))),
+        }
+
+    # --- HTTP ---
+    async def handle(self, reader, writer):
+        """One keep-alive HTTP/1.1 connection; requests on it are answered in order"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, path, version = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, {"error": "body too large"}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload, extra = await self._route(method, path.split("?")[0], body)
+                close = headers.get("connection", "").lower() == "close" or version.strip() == "HTTP/1.0"
+                await self._respond(writer, status, payload, close, extra)
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if path == "/score":
+            if method != "POST":
+                return 405, {"error": "POST only"}, {}
+            started = time.perf_counter_ns()
+            self.requests += 1
+            try:
+                request = json.loads(body or b"null")
+                batch = isinstance(request, dict) and "transactions" in request
+                items = request["transactions"] if batch else [request]
+                if not isinstance(items, list) or not items:
+                    raise ValueError("transactions must be a non-empty list")
+                results = await self.score([_parse(item) for item in items])
+            except BatchTooLarge:
+                return 413, {"error": f"batch larger than max_pending ({self.max_pending}); split it"}, {}
+            except Overloaded:
+                return 503, {"error": "overloaded", "pending": self.pending}, {"Retry-After": "1"}
+            except ValueError as exc:  # includes malformed JSON
+                return 400, {"error": str(exc)}, {}
+            self.registry.histogram("scoring_request", "Scoring request latency inside the service").record(
+                time.perf_counter_ns() - started)
+            return 200, {"results": results} if batch else results[0], {}
+        if path == "/stats" and method == "GET":
+            return 200, self.stats(), {}
+        if path == "/metrics" and method == "GET":
+            return 200, self.registry.prometheus(), {"Content-Type": "text/plain; version=0.0.4"}
+        if path == "/healthz":
+            return 200, {"status": "ok"}, {}
+        return 404, {"error": "not found"}, {}
+
+    async def _respond(self, writer, status, payload, close=False, extra=None):
+        body = payload.encode() if isinstance(payload, str) else json.dumps(payload).encode()
+        headers = {"Content-Type": "application/json", "Content-Length": str(len(body)),
+                   "Connection": "close" if close else "keep-alive", **(extra or {})}
+        head = f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(head.encode("latin-1") + b"\r\n" + body)
+        await writer.drain()
+
+    async def serve(self, host="127.0.0.1", port=8700, backlog=1024):
+        """Start listening; returns the asyncio Server"""
+        return await asyncio.start_server(self.handle, host, port, backlog=backlog)
+
+    def start_background(self, host="127.0.0.1", port=0):
+        """Serve from an event loop on a daemon thread; returns the base URL"""
+        ready = threading.Event()
+        bound = {}
+
+        def run():
+            loop = asyncio.new_event_loop()
+            server = loop.run_until_complete(self.serve(host, port))
+            bound["port"] = server.sockets[0].getsockname()[1]
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, name="ulinzi-scoring", daemon=True).start()
+        ready.wait()
+        return f"http://{host}:{bound['port']}"
+
+
+# --- Client ---
+def score_remote(url, timeout=0.5, **transaction):
+    """Score one transaction on a running service; returns (risk_score, decision)"""
+    request = urllib.request.Request(f"{url}/score", json.dumps(transaction).encode(),
+                                     {"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        result = json.loads(response.read())
+    return result["risk_score"], result["decision"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--max-batch", type=int, default=1024)
+    parser.add_argument("--max-pending", type=int, default=20000)
+    parser.add_argument("--max-wait-ms", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    service = ScoringService(args.max_batch, args.max_pending, args.max_wait_ms)
+
+    async def run():
+        server = await service.serve(args.host, args.port)
+        print(f"scoring service on http://{args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""Account-sharded, multi-process Financial Sentinel scoring.
+
+One Python process saturates a core long before national transaction
+volume. ShardedScorer partitions every batch by a hash of ``account_id``
+across a pool of worker processes. Each worker owns the behavioral
+profiles (ProfileStore) and velocity counters (VelocityMonitor) of its
+accounts, so no state is shared or locked between them. Account ids can
+be anything up to 2**63; each shard gives the accounts it sees dense
+ProfileStore rows in order of first sight (AccountRows), so its store
+grows with its accounts, not with their largest id.
+
+Rows are never pickled. Each shard has a typed, column-major input and
+output buffer in shared memory. The parent copies a shard's rows in,
+sends the row count down a pipe and reads the decisions back out, so all
+shards score in parallel. Batches reach a worker in order. Within a
+batch, a worker takes each account's transactions in rounds (first of
+each account, then second, ...) and updates the state after every round,
+so every transaction is judged on exactly the history before it. Results
+come back in input order. Device velocity is kept per shard, so a device
+shared by accounts on different shards is counted on each separately.
+
+A batch is validated whole before any shard sees it, so a bad row fails
+the call without having updated any state and the batch can be retried
+once fixed without double-counting.
+
+    python -m ulinzi.sharded --workers 4 --transactions 2000000
+"""
+import argparse
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from ulinzi.profiles import ProfileStore
+from ulinzi.risk import DECISIONS, LOCATION_PATTERNS, decide, location_codes, score_transactions
+from ulinzi.velocity import VelocityMonitor
+
+# Column -> dtype of the shared buffers; wider columns first keeps every column aligned.
+INPUTS = {
+    "timestamp": np.int64,
+    "account_id": np.int64,
+    "device_id": np.int64,
+    "amount": np.float64,
+    "hour": np.int8,
+    "location": np.int8,
+    "behavioral_anomaly": np.bool_,
+    "sim_swap": np.bool_,
+    "burst": np.bool_,
+}
+OUTPUTS = {
+    "risk_score": np.int16,
+    "decision": np.int8,
+    "behavioral_anomaly": np.bool_,
+    "sim_swap": np.bool_,
+    "burst": np.bool_,
+}
+FLAGS = ("behavioral_anomaly", "sim_swap", "burst")
+
+
+def _nbytes(layout, capacity):
+    return capacity * sum(np.dtype(dtype).itemsize for dtype in layout.values())
+
+
+def _columns(buffer, layout, capacity):
+    """Typed column views over one shared buffer"""
+    columns, offset = {}, 0
+    for name, dtype in layout.items():
+        columns[name] = np.frombuffer(buffer, dtype, capacity, offset)
+        offset += capacity * np.dtype(dtype).itemsize
+    return columns
+
+
+def _keys(values):
+    """int64 keys for ids given as integers or strings"""
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        return values.astype(np.int64, copy=False)
+    return pd.util.hash_array(values.astype(str)).view(np.int64)
+
+
+def transaction_columns(df):
+    """INPUTS columns of a transactions frame (timestamp, account_id, amount, hour, location and
+    optional device_id and flag columns; missing flags count as False, a missing device as the account)"""
+    n = len(df)
+    account = df["account_id"].to_numpy(np.int64)
+    hour = df["hour"].to_numpy(np.int64)
+    if len(hour) and not ((hour >= 0) & (hour <= 23)).all():
+        raise ValueError("hour must be from 0 to 23")
+    columns = {
+        "timestamp": pd.to_datetime(df["timestamp"]).to_numpy("datetime64[ns]").view(np.int64),
+        "account_id": account,
+        "device_id": _keys(df["device_id"]) if "device_id" in df else account,
+        "amount": df["amount"].to_numpy(np.float64),
+        "hour": hour.astype(np.int8),
+        "location": location_codes(df["location"]),
+    }
+    for name in FLAGS:
+        columns[name] = df[name].to_numpy(bool) if name in df else np.zeros(n, bool)
+    return columns
+
+
+def validate(columns):
+    """Raise ValueError naming the first INPUTS column that is missing, mis-sized or out of range"""
+    missing = [name for name in INPUTS if name not in columns]
+    if missing:
+        raise ValueError(f"missing column {missing[0]!r}")
+    n = len(columns["account_id"])
+    for name in INPUTS:
+        if len(columns[name]) != n:
+            raise ValueError(f"column {name!r} has {len(columns[name])} rows, expected {n}")
+    checks = {
+        "timestamp": np.asarray(columns["timestamp"]).view(np.int64) != np.iinfo(np.int64).min,
+        "amount": np.isfinite(columns["amount"]) & (np.asarray(columns["amount"]) >= 0),
+        "hour": (np.asarray(columns["hour"]) >= 0) & (np.asarray(columns["hour"]) <= 23),
+        "location": (np.asarray(columns["location"]) >= 0) & (np.asarray(columns["location"]) < len(LOCATION_PATTERNS)),
+    }
+    for name, ok in checks.items():
+        if not ok.all():
+            raise ValueError(f"column {name!r} is out of range at row {int(np.argmin(ok))}")
+
+
+def shard_of(accounts, workers):
+    """Shard index of each account id: a hash of the id, so any id range spreads evenly (negative ids go to 0)"""
+    accounts = np.asarray(accounts, np.int64)
+    shards = (pd.util.hash_array(accounts) % np.uint64(max(workers, 1))).astype(np.int64)
+    return np.where(accounts >= 0, shards, 0)
+
+
+class AccountRows:
+    """Dense ProfileStore rows for arbitrary account ids, assigned in order of first sight"""
+
+    def __init__(self):
+        self._ids = np.empty(0, np.int64)   # sorted
+        self._rows = np.empty(0, np.int64)  # row of each id in ``_ids``
+
+    def __len__(self):
+        return len(self._ids)
+
+    def _find(self, ids):
+        pos = np.minimum(np.searchsorted(self._ids, ids), max(len(self._ids) - 1, 0))
+        found = self._ids[pos] == ids if len(self._ids) else np.zeros(len(ids), bool)
+        return pos, found
+
+    def rows(self, ids):
+        """Row of each id, giving ids not seen before the next free rows"""
+        ids = np.asarray(ids, np.int64)
+        pos, found = self._find(ids)
+        new = np.unique(ids[~found])
+        if len(new):
+            ids_all = np.concatenate([self._ids, new])
+            rows_all = np.concatenate([self._rows, np.arange(len(self._ids), len(ids_all))])
+            order = np.argsort(ids_all, kind="stable")
+            self._ids, self._rows = ids_all[order], rows_all[order]
+            pos, found = self._find(ids)
+        return self._rows[pos]
+
+
+class ShardState:
+    """Profiles and velocity counters of one shard's accounts"""
+
+    def __init__(self, workers=1, profile_capacity=1 << 17, velocity_slots=1 << 18):
+        self.workers = max(workers, 1)
+        self.accounts = AccountRows()
+        self.profiles = ProfileStore(capacity=max(profile_capacity // self.workers, 1))
+        self.velocity = VelocityMonitor(slots=max(velocity_slots // self.workers, 1 << 12))
+
+    def record_sim_change(self, columns):
+        self.velocity.record_sim_change(columns["account_id"], columns["timestamp"].view("datetime64[ns]"))
+
+    def score(self, columns, outputs):
+        """Score ``columns`` into the ``outputs`` columns, each account's transactions in order"""
+        account = columns["account_id"]
+        flags = {name: columns[name].copy() for name in FLAGS}
+        known = np.flatnonzero(account >= 0)
+        if len(known):
+            local = np.full(len(account), -1, np.int64)
+            local[known] = self.accounts.rows(account[known])
+            order = known[np.argsort(account[known], kind="stable")]
+            grouped = account[order]
+            starts = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]])
+            rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+            # Round r holds the r-th transaction of every account in the batch.
+            by_round = order[np.argsort(rank, kind="stable")]
+            bounds = np.r_[0, np.cumsum(np.bincount(rank))]
+            for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+                self._round(columns, local, by_round[lo:hi], flags)
+        scores = score_transactions(columns["amount"], columns["hour"], columns["location"],
+                                    flags["behavioral_anomaly"], flags["sim_swap"], flags["burst"])
+        outputs["risk_score"][:] = scores
+        outputs["decision"][:] = decide(scores)
+        for name in FLAGS:
+            outputs[name][:] = flags[name]
+
+    def _round(self, columns, local, rows, flags):
+        account, local = columns["account_id"][rows], local[rows]
+        device = columns["device_id"][rows]
+        amount, hour, location = columns["amount"][rows], columns["hour"][rows], columns["location"][rows]
+        t = columns["timestamp"][rows].view("datetime64[ns]")
+        profile = self.profiles.assess(local, amount, hour, location, t)
+        check = self.velocity.assess(account, device, t)
+        flags["behavioral_anomaly"][rows] |= profile.anomaly
+        flags["sim_swap"][rows] |= check.sim_swap
+        flags["burst"][rows] |= check.burst
+        self.profiles.update(local, amount, hour, location, t)
+        self.velocity.record(account, device, amount, t)
+
+
+def _serve(workers, capacity, options, input_buffer, output_buffer, conn):
+    """Worker process: handle (kind, rows) messages from ``conn`` until it sends None"""
+    state = ShardState(workers, **options)
+    inputs, outputs = _columns(input_buffer, INPUTS, capacity), _columns(output_buffer, OUTPUTS, capacity)
+    conn.send("ready")
+    while (message := conn.recv()) is not None:
+        kind, n = message
+        try:
+            columns = {name: column[:n] for name, column in inputs.items()}
+            if kind == "score":
+                state.score(columns, {name: column[:n] for name, column in outputs.items()})
+            else:
+                state.record_sim_change(columns)
+            conn.send(n)
+        except Exception as exc:  # report to the parent; the shard's state stays usable
+            conn.send(f"{type(exc).__name__}: {exc}")
+
+
+class ShardedScorer:
+    """Financial Sentinel scoring partitioned by account across ``workers`` processes.
+
+    ``workers=0`` keeps a single shard in this process, which is the
+    reference the pool agrees with. A shard takes at most ``capacity`` rows
+    per round trip; larger batches are split without reordering. One
+    thread should feed a scorer; call ``close`` to stop the workers.
+    """
+
+    def __init__(self, workers=None, capacity=1 << 16, profile_capacity=1 << 17, velocity_slots=1 << 18):
+        self.workers = os.cpu_count() if workers is None else workers
+        self.capacity = capacity
+        self.scored = 0
+        options = {"profile_capacity": profile_capacity, "velocity_slots": velocity_slots}
+        self._local = None if self.workers else ShardState(1, **options)
+        self._shards = []
+        context = multiprocessing.get_context("spawn")  # the app is multi-threaded; never fork it
+        for shard in range(self.workers):
+            input_buffer = context.RawArray("b", _nbytes(INPUTS, capacity))
+            output_buffer = context.RawArray("b", _nbytes(OUTPUTS, capacity))
+            conn, child = context.Pipe()
+            process = context.Process(target=_serve, name=f"ulinzi-shard-{shard}", daemon=True,
+                                      args=(self.workers, capacity, options, input_buffer, output_buffer, child))
+            process.start()
+            self._shards.append((process, conn, _columns(input_buffer, INPUTS, capacity),
+                                 _columns(output_buffer, OUTPUTS, capacity)))
+        for _, conn, _, _ in self._shards:
+            conn.recv()
+
+    def shard_of(self, accounts):
+        """Shard index of each account id (unknown, negative ids go to shard 0)"""
+        return shard_of(accounts, self.workers)
+
+    def _dispatch(self, kind, columns, results=None):
+        shard = self.shard_of(columns["account_id"])
+        order = np.argsort(shard, kind="stable")
+        bounds = np.r_[0, np.cumsum(np.bincount(shard, minlength=self.workers))]
+        for offset in range(0, int(np.diff(bounds).max()), self.capacity):
+            busy = []
+            for (_, conn, inputs, outputs), lo, hi in zip(self._shards, bounds[:-1], bounds[1:]):
+                rows = order[lo + offset:min(hi, lo + offset + self.capacity)]
+                if not len(rows):
+                    continue
+                for name, column in inputs.items():
+                    column[:len(rows)] = columns[name][rows]
+                conn.send((kind, len(rows)))
+                busy.append((conn, outputs, rows))
+            # Every busy shard is scoring now; collect in shard order.
+            errors = []
+            for conn, outputs, rows in busy:
+                reply = conn.recv()
+                if isinstance(reply, str):
+                    errors.append(reply)
+                elif results is not None:
+                    for name, column in results.items():
+                        column[rows] = outputs[name][:len(rows)]
+            if errors:
+                raise RuntimeError(f"shard failed: {errors[0]}")
+
+    def score(self, columns):
+        """Score INPUTS columns (see ``transaction_columns``); returns OUTPUTS arrays in input order.
+        Raises ValueError, before any state changes, when the batch fails ``validate``."""
+        validate(columns)
+        n = len(columns["account_id"])
+        results = {name: np.empty(n, dtype) for name, dtype in OUTPUTS.items()}
+        if n:
+            if self._local is not None:
+                self._local.score(columns, results)
+            else:
+                self._dispatch("score", columns, results)
+        self.scored += n
+        return results
+
+    def score_frame(self, df):
+        """Score a transactions frame; returns a copy with risk_score, decision and the final signal flags"""
+        results = self.score(transaction_columns(df))
+        out = df.copy()
+        out["risk_score"] = results["risk_score"]
+        out["decision"] = np.asarray(DECISIONS, dtype=object)[results["decision"]]
+        for name in FLAGS:
+            out[name] = results[name]
+        return out
+
+    def record_sim_change(self, accounts, timestamps):
+        """Telco SIM changes, routed to the shards owning ``accounts``"""
+        accounts = np.asarray(accounts, np.int64).ravel()
+        timestamps = np.broadcast_to(np.asarray(timestamps, "datetime64[ns]"), accounts.shape).view(np.int64)
+        columns = {name: np.zeros(len(accounts), dtype) for name, dtype in INPUTS.items()}
+        columns["account_id"], columns["timestamp"] = accounts, timestamps
+        if self._local is not None:
+            self._local.record_sim_change(columns)
+        elif len(accounts):
+            self._dispatch("sim_change", columns)
+
+    def close(self):
+        for process, conn, _, _ in self._shards:
+            conn.send(None)
+        for process, conn, _, _ in self._shards:
+            process.join()
+            conn.close()
+        self._shards = []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--transactions", type=int, default=2000000)
+    parser.add_argument("--batch", type=int, default=1 << 17)
+    parser.add_argument("--accounts", type=int, default=100000)
+    args = parser.parse_args(argv)
+
+    from ulinzi.synthetic import generate_transactions
+
+    frame = generate_transactions(n=args.transactions, n_accounts=args.accounts, seed=0).sort_values("timestamp")
+    columns = transaction_columns(frame)
+    scorer = ShardedScorer(args.workers, profile_capacity=args.accounts)
+    try:
+        started = time.perf_counter()
+        for start in range(0, len(frame), args.batch):
+            scorer.score({name: column[start:start + args.batch] for name, column in columns.items()})
+        elapsed = time.perf_counter() - started
+    finally:
+        scorer.close()
+    print(f"{args.workers} workers: {len(frame):,} transactions in {elapsed:.2f}s ({len(frame) / elapsed:,.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
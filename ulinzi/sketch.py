@@ -0,0 +1,205 @@
+"""Fixed-memory stream summaries: heavy-hitter sources and alert-storm deduplication.
+
+A DDoS sends millions of events from a few thousand addresses, and
+keeping every event or even an exact count per address does not bound
+memory. CountMinSketch keeps ``depth`` rows of ``width`` counters with
+multiply-shift hashing. An estimate never under-counts and over-counts
+by at most ``e * total / width`` with probability ``1 - exp(-depth)``.
+HeavyHitters keeps the ``k`` keys with the largest estimates next to
+the sketch. AlertDeduplicator collapses repeated (type, source) alerts
+within a time bucket into one Alert with a count. Batches are processed
+with vectorized NumPy; only the surviving groups touch Python objects.
+"""
+import ipaddress
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from ulinzi.synthetic import THREAT_LEVELS, THREAT_TYPES
+
+Alert = namedtuple("Alert", "type source level count first_seen last_seen")
+MIN_ALERT_WINDOW = "1s"
+MAX_ALERT_TYPES = 8
+
+
+# --- IPv4 addresses ---
+def ip_codes(values):
+    """uint64 codes of IPv4 addresses given as dotted strings or integers"""
+    values = np.asarray(values)
+    if values.dtype.kind in "iu":
+        return values.astype(np.uint64)
+    octets = pd.Series(values.ravel(), dtype=str).str.split(".", expand=True).to_numpy(np.uint64)
+    return (octets[:, 0] << np.uint64(24)) | (octets[:, 1] << np.uint64(16)) | (octets[:, 2] << np.uint64(8)) | octets[:, 3]
+
+
+def ip_strings(codes):
+    """Dotted IPv4 strings for integer codes"""
+    return [str(ipaddress.IPv4Address(int(code))) for code in np.asarray(codes).ravel()]
+
+
+# --- Sketches ---
+class CountMinSketch:
+    """Approximate counts per integer key in ``depth * width`` counters (width a power of two)"""
+
+    def __init__(self, width=1 << 16, depth=4, seed=0):
+        if width & (width - 1):
+            raise ValueError("width must be a power of two")
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self._shift = np.uint64(64 - width.bit_length() + 1)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 63, depth, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, depth, dtype=np.uint64)
+        self._counts = np.zeros((depth, width), np.int64)
+
+    @property
+    def nbytes(self):
+        return self._counts.nbytes
+
+    @property
+    def error_bound(self):
+        """Over-count an estimate stays within with probability 1 - exp(-depth)"""
+        return int(np.ceil(np.e * self.total / self.width))
+
+    def _columns(self, row, keys):
+        return ((keys * self._a[row] + self._b[row]) >> self._shift).astype(np.intp)
+
+    def add(self, keys, counts=None):
+        """Add ``counts`` (default 1 each) to ``keys`` (uint64 array)"""
+        keys = np.asarray(keys, np.uint64)
+        for row in range(self.depth):
+            self._counts[row] += np.bincount(self._columns(row, keys), counts, minlength=self.width).astype(np.int64)
+        self.total += len(keys) if counts is None else int(np.sum(counts))
+
+    def estimate(self, keys):
+        keys = np.asarray(keys, np.uint64)
+        estimate = self._counts[0, self._columns(0, keys)]
+        for row in range(1, self.depth):
+            estimate = np.minimum(estimate, self._counts[row, self._columns(row, keys)])
+        return estimate
+
+
+class HeavyHitters:
+    """The ``k`` heaviest keys of a stream, counted in a CountMinSketch; safe to share between threads"""
+
+    def __init__(self, k=20, width=1 << 16, depth=4, seed=0):
+        self.k = k
+        self.sketch = CountMinSketch(width, depth, seed)
+        self._keys = np.empty(0, np.uint64)
+        self._counts = np.empty(0, np.int64)
+        self._lock = threading.Lock()
+
+    @property
+    def total(self):
+        return self.sketch.total
+
+    def add(self, keys):
+        """Count one event per key"""
+        keys = np.asarray(keys, np.uint64).ravel()
+        if not len(keys):
+            return
+        with self._lock:
+            self.sketch.add(keys)
+            # Only keys whose estimate reaches the current k-th count can enter the top k.
+            floor = self._counts[-1] if len(self._counts) >= self.k else 0
+            estimates = self.sketch.estimate(keys)
+            candidates = np.union1d(self._keys, keys[estimates >= floor])
+            estimates = self.sketch.estimate(candidates)
+            top = np.argsort(estimates, kind="stable")[::-1][:self.k]
+            self._keys, self._counts = candidates[top], estimates[top]
+
+    def top(self, n=None):
+        """(keys, estimated counts) of the ``n`` heaviest keys, heaviest first"""
+        with self._lock:
+            return self._keys[:n], self._counts[:n]
+
+
+# --- Alert deduplication ---
+class AlertDeduplicator:
+    """Collapse alerts sharing (type, source) within a ``window`` bucket into one Alert with a count.
+
+    Only events at ``min_level`` or above are alerts. At most ``capacity``
+    groups are kept, least recently updated evicted first; ``suppressed``
+    counts the alerts folded into an existing group.
+
+    Groups are keyed by one packed int64: 28 bits of bucket (counted from
+    the first alert's, so a ``window`` of at least MIN_ALERT_WINDOW covers
+    8 years), 3 bits of type and 32 of IPv4 address. That allows at most
+    MAX_ALERT_TYPES ``types``.
+    """
+
+    def __init__(self, window="1min", min_level="high", capacity=1024, levels=THREAT_LEVELS, types=THREAT_TYPES):
+        self.window = pd.Timedelta(window).value
+        if self.window < pd.Timedelta(MIN_ALERT_WINDOW).value:
+            raise ValueError(f"window must be at least {MIN_ALERT_WINDOW}, got {window!r}")
+        self.levels = list(levels)
+        self.types = list(types)
+        if len(self.types) > MAX_ALERT_TYPES:
+            raise ValueError(f"at most {MAX_ALERT_TYPES} alert types fit in a group key, got {len(self.types)}")
+        self.min_level = self.levels.index(min_level)
+        self.capacity = capacity
+        self.alerts = 0
+        self.suppressed = 0
+        self._groups = OrderedDict()  # (bucket, type code, source) -> [count, first ns, last ns, level code]
+        self._origin = None  # bucket of the first alert
+        self._lock = threading.Lock()
+
+    def add(self, frame):
+        """Fold a batch of events (timestamp, threat_level, type and optional source_ip columns)"""
+        level = pd.Categorical(frame["threat_level"], categories=self.levels).codes
+        kind = pd.Categorical(frame["type"], categories=self.types).codes
+        alert = (level >= self.min_level) & (kind >= 0)
+        if not alert.any():
+            return
+        level, kind = level[alert].astype(np.int64), kind[alert].astype(np.int64)
+        ts = pd.to_datetime(frame["timestamp"]).to_numpy("datetime64[ns]").view(np.int64)[alert]
+        source = ip_codes(frame["source_ip"])[alert].astype(np.int64) if "source_ip" in frame \
+            else np.zeros(len(ts), np.int64)
+        bucket = ts // self.window
+        with self._lock:
+            if self._origin is None:
+                self._origin = int(bucket.min())
+            origin = self._origin
+        # Bucket, type and address packed into one sortable int64 key (bucket << 35 | type << 32 | ip).
+        key = ((bucket - origin) << 35) | (kind << 32) | source
+        order = np.argsort(key, kind="stable")
+        key, ts, level = key[order], ts[order], level[order]
+        starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+        counts = np.diff(np.r_[starts, len(key)])
+        first = np.minimum.reduceat(ts, starts)
+        last = np.maximum.reduceat(ts, starts)
+        worst = np.maximum.reduceat(level, starts)
+        group_keys = key[starts]
+        # Fold the lightest groups first so that, if a batch overflows ``capacity``, the heaviest survive.
+        by_count = np.argsort(counts, kind="stable")
+        group_keys, counts, first, last, worst = (values[by_count] for values in (group_keys, counts, first, last, worst))
+        with self._lock:
+            self.alerts += len(key)
+            groups = self._groups
+            for packed, count, lo, hi, code in zip(group_keys.tolist(), counts.tolist(), first.tolist(),
+                                                   last.tolist(), worst.tolist()):
+                group = groups.get(packed)
+                if group is None:
+                    groups[packed] = [count, lo, hi, code]
+                    self.suppressed += count - 1
+                    if len(groups) > self.capacity:
+                        groups.popitem(last=False)
+                    continue
+                group[0] += count
+                group[1], group[2], group[3] = min(group[1], lo), max(group[2], hi), max(group[3], code)
+                groups.move_to_end(packed)
+                self.suppressed += count
+
+    def recent(self, limit=10):
+        """Collapsed alerts of the newest buckets first, largest count first within a bucket"""
+        with self._lock:
+            groups = sorted(self._groups.items(), key=lambda item: (item[0] >> 35, item[1][0]), reverse=True)[:limit]
+        alerts = []
+        for packed, (count, first, last, code) in groups:
+            source = packed & 0xFFFFFFFF
+            alerts.append(Alert(self.types[(packed >> 32) & 0x7], ip_strings([source])[0] if source else None,
+                                self.levels[code], count, pd.Timestamp(first), pd.Timestamp(last)))
+        return alerts
@@ -0,0 +1,143 @@
+"""Multi-resolution grid aggregation of threat events for the National Threat Map.
+
+Cells follow the web-map tile pyramid: at zoom ``z`` a cell spans
+360 / (2**z * CELLS_PER_TILE) degrees, so each zoom's cells nest 2x2 inside
+the next coarser one and a viewport always covers roughly the same number
+of cells. Counts are kept per (cell, threat level, type) for every zoom and
+merged incrementally as batches of events arrive.
+"""
+import numpy as np
+import pandas as pd
+
+CELLS_PER_TILE = 8
+METERS_PER_DEGREE = 111320.0
+# RGBA per threat level, in severity order.
+LEVEL_COLORS = np.array([
+    [0, 255, 0, 160],
+    [255, 165, 0, 160],
+    [255, 69, 0, 160],
+    [255, 0, 0, 160],
+], dtype=np.uint8)
+# Neutral RGBA for events whose level is not in the vocabulary (code -1).
+UNKNOWN_COLOR = np.array([128, 128, 128, 160], dtype=np.uint8)
+
+
+def level_colors(codes):
+    """RGBA per threat level code; unknown levels (-1) are neutral grey, never the worst level's red"""
+    return np.vstack([LEVEL_COLORS, UNKNOWN_COLOR])[np.where(codes < 0, len(LEVEL_COLORS), codes)]
+
+
+def cell_size(zoom):
+    """Cell edge in degrees at a map zoom level"""
+    return 360.0 / (2 ** zoom * CELLS_PER_TILE)
+
+
+class ThreatGrid:
+    """Per-zoom (cell, level, type) counts, updated incrementally with ``add``"""
+
+    def __init__(self, levels, types, min_zoom=4, max_zoom=12):
+        self.levels = list(levels)
+        self.types = list(types)
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.total = 0
+        # zoom -> (sorted int64 keys, int64 counts)
+        self._cells = {z: (np.empty(0, np.int64), np.empty(0, np.int64))
+                       for z in range(min_zoom, max_zoom + 1)}
+
+    def _width(self, zoom):
+        return int(round(360.0 / cell_size(zoom)))
+
+    def _keys(self, zoom, lat, lon, level, kind):
+        size = cell_size(zoom)
+        ix = np.floor((lon + 180.0) / size).astype(np.int64)
+        iy = np.floor((lat + 90.0) / size).astype(np.int64)
+        cell = iy * self._width(zoom) + ix
+        return (cell * len(self.levels) + level) * len(self.types) + kind
+
+    @staticmethod
+    def _codes(values, vocabulary):
+        if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+            if list(values.cat.categories) == vocabulary:
+                return values.cat.codes.to_numpy(np.int64)
+        return pd.Categorical(values, categories=vocabulary).codes.astype(np.int64)
+
+    def add(self, frame):
+        """Fold a batch of events (lat, lon, threat_level, type columns) into every zoom"""
+        self._fold(frame, 1)
+
+    def remove(self, frame):
+        """Take back events previously added (e.g. evicted from a bounded table)"""
+        self._fold(frame, -1)
+
+    def _fold(self, frame, sign):
+        if not len(frame):
+            return
+        lat = frame["lat"].to_numpy(float)
+        lon = frame["lon"].to_numpy(float)
+        level = self._codes(frame["threat_level"], self.levels)
+        kind = self._codes(frame["type"], self.types)
+        valid = (level >= 0) & (kind >= 0)
+        lat, lon, level, kind = lat[valid], lon[valid], level[valid], kind[valid]
+        for zoom, (keys, counts) in self._cells.items():
+            new_keys, new_counts = np.unique(self._keys(zoom, lat, lon, level, kind), return_counts=True)
+            # Bump cells that already exist in place, then splice in the new ones in sorted order.
+            pos = np.searchsorted(keys, new_keys)
+            found = pos < len(keys)
+            found[found] = keys[pos[found]] == new_keys[found]
+            counts[pos[found]] += sign * new_counts[found]
+            missing = ~found
+            if sign < 0:
+                # Removed events were added before, so every key exists; drop cells that emptied.
+                live = counts > 0
+                self._cells[zoom] = (keys[live], counts[live])
+                continue
+            self._cells[zoom] = (np.insert(keys, pos[missing], new_keys[missing]),
+                                 np.insert(counts, pos[missing], new_counts[missing]))
+        self.total += sign * int(valid.sum())
+
+    def zoom_for(self, zoom):
+        """Nearest precomputed aggregation level for a map zoom"""
+        return int(min(max(round(zoom), self.min_zoom), self.max_zoom))
+
+    def view(self, zoom, levels=None, types=None, bbox=None):
+        """One row per occupied cell at ``zoom``: centre, counts, worst level and dominant type.
+
+        ``levels`` / ``types`` restrict the counted events; ``bbox`` is
+        (min_lat, min_lon, max_lat, max_lon).
+        """
+        zoom = self.zoom_for(zoom)
+        keys, counts = self._cells[zoom]
+        n_levels, n_types = len(self.levels), len(self.types)
+        kind = keys % n_types
+        level = (keys // n_types) % n_levels
+        cell = keys // (n_types * n_levels)
+        keep = np.ones(len(keys), bool)
+        if levels is not None:
+            keep &= np.isin(level, [self.levels.index(name) for name in levels])
+        if types is not None:
+            keep &= np.isin(kind, [self.types.index(name) for name in types])
+        size = cell_size(zoom)
+        width = self._width(zoom)
+        if bbox is not None:
+            lat = (cell // width + 0.5) * size - 90.0
+            lon = (cell % width + 0.5) * size - 180.0
+            keep &= (lat >= bbox[0]) & (lon >= bbox[1]) & (lat <= bbox[2]) & (lon <= bbox[3])
+        kind, level, cell, counts = kind[keep], level[keep], cell[keep], counts[keep]
+
+        cells, index = np.unique(cell, return_inverse=True)
+        total = np.bincount(index, counts, minlength=len(cells)).astype(np.int64)
+        worst = np.full(len(cells), -1, np.int64)
+        np.maximum.at(worst, index, level)
+        by_type = np.bincount(index * n_types + kind, counts, minlength=len(cells) * n_types)
+        dominant = by_type.reshape(len(cells), n_types).argmax(axis=1)
+        peak = total.max() if len(total) else 1
+        return pd.DataFrame({
+            "lat": (cells // width + 0.5) * size - 90.0,
+            "lon": (cells % width + 0.5) * size - 180.0,
+            "count": total,
+            "threat_level": pd.Categorical.from_codes(worst, categories=self.levels),
+            "type": pd.Categorical.from_codes(dominant, categories=self.types),
+            "color": level_colors(worst).tolist(),
+            "radius": size * METERS_PER_DEGREE * (0.2 + 0.3 * np.sqrt(total / peak)),
+        })
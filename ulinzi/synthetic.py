@@ -0,0 +1,290 @@
+"""Seeded, vectorized synthetic threat and transaction generator for load testing"""
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from ulinzi.risk import LOCATION_PATTERNS, decide, score_transactions
+
+# --- Vocabularies ---
+THREAT_LEVELS = ("low", "medium", "high", "critical")
+THREAT_TYPES = ("SIM Swap", "DDoS", "Phishing", "Defacement", "Data Exfiltration")
+TRANSACTION_TYPES = ("Transfer", "Withdrawal", "Deposit", "Payment")
+TRANSACTION_STATUSES = ("APPROVED", "FLAGGED", "BLOCKED")
+
+NAIROBI = (-1.2921, 36.8219)
+# Named hotspots for the ``geography`` option: (lat, lon, weight).
+KENYA_HOTSPOTS = {
+    "Nairobi": (-1.2921, 36.8219, 0.45),
+    "Mombasa": (-4.0435, 39.6682, 0.2),
+    "Kisumu": (-0.0917, 34.7680, 0.12),
+    "Nakuru": (-0.3031, 36.0800, 0.12),
+    "Eldoret": (0.5143, 35.2698, 0.11),
+}
+# Attack sources are drawn from these /8 networks (African allocations); 102.44.213.45 is the
+# heaviest source, as in the Sovereign Sentinel demo.
+SOURCE_NETWORKS = (41, 102, 105, 154, 196, 197)
+DEMO_ATTACKER = (102 << 24) | (44 << 16) | (213 << 8) | 45
+# Most customers transact from home; the rest follow the simulator's patterns.
+DEFAULT_PATTERN_WEIGHTS = (0.7, 0.15, 0.07, 0.05, 0.03)
+
+
+def _weights(weights, n):
+    if weights is None:
+        return None
+    if isinstance(weights, dict):
+        raise TypeError("weights must be a sequence in vocabulary order")
+    weights = np.asarray(weights, dtype=float)
+    if weights.shape != (n,):
+        raise ValueError(f"expected {n} weights, got {weights.shape[0]}")
+    return weights / weights.sum()
+
+
+def _categorical(rng, vocabulary, size, weights=None):
+    codes = rng.choice(len(vocabulary), size=size, p=_weights(weights, len(vocabulary))).astype(np.int8)
+    return pd.Categorical.from_codes(codes, categories=list(vocabulary))
+
+
+def _event_count(rng, n, rate, span):
+    if n is not None:
+        return int(n)
+    if rate is None:
+        raise ValueError("pass either n or rate")
+    return int(rng.poisson(rate * pd.Timedelta(span).total_seconds()))
+
+
+def _timestamps(rng, size, span, end):
+    end = np.datetime64(end or datetime.now(), "ns")
+    span_ns = pd.Timedelta(span).value
+    offsets = rng.integers(0, span_ns, size=size, endpoint=True)
+    offsets[::-1].sort()
+    return end - offsets.astype("timedelta64[ns]")
+
+
+def _positions(rng, size, geography, spread):
+    if geography is None:
+        geography = {"Nairobi": NAIROBI + (1.0,)}
+    elif isinstance(geography, (list, tuple)):
+        geography = {name: KENYA_HOTSPOTS[name] for name in geography}
+    names = list(geography)
+    centers = np.array([geography[name][:2] for name in names], dtype=float)
+    weights = np.array([geography[name][2] if len(geography[name]) > 2 else 1.0 for name in names])
+    which = rng.choice(len(names), size=size, p=weights / weights.sum())
+    jitter = rng.uniform(-spread, spread, size=(size, 2))
+    return centers[which] + jitter
+
+
+def _sources(rng, size, n_sources, skew):
+    pool = rng.choice(SOURCE_NETWORKS, n_sources).astype(np.uint32) << np.uint32(24)
+    pool |= rng.integers(0, 1 << 24, n_sources, dtype=np.uint32)
+    pool[0] = DEMO_ATTACKER
+    # Zipf-like popularity: the source of rank r sends a share proportional to 1 / r**skew.
+    weights = 1.0 / np.arange(1, n_sources + 1) ** skew
+    return pool[rng.choice(n_sources, size=size, p=weights / weights.sum())]
+
+
+def generate_threats(n=None, rate=None, span="2h", end=None, geography=None, spread=0.5,
+                     level_weights=None, type_weights=None, n_sources=5000, source_skew=1.1, seed=None):
+    """Generate typed threat events as a DataFrame sorted by timestamp.
+
+    Size is ``n`` events, or a Poisson draw at ``rate`` events/second over
+    ``span``. ``geography`` is None (box around Nairobi, as in the demo), a
+    list of KENYA_HOTSPOTS names, or a {name: (lat, lon, weight)} mapping.
+    Level and type weights follow THREAT_LEVELS / THREAT_TYPES order.
+    ``source_ip`` is a uint32 IPv4 address from ``n_sources`` attackers
+    whose volumes fall off with rank at ``source_skew``.
+    """
+    rng = np.random.default_rng(seed)
+    size = _event_count(rng, n, rate, span)
+    position = _positions(rng, size, geography, spread)
+    return pd.DataFrame({
+        "lat": position[:, 0],
+        "lon": position[:, 1],
+        "threat_level": _categorical(rng, THREAT_LEVELS, size, level_weights),
+        "type": _categorical(rng, THREAT_TYPES, size, type_weights),
+        "timestamp": _timestamps(rng, size, span, end),
+        "source_ip": _sources(rng, size, n_sources, source_skew),
+    })
+
+
+def generate_transactions(n=None, rate=None, span="24h", end=None, n_accounts=100000,
+                          amount_range=(1000, 500000), pattern_weights=DEFAULT_PATTERN_WEIGHTS,
+                          type_weights=None, anomaly_rate=0.05, sim_swap_rate=0.005, seed=None):
+    """Generate typed transactions, scored with the Financial Sentinel rules.
+
+    Amounts are int64 KES, timestamps datetime64[ns]; ``location`` uses the
+    risk engine's LOCATION_PATTERNS so every row carries a real risk score.
+    """
+    rng = np.random.default_rng(seed)
+    size = _event_count(rng, n, rate, span)
+    timestamp = _timestamps(rng, size, span, end)
+    amount = rng.integers(amount_range[0], amount_range[1], size=size, endpoint=True, dtype=np.int64)
+    location = _categorical(rng, LOCATION_PATTERNS, size, pattern_weights)
+    behavioral_anomaly = rng.random(size) < anomaly_rate
+    sim_swap = rng.random(size) < sim_swap_rate
+    hour = ((timestamp - timestamp.astype("datetime64[D]")) // np.timedelta64(1, "h")).astype(np.int8)
+    risk = score_transactions(amount, hour, location.codes, behavioral_anomaly, sim_swap)
+    return pd.DataFrame({
+        "timestamp": timestamp,
+        "account_id": rng.integers(0, n_accounts, size=size, dtype=np.int64),
+        "amount": amount,
+        "hour": hour,
+        "location": location,
+        "type": _categorical(rng, TRANSACTION_TYPES, size, type_weights),
+        "behavioral_anomaly": behavioral_anomaly,
+        "sim_swap": sim_swap,
+        "risk_score": risk,
+        "status": pd.Categorical.from_codes(decide(risk), categories=list(TRANSACTION_STATUSES)),
+    })
+
+
+def generate_transfers(n=1000000, n_accounts=100000, span="7d", end=None, n_funnels=10,
+                       fan_in=(8, 25), chain_hops=(2, 4), seed=None):
+    """Account-to-account transfers with planted money-mule funnels.
+
+    Background traffic is random lognormal payments between ``n_accounts``
+    accounts. Each funnel collects from ``fan_in`` distinct victims within
+    minutes, then forwards ~95% of it down a chain of ``chain_hops`` mule
+    accounts (ids from ``n_accounts`` upwards). Returns (transfers frame,
+    funnel account ids).
+    """
+    rng = np.random.default_rng(seed)
+    end = np.datetime64(end or datetime.now(), "ns")
+    span_ns = pd.Timedelta(span).value
+    minute = np.timedelta64(60, "s").astype("timedelta64[ns]")
+    src = [rng.integers(0, n_accounts, n)]
+    dst = [rng.integers(0, n_accounts, n)]
+    amount = [np.round(rng.lognormal(8.5, 1.0, n)).astype(np.int64)]
+    ts = [end - rng.integers(0, span_ns, n).astype("timedelta64[ns]")]
+    funnels = []
+    next_mule = n_accounts
+    for _ in range(n_funnels):
+        senders = int(rng.integers(fan_in[0], fan_in[1] + 1))
+        hops = int(rng.integers(chain_hops[0], chain_hops[1] + 1))
+        chain = np.arange(next_mule, next_mule + hops + 1)
+        next_mule += hops + 1
+        funnels.append(int(chain[0]))
+        start = end - rng.integers(span_ns // 10, span_ns).astype("timedelta64[ns]")
+        deposits = rng.integers(5000, 150000, senders)
+        src.append(rng.choice(n_accounts, senders, replace=False))
+        dst.append(np.full(senders, chain[0]))
+        amount.append(deposits)
+        ts.append(start + rng.integers(0, 10, senders) * minute)
+        carried, when = int(deposits.sum()), start + 12 * minute
+        for a, b in zip(chain[:-1], chain[1:]):
+            carried = int(carried * rng.uniform(0.93, 0.99))
+            when = when + int(rng.integers(2, 9)) * minute
+            src.append([a])
+            dst.append([b])
+            amount.append([carried])
+            ts.append([when])
+    frame = pd.DataFrame({
+        "src": np.concatenate(src).astype(np.int64),
+        "dst": np.concatenate(dst).astype(np.int64),
+        "amount": np.concatenate(amount).astype(np.int64),
+        "timestamp": np.concatenate(ts).astype("datetime64[ns]"),
+    })
+    return frame.sort_values("timestamp", ignore_index=True), funnels
+
+
+def generate_campaigns(n_campaigns=20, n_noise=10000, n_accounts=100000, span="2h", end=None,
+                       stage_gap="5min", seed=None):
+    """Security events (timestamp, account_id, kind, severity) with planted attack campaigns.
+
+    Each campaign walks one account through phishing, SIM swap, data
+    exfiltration, a flagged or blocked transfer and a pass-through hop,
+    stopping early at random (at least two steps); stages are spaced by
+    exponential gaps averaging ``stage_gap``. ``n_noise`` unrelated events
+    of the same kinds are scattered over ``n_accounts`` accounts.
+    """
+    rng = np.random.default_rng(seed)
+    end = np.datetime64(end or datetime.now(), "ns")
+    span_ns = pd.Timedelta(span).value
+    kinds = np.array(["Phishing", "SIM Swap", "Data Exfiltration", "FLAGGED", "Pass-through", "BLOCKED"])
+    steps = rng.integers(2, 6, n_campaigns)
+    total = int(steps.sum())
+    campaign = np.repeat(np.arange(n_campaigns), steps)
+    stage = np.arange(total) - np.repeat(np.cumsum(steps) - steps, steps)
+    gaps = rng.exponential(pd.Timedelta(stage_gap).value, total).astype(np.int64)
+    gaps[stage == 0] = 0
+    elapsed = np.cumsum(gaps)
+    elapsed -= np.repeat(elapsed[np.cumsum(steps) - steps], steps)
+    # Campaigns start in the older half of the span and are clipped at ``end``.
+    ago = np.maximum(rng.integers(span_ns // 2, span_ns, n_campaigns)[campaign] - elapsed, 0)
+    campaign_kind = kinds[stage]
+    campaign_kind[(stage == 3) & (rng.random(total) < 0.5)] = "BLOCKED"
+    campaign_accounts = rng.choice(n_accounts, n_campaigns, replace=False)
+    noise_ts = rng.integers(0, span_ns, n_noise)
+    frame = pd.DataFrame({
+        "timestamp": end - np.concatenate([ago, noise_ts]).astype("timedelta64[ns]"),
+        "account_id": np.concatenate([campaign_accounts[campaign], rng.integers(0, n_accounts, n_noise)]).astype(np.int64),
+        "kind": np.concatenate([campaign_kind, kinds[rng.integers(0, len(kinds), n_noise)]]),
+        "severity": np.concatenate([rng.uniform(0.7, 0.98, total), rng.uniform(0.2, 0.8, n_noise)]),
+    })
+    return frame.sort_values("timestamp", ignore_index=True)
+
+
+def generate_blocklists(n=200000, n_v6=2000, seed=None):
+    """National and vendor CIDR blocklists ({list name: CIDR strings}) for the Sovereign Sentinel.
+
+    Three quarters of the ``n`` IPv4 ranges go to the national list, mostly
+    /24s with a tail of /16 to /32, and the rest to the vendor list. Both
+    lean towards SOURCE_NETWORKS, the national list covers the demo
+    attacker's /24, and ``n_v6`` IPv6 /48s are split the same way.
+    """
+    rng = np.random.default_rng(seed)
+    prefix = rng.choice([16, 20, 22, 24, 28, 32], size=n, p=[0.001, 0.01, 0.04, 0.6, 0.15, 0.199])
+    network = np.where(rng.random(n) < 0.05, rng.choice(SOURCE_NETWORKS, n), rng.integers(1, 224, n)).astype(np.uint64)
+    address = (network << np.uint64(24)) | rng.integers(0, 1 << 24, n, dtype=np.uint64)
+    address &= ~((np.uint64(1) << (32 - prefix).astype(np.uint64)) - np.uint64(1))
+    octets = [pd.Series((address >> np.uint64(shift)) & np.uint64(255)).astype(str) for shift in (24, 16, 8, 0)]
+    cidrs = (octets[0] + "." + octets[1] + "." + octets[2] + "." + octets[3] + "/" + pd.Series(prefix).astype(str)).tolist()
+    v6 = [f"2c0f:{int(a):x}:{int(b):x}::/48" for a, b in zip(rng.integers(0xf000, 0x10000, n_v6), rng.integers(0, 1 << 16, n_v6))]
+    split, split_v6 = n * 3 // 4, n_v6 * 3 // 4
+    demo = f"{DEMO_ATTACKER >> 24}.{DEMO_ATTACKER >> 16 & 255}.{DEMO_ATTACKER >> 8 & 255}.0/24"
+    return {"national": [demo] + cidrs[:split] + v6[:split_v6], "vendor": cidrs[split:] + v6[split_v6:]}
+
+
+# --- Timed feeds ---
+def replay(frame, rate=None, speedup=1.0, batch_interval=0.1, time_col="timestamp",
+           clock=time.monotonic, sleep=time.sleep):
+    """Yield consecutive slices of ``frame`` paced in wall-clock time.
+
+    With ``rate`` set, rows are released at that many events/second;
+    otherwise the gaps between ``time_col`` values are replayed, compressed
+    by ``speedup``.
+    """
+    if rate is not None:
+        due = np.arange(len(frame)) / float(rate)
+    else:
+        ts = frame[time_col].to_numpy()
+        due = (ts - ts[:1]) / np.timedelta64(1, "s") / speedup
+    start = clock()
+    pos = 0
+    while pos < len(frame):
+        sleep(batch_interval)
+        stop = int(np.searchsorted(due, clock() - start, side="right"))
+        if stop > pos:
+            yield frame.iloc[pos:stop]
+            pos = stop
+
+
+def live_feed(kind="threats", rate=1000.0, batch_interval=0.1, seed=None,
+              clock=time.monotonic, sleep=time.sleep, **options):
+    """Endless feed of fresh events at ``rate`` events/second, stamped with the current time.
+
+    ``kind`` is "threats" or "transactions"; extra options are passed to
+    the matching generator.
+    """
+    generate = {"threats": generate_threats, "transactions": generate_transactions}[kind]
+    rng = np.random.default_rng(seed)
+    last = clock()
+    while True:
+        sleep(batch_interval)
+        now = clock()
+        elapsed = now - last
+        last = now
+        size = int(rng.poisson(rate * elapsed))
+        if size:
+            yield generate(n=size, span=pd.Timedelta(seconds=elapsed), seed=rng, **options)
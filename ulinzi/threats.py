@@ -0,0 +1,138 @@
+"""Versioned, columnar threat table with memoized dashboard views"""
+import functools
+import threading
+
+import numpy as np
+import pandas as pd
+
+from ulinzi.spatial import ThreatGrid, level_colors
+from ulinzi.synthetic import THREAT_LEVELS, THREAT_TYPES
+
+# Below this many events the map shows individual points instead of grid cells.
+RAW_POINT_LIMIT = 2000
+RAW_POINT_RADIUS = 20000
+# Events a ThreatTable keeps by default (about 26 MB of columns); older ones are evicted.
+THREAT_CAPACITY = 1 << 20
+
+
+def _memoized(method):
+    """Cache a view until the next ``append`` bumps the table version"""
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        key = (method.__name__,) + args
+        views = self._views
+        if key not in views:
+            views[key] = method(self, *args)
+        return views[key]
+    return wrapper
+
+
+class ThreatTable:
+    """The most recent ``capacity`` threat events, with categorical level/type columns.
+
+    Events are kept in arrival order; an ``append`` that takes the table
+    past ``capacity`` evicts the oldest, from the rows and the map grid
+    alike. Every ``append`` bumps ``version`` and drops the memoized views,
+    so reruns triggered by unrelated widgets reuse counts, alerts and map
+    payloads without touching the rows.
+    """
+
+    def __init__(self, levels=THREAT_LEVELS, types=THREAT_TYPES, capacity=THREAT_CAPACITY):
+        self.levels = list(levels)
+        self.types = list(types)
+        self.capacity = capacity
+        self.grid = ThreatGrid(self.levels, self.types)
+        self.version = 0
+        self.evicted = 0
+        self._rows = 0
+        self._chunks = []
+        self._views = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.grid.total
+
+    def _typed(self, batch):
+        return pd.DataFrame({
+            "lat": batch["lat"].to_numpy(float),
+            "lon": batch["lon"].to_numpy(float),
+            "threat_level": pd.Categorical(batch["threat_level"], categories=self.levels),
+            "type": pd.Categorical(batch["type"], categories=self.types),
+            "timestamp": pd.to_datetime(batch["timestamp"]).to_numpy(),
+        })
+
+    def append(self, batch):
+        """Add a batch of events (DataFrame or list of dicts); returns the new version"""
+        batch = self._typed(pd.DataFrame(batch))
+        with self._lock:
+            if len(batch) > self.capacity:
+                self.evicted += len(batch) - self.capacity
+                batch = batch.tail(self.capacity).reset_index(drop=True)
+            self._chunks.append(batch)
+            self._rows += len(batch)
+            self.grid.add(batch)
+            self._evict()
+            self.version += 1
+            self._views = {}
+        return self.version
+
+    def _evict(self):
+        """Drop the oldest rows beyond ``capacity`` (caller holds the lock)"""
+        while self._rows > self.capacity:
+            oldest = self._chunks[0]
+            excess = self._rows - self.capacity
+            if excess >= len(oldest):
+                self._chunks.pop(0)
+            else:
+                self._chunks[0] = oldest.iloc[excess:].reset_index(drop=True)
+                oldest = oldest.iloc[:excess]
+            self.grid.remove(oldest)
+            self._rows -= len(oldest)
+            self.evicted += len(oldest)
+
+    @_memoized
+    def frame(self):
+        """All events as one DataFrame (concatenated once per version)"""
+        if not self._chunks:
+            return self._typed(pd.DataFrame(columns=["lat", "lon", "threat_level", "type", "timestamp"]))
+        with self._lock:
+            if len(self._chunks) > 1:
+                self._chunks = [pd.concat(self._chunks, ignore_index=True)]
+            return self._chunks[0]
+
+    @_memoized
+    def colors(self):
+        """uint8 RGBA per event, looked up from the level codes (grey for an unknown level)"""
+        return level_colors(self.frame()["threat_level"].cat.codes.to_numpy())
+
+    @_memoized
+    def level_counts(self):
+        """Events per threat level, omitting levels with no events"""
+        counts = np.bincount(self.frame()["threat_level"].cat.codes.to_numpy() + 1,
+                             minlength=len(self.levels) + 1)[1:]
+        series = pd.Series(counts, index=pd.Index(self.levels, name="threat_level"), name="count")
+        return series[series > 0]
+
+    @_memoized
+    def critical_alerts(self, limit=3):
+        """Types of the most recent critical events, newest first"""
+        frame = self.frame()
+        critical = np.flatnonzero(frame["threat_level"].cat.codes.to_numpy() == self.levels.index("critical"))
+        latest = critical[np.argsort(frame["timestamp"].to_numpy()[critical], kind="stable")[::-1][:limit]]
+        return frame["type"].to_numpy()[latest].astype(str).tolist()
+
+    @_memoized
+    def map_payload(self, zoom):
+        """Rows for the map layer: raw points for small tables, grid cells otherwise"""
+        if len(self) > RAW_POINT_LIMIT:
+            return self.grid.view(zoom)
+        frame = self.frame()
+        return pd.DataFrame({
+            "lat": frame["lat"],
+            "lon": frame["lon"],
+            "count": 1,
+            "threat_level": frame["threat_level"],
+            "type": frame["type"],
+            "color": self.colors().tolist(),
+            "radius": RAW_POINT_RADIUS,
+        })
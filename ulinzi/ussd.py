@@ -0,0 +1,527 @@
+"""Asyncio USSD (*334#) session gateway with covert duress-PIN handling.
+
+The telco aggregator POSTs every keypress of a USSD session to ``/ussd``
+as a form: sessionId, phoneNumber, serviceCode and text, which holds the
+session's inputs so far joined by "*". The reply is the next screen,
+prefixed "CON" while the session continues and "END" once it is over.
+
+Each session is a small ``__slots__`` object stepping through
+MENU -> AMOUNT -> PIN -> CONFIRM. It is bound to the phoneNumber that
+dialled it and counts the inputs it has consumed, so a telco retry of a
+keypress it already handled gets the same screen back instead of
+advancing the session; the final screen of a session that has ended is
+kept for ``timeout`` seconds so a retry of its last keypress gets that
+screen too. Wrong PINs are counted per phone, not per session:
+MAX_PIN_ATTEMPTS of them lock that phone out of PIN entry for
+``lockout`` seconds, though the duress PIN is still honoured. Sessions
+sit in an OrderedDict ordered by their last keypress, so expiry pops
+idle ones off the front without scanning the live ones, and tens of
+thousands fit in a few MB of one process. A confirmed withdrawal is scored by a ScoringService on the same
+event loop, so concurrent sessions share its micro-batches. On the
+handset the duress PIN behaves exactly like the normal one; behind it
+``on_duress`` fires the Code Red flow at the moment the PIN is entered.
+
+    python -m ulinzi.ussd --port 8734
+    python -m ulinzi.ussd --simulate --sessions 20000
+
+``simulate`` replays telco traffic: subscribers type with think time,
+mistype PINs, cancel, abandon sessions and occasionally enter the duress
+PIN. The traffic runs over a pool of keep-alive connections, and the
+report gives sessions per second and per-step latency.
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import logging
+import random
+import threading
+import time
+import urllib.parse
+from collections import Counter, OrderedDict, namedtuple
+
+from ulinzi.metrics import Registry
+from ulinzi.risk import LOCATION_PATTERNS
+from ulinzi.scoring import MAX_BODY, Overloaded, ScoringService
+
+SERVICE_CODE = "*334#"
+# Demo credentials, as shown on the Duress Protocol screen.
+NORMAL_PIN, DURESS_PIN = "1234", "9999"
+PIN_OK, PIN_DURESS, PIN_WRONG = "ok", "duress", "wrong"
+MAX_PIN_ATTEMPTS = 3
+LOCKOUT_S = 900.0
+AMOUNT_RANGE = (1000, 500000)
+
+MENU, AMOUNT, PIN, CONFIRM = range(4)
+STEPS = ("menu", "amount", "pin", "confirm")
+
+SCREENS = {
+    "menu": "CON Ulinzi Bank\n1. Withdraw cash\n2. Check balance",
+    "amount": "CON Enter amount (KES):",
+    "pin": "CON Enter PIN:",
+    "retry_pin": "CON Wrong PIN. {left} attempts left.\nEnter PIN:",
+    "confirm": "CON Withdraw KES {amount:,}?\n1. Confirm\n2. Cancel",
+    "approved": "END KES {amount:,} withdrawal approved. Collect your cash from the agent.",
+    "challenged": "END KES {amount:,} withdrawal pending. Confirm it in the SMS we have sent you.",
+    "declined": "END Transaction declined. Call 0800 720 000 for help.",
+    "balance": "END Your balance will be sent to you by SMS.",
+    "cancelled": "END Transaction cancelled.",
+    "locked": "END Too many wrong PINs. Try again in {minutes} minutes.",
+    "invalid": "END Invalid input. Dial *334# to try again.",
+    "bad_amount": f"END Enter an amount between KES {AMOUNT_RANGE[0]:,} and {AMOUNT_RANGE[1]:,}.",
+    "expired": "END Session expired. Dial *334# to start again.",
+    "busy": "END Service busy. Please try again shortly.",
+}
+_OUTCOMES = {"APPROVE": "approved", "CHALLENGE": "challenged", "BLOCK": "declined"}
+_log = logging.getLogger(__name__)
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+def classify_pin(pin, normal=NORMAL_PIN, duress=DURESS_PIN):
+    """PIN_OK, PIN_DURESS or PIN_WRONG, compared in constant time"""
+    pin = str(pin).encode()
+    if hmac.compare_digest(pin, duress.encode()):
+        return PIN_DURESS
+    if hmac.compare_digest(pin, normal.encode()):
+        return PIN_OK
+    return PIN_WRONG
+
+
+class _Session:
+    __slots__ = ("phone", "state", "amount", "consumed", "screen", "duress", "touched")
+
+    def __init__(self, phone, now):
+        self.phone = phone
+        self.state = MENU
+        self.amount = 0
+        self.consumed = 0  # inputs of the cumulative text already handled
+        self.screen = SCREENS["menu"]
+        self.duress = False
+        self.touched = now
+
+
+class UssdGateway:
+    """USSD session engine for one event loop, with an HTTP front end for the telco aggregator.
+
+    ``scoring`` (a ScoringService, by default a fresh one) decides confirmed
+    withdrawals. ``pins(phone)`` gives the (normal, duress) PINs of a
+    subscriber. ``on_duress(phone, amount, origin)`` is called on the
+    event loop as the duress PIN is entered, with ``origin`` the
+    perf_counter() reading of that keypress; a coroutine it returns is
+    scheduled, and its value is kept in ``signals`` by session id.
+    An exception from ``on_duress`` is logged; the handset still gets the
+    normal confirm screen. Sessions idle for ``timeout`` seconds expire;
+    the final screens of the last ``ended`` sessions are kept as long.
+    """
+
+    def __init__(self, timeout=20.0, scoring=None, pins=None, on_duress=None, registry=None, history=1024,
+                 lockout=LOCKOUT_S, ended=8192):
+        self.timeout = timeout
+        self.lockout = lockout
+        self.scoring = scoring or ScoringService()
+        self.pins = pins or (lambda phone: (NORMAL_PIN, DURESS_PIN))
+        self.on_duress = on_duress
+        self.registry = registry or Registry()
+        self.history = history
+        self.max_ended = ended
+        self.sessions = OrderedDict()  # session id -> _Session, least recently active first
+        self.ended = OrderedDict()     # session id -> (phone, final screen, time it ended), oldest first
+        self.signals = OrderedDict()   # session id -> on_duress result, the last ``history``
+        self.failures = OrderedDict()  # phone -> (wrong PINs, time of the last one), oldest first
+        self.outcomes = Counter()
+        self.started = 0
+        self.requests = 0
+        self.peak = 0
+        self.loop = None
+        self._sweeper = None
+
+    # --- Sessions ---
+    async def respond(self, session_id, phone, text):
+        """Screen for the latest keypress of a session ("CON ..." continues it, "END ..." ends it)"""
+        started = time.perf_counter_ns()
+        if self._sweeper is None:
+            self._sweeper = asyncio.ensure_future(self._sweep())
+        self.requests += 1
+        session = self.sessions.get(session_id)
+        entries = text.split("*") if text else []
+        if session is None:
+            step = "dial"
+            ended = self.ended.get(session_id) if entries else None
+            if ended is not None and ended[0] == phone:
+                self.outcomes["repeated"] += 1  # a retry of the keypress that ended the session
+                screen = ended[1]
+            elif ended is not None:
+                self.outcomes["wrong_phone"] += 1
+                screen = SCREENS["invalid"]
+            elif entries:
+                screen = self._end("expired")
+            else:
+                session = self.sessions[session_id] = _Session(phone, time.monotonic())
+                self.started += 1
+                self.peak = max(self.peak, len(self.sessions))
+                screen = session.screen
+        elif session.phone != phone:
+            # Another handset cannot drive (or end) someone else's session.
+            step = "dial"
+            self.outcomes["wrong_phone"] += 1
+            screen = SCREENS["invalid"]
+        else:
+            step = STEPS[session.state]
+            session.touched = time.monotonic()
+            self.sessions.move_to_end(session_id)
+            if len(entries) <= session.consumed:
+                self.outcomes["repeated"] += 1  # a retried or stale keypress; resend its screen
+            for entry in entries[session.consumed:]:
+                session.consumed += 1
+                session.screen = await self._advance(session_id, session, entry.strip(), started)
+                if session.screen.startswith("END"):
+                    self.sessions.pop(session_id, None)
+                    self.ended[session_id] = (phone, session.screen, session.touched)
+                    if len(self.ended) > self.max_ended:
+                        self.ended.popitem(last=False)
+                    break
+            screen = session.screen
+        self.registry.histogram(f"ussd_{step}", f"USSD {step} step inside the gateway").record(
+            time.perf_counter_ns() - started)
+        return screen
+
+    def _end(self, outcome, **fields):
+        self.outcomes[outcome] += 1
+        return SCREENS[outcome].format(**fields)
+
+    async def _advance(self, session_id, session, entry, started):
+        if session.state == MENU:
+            if entry == "1":
+                session.state = AMOUNT
+                return SCREENS["amount"]
+            return self._end("balance" if entry == "2" else "invalid")
+
+        if session.state == AMOUNT:
+            amount = int(entry) if entry.isdigit() else 0
+            if not AMOUNT_RANGE[0] <= amount <= AMOUNT_RANGE[1]:
+                return self._end("bad_amount")
+            session.amount = amount
+            session.state = PIN
+            return SCREENS["pin"]
+
+        if session.state == PIN:
+            verdict = classify_pin(entry, *self.pins(session.phone))
+            if verdict == PIN_DURESS:
+                # Signalled whatever the lockout: a lockout must never swallow a coerced customer's call for help.
+                session.duress = True
+                self._signal(session_id, session, started / 1e9)
+            elif self.locked_out(session.phone):
+                return self._end("locked", minutes=max(round(self.lockout / 60), 1))
+            elif verdict == PIN_WRONG:
+                attempts = self._fail(session.phone)
+                if attempts >= MAX_PIN_ATTEMPTS:
+                    return self._end("locked", minutes=max(round(self.lockout / 60), 1))
+                return SCREENS["retry_pin"].format(left=MAX_PIN_ATTEMPTS - attempts)
+            else:
+                self.failures.pop(session.phone, None)
+            session.state = CONFIRM
+            return SCREENS["confirm"].format(amount=session.amount)
+
+        if entry != "1":
+            return self._end("cancelled")
+        if session.duress:
+            # The coerced customer (and whoever is watching) sees the normal approval.
+            self.outcomes["duress"] += 1
+            return SCREENS["approved"].format(amount=session.amount)
+        transaction = (float(session.amount), time.localtime().tm_hour, LOCATION_PATTERNS[0],
+                       False, False, False, -1, session.phone)
+        try:
+            result, = await self.scoring.score([transaction])
+        except Overloaded:
+            return self._end("busy")
+        return self._end(_OUTCOMES[result["decision"]], amount=session.amount)
+
+    def _fail(self, phone, now=None):
+        """Count a wrong PIN from ``phone``; returns its wrong PINs within the lockout"""
+        now = time.monotonic() if now is None else now
+        attempts, last = self.failures.pop(phone, (0, now))
+        attempts = attempts + 1 if now - last < self.lockout else 1
+        self.failures[phone] = (attempts, now)
+        return attempts
+
+    def locked_out(self, phone, now=None):
+        """Whether ``phone`` reached MAX_PIN_ATTEMPTS wrong PINs within the last ``lockout`` seconds"""
+        now = time.monotonic() if now is None else now
+        attempts, last = self.failures.get(phone, (0, now))
+        return attempts >= MAX_PIN_ATTEMPTS and now - last < self.lockout
+
+    def _signal(self, session_id, session, origin):
+        self.outcomes["duress_signals"] += 1
+        if self.on_duress is None:
+            return
+        try:
+            value = self.on_duress(session.phone, session.amount, origin)
+        except Exception:  # the handset must look normal whatever happens behind it
+            self.outcomes["duress_signal_errors"] += 1
+            _log.exception("on_duress failed for USSD session %s", session_id)
+            return
+        if asyncio.iscoroutine(value):
+            value = asyncio.ensure_future(value)
+            value.add_done_callback(lambda future: self._signalled(session_id, future))
+        self.signals[session_id] = value
+        while len(self.signals) > self.history:
+            self.signals.popitem(last=False)
+
+    def _signalled(self, session_id, future):
+        if not future.cancelled() and future.exception() is not None:
+            self.outcomes["duress_signal_errors"] += 1
+            _log.error("on_duress failed for USSD session %s", session_id, exc_info=future.exception())
+
+    def expire(self, now=None):
+        """Drop sessions idle for ``timeout`` seconds (and lapsed PIN lockouts); returns how many were dropped"""
+        now = time.monotonic() if now is None else now
+        while self.failures and now - next(iter(self.failures.values()))[1] >= self.lockout:
+            self.failures.popitem(last=False)
+        while self.ended and now - next(iter(self.ended.values()))[2] >= self.timeout:
+            self.ended.popitem(last=False)
+        expired = 0
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if now - session.touched < self.timeout:
+                break
+            del self.sessions[session_id]
+            expired += 1
+        self.outcomes["timeout"] += expired
+        return expired
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(self.timeout / 4)
+            self.expire()
+
+    def stats(self):
+        steps = {histogram.name[len("ussd_"):]: dict(zip(("p50", "p95", "p99"), histogram.percentiles(50, 95, 99)))
+                 for histogram in self.registry.histograms() if histogram.name.startswith("ussd_")}
+        return {"active": len(self.sessions), "peak": self.peak, "started": self.started,
+                "locked_out": sum(self.locked_out(phone) for phone in self.failures),
+                "requests": self.requests, "outcomes": dict(self.outcomes), "step_ms": steps}
+
+    # --- HTTP ---
+    async def handle(self, reader, writer):
+        """One keep-alive HTTP/1.1 connection from the aggregator; requests are answered in order"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, path, version = line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (header := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, "body too large", close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self._route(method, path.split("?")[0], body, headers)
+                close = headers.get("connection", "").lower() == "close" or version.strip() == "HTTP/1.0"
+                await self._respond(writer, status, payload, close)
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body, headers):
+        if path == "/ussd":
+            if method != "POST":
+                return 405, "POST only"
+            try:
+                if "json" in headers.get("content-type", ""):
+                    form = json.loads(body or b"{}")
+                else:
+                    form = dict(urllib.parse.parse_qsl(body.decode(), keep_blank_values=True))
+            except ValueError as exc:  # bad JSON and non-UTF-8 bodies (UnicodeDecodeError) alike
+                return 400, f"malformed body: {exc}"
+            if not isinstance(form, dict):
+                return 400, "body must be a form or a JSON object"
+            if not form.get("sessionId") or not form.get("phoneNumber"):
+                return 400, "sessionId and phoneNumber are required"
+            text = form.get("text") or ""
+            if not isinstance(text, str):
+                return 400, "text must be a string"
+            return 200, await self.respond(str(form["sessionId"]), str(form["phoneNumber"]), text)
+        if path == "/stats" and method == "GET":
+            return 200, self.stats()
+        if path == "/metrics" and method == "GET":
+            return 200, self.registry.prometheus()
+        if path == "/healthz":
+            return 200, {"status": "ok"}
+        return 404, "not found"
+
+    async def _respond(self, writer, status, payload, close=False):
+        if isinstance(payload, str):
+            body, content_type = payload.encode(), "text/plain; charset=utf-8"
+        else:
+            body, content_type = json.dumps(payload).encode(), "application/json"
+        writer.write(f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: {'close' if close else 'keep-alive'}\r\n\r\n"
+                     .encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host="127.0.0.1", port=8734, backlog=1024):
+        """Start listening; returns the asyncio Server"""
+        self.loop = asyncio.get_running_loop()
+        return await asyncio.start_server(self.handle, host, port, backlog=backlog)
+
+    def start_background(self, host="127.0.0.1", port=0):
+        """Serve from an event loop on a daemon thread; returns the base URL"""
+        ready = threading.Event()
+        bound = {}
+
+        def run():
+            loop = asyncio.new_event_loop()
+            server = loop.run_until_complete(self.serve(host, port))
+            bound["port"] = server.sockets[0].getsockname()[1]
+            ready.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, name="ulinzi-ussd", daemon=True).start()
+        ready.wait()
+        return f"http://{host}:{bound['port']}"
+
+    def dial(self, session_id, phone, text, timeout=5.0):
+        """Blocking ``respond`` for other threads, once the gateway is serving (e.g. a Streamlit session)"""
+        return asyncio.run_coroutine_threadsafe(self.respond(session_id, phone, text), self.loop).result(timeout)
+
+
+# --- Telco traffic simulator ---
+SimulationReport = namedtuple("SimulationReport", "sessions requests elapsed_s sessions_per_s outcomes step_ms")
+
+# Scenario -> (weight, [(step, keypress), ...]); "{amount}" is filled per session.
+SCENARIOS = {
+    "withdraw": (0.80, [("menu", "1"), ("amount", "{amount}"), ("pin", NORMAL_PIN), ("confirm", "1")]),
+    "balance": (0.07, [("menu", "2")]),
+    "wrong_pin": (0.04, [("menu", "1"), ("amount", "{amount}"), ("pin", "0000"), ("pin", NORMAL_PIN),
+                         ("confirm", "1")]),
+    "cancel": (0.03, [("menu", "1"), ("amount", "{amount}"), ("pin", NORMAL_PIN), ("confirm", "2")]),
+    "abandon": (0.05, [("menu", "1")]),
+    "duress": (0.01, [("menu", "1"), ("amount", "{amount}"), ("pin", DURESS_PIN), ("confirm", "1")]),
+}
+
+
+def _amount(rng):
+    """Withdrawal size in KES: lognormal around KES 5,000, in hundreds, within AMOUNT_RANGE"""
+    return min(max(int(round(rng.lognormvariate(8.5, 1.0), -2)), AMOUNT_RANGE[0]), AMOUNT_RANGE[1])
+
+
+async def _post(pool, url, form):
+    reader, writer = await pool.get()
+    try:
+        parts = urllib.parse.urlsplit(url)
+        body = urllib.parse.urlencode(form).encode()
+        writer.write(f"POST {parts.path} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                     f"Content-Type: application/x-www-form-urlencoded\r\nContent-Length: {len(body)}\r\n\r\n"
+                     .encode() + body)
+        await writer.drain()
+        await reader.readline()
+        length = 0
+        while (line := await reader.readline()) != b"\r\n":
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        return (await reader.readexactly(length)).decode()
+    finally:
+        pool.put_nowait((reader, writer))
+
+
+async def simulate(url, sessions=20000, concurrency=20000, connections=64, think_ms=1000.0, ramp_s=10.0,
+                   scenarios=SCENARIOS, seed=0):
+    """Replay telco USSD traffic against a gateway at ``url``; returns a SimulationReport.
+
+    Up to ``concurrency`` subscribers are mid-session at once, starting
+    over ``ramp_s`` seconds. Each waits an exponential think time (mean
+    ``think_ms``) before every keypress. All of them share ``connections``
+    keep-alive connections, as an aggregator would.
+    """
+    rng = random.Random(seed)
+    endpoint = f"{url}/ussd"
+    parts = urllib.parse.urlsplit(endpoint)
+    pool = asyncio.Queue()
+    for _ in range(connections):
+        pool.put_nowait(await asyncio.open_connection(parts.hostname, parts.port))
+    registry = Registry()
+    outcomes = Counter()
+    limit = asyncio.Semaphore(concurrency)
+    names = list(scenarios)
+    weights = [scenarios[name][0] for name in names]
+    think = think_ms / 1e3
+
+    async def subscriber(index, scenario, delay, amount):
+        await asyncio.sleep(delay)
+        async with limit:
+            form = {"sessionId": f"ATUid_{seed}_{index}", "phoneNumber": f"+2547{index % 100000000:08d}",
+                    "serviceCode": SERVICE_CODE, "text": ""}
+            keys = []
+            for step, key in [("dial", None)] + scenarios[scenario][1]:
+                if key is not None:
+                    await asyncio.sleep(rng.expovariate(1 / think) if think else 0)
+                    keys.append(key.format(amount=amount))
+                    form["text"] = "*".join(keys)
+                started = time.perf_counter_ns()
+                screen = await _post(pool, endpoint, form)
+                registry.histogram(step).record(time.perf_counter_ns() - started)
+                if screen.startswith("END"):
+                    break
+            outcomes[scenario] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(subscriber(i, rng.choices(names, weights)[0], rng.uniform(0, ramp_s),
+                                      _amount(rng))
+                           for i in range(sessions)))
+    elapsed = time.perf_counter() - started
+    while not pool.empty():
+        pool.get_nowait()[1].close()
+    steps = {histogram.name: dict(zip(("p50", "p95", "p99"), histogram.percentiles(50, 95, 99)))
+             for histogram in registry.histograms()}
+    requests = sum(histogram.count for histogram in registry.histograms())
+    return SimulationReport(sessions, requests, elapsed, sessions / elapsed, dict(outcomes), steps)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8734)
+    parser.add_argument("--timeout", type=float, default=20.0, help="idle seconds before a session expires")
+    parser.add_argument("--simulate", action="store_true", help="replay telco traffic against an in-process gateway")
+    parser.add_argument("--sessions", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=20000)
+    parser.add_argument("--connections", type=int, default=64)
+    parser.add_argument("--think-ms", type=float, default=1000.0)
+    parser.add_argument("--ramp-s", type=float, default=10.0)
+    args = parser.parse_args(argv)
+
+    gateway = UssdGateway(timeout=args.timeout)
+    if args.simulate:
+        url = gateway.start_background(args.host)
+        report = asyncio.run(simulate(url, args.sessions, args.concurrency, args.connections, args.think_ms,
+                                            args.ramp_s))
+        print(f"{report.sessions:,} sessions ({report.requests:,} requests) in {report.elapsed_s:.2f}s: "
+              f"{report.sessions_per_s:,.0f} sessions/s, peak {gateway.peak:,} concurrent")
+        inside = gateway.stats()["step_ms"]
+        print("  step      subscriber p50 / p99         gateway p50 / p99")
+        for step, ms in report.step_ms.items():
+            print(f"  {step:8s} {ms['p50']:9.2f}ms {ms['p99']:9.2f}ms   {inside[step]['p50']:9.3f}ms {inside[step]['p99']:9.3f}ms")
+        print(f"  outcomes {dict(gateway.outcomes)}")
+        return
+
+    async def run():
+        server = await gateway.serve(args.host, args.port)
+        print(f"USSD gateway ({SERVICE_CODE}) on http://{args.host}:{args.port}/ussd")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""Sliding-window velocity counters for SIM-swap and burst detection.
+
+Keys (account ids, device or SIM ids) hash into a fixed table of slots;
+each slot holds a ring of time buckets with an event count and an amount
+sum, plus the tick it was last written. Stale buckets are recognized from
+that tick rather than swept, so expiry is free and memory is fixed at
+``slots * (6 * buckets + 8)`` bytes however many keys pass through.
+Colliding keys share a slot, which can only over-count. With ``k`` keys
+active in a window, a key shares its slot with about ``k / slots``
+others. At 1M active keys in 2**18 slots that is about 4, so burst counts
+are an upper bound and only add BURST_POINTS to a score; a burst never
+blocks on its own.
+
+SIM changes override the score (SIM_SWAP_SCORE blocks), so they are kept
+exactly instead: LastEvent is a sorted map from key to last change time,
+pruned to its retention window. SIM changes are rare, so it stays small.
+"""
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+VelocityCheck = namedtuple("VelocityCheck", "sim_swap burst account_count account_amount device_count since_sim_change")
+
+
+def _slots(keys, slots):
+    keys = np.asarray(keys).ravel()
+    if keys.dtype.kind == "O":
+        keys = keys.astype(str)
+    return (pd.util.hash_array(keys) % np.uint64(slots)).astype(np.int64)
+
+
+def _duration(window):
+    """Seconds from a number of seconds or anything pandas.Timedelta accepts"""
+    if isinstance(window, (int, float, np.number)):
+        return float(window)
+    return pd.Timedelta(window).total_seconds()
+
+
+def _seconds(timestamps):
+    timestamps = np.asarray(timestamps)
+    if timestamps.dtype.kind == "M":
+        return timestamps.astype("datetime64[ns]").view(np.int64) / 1e9
+    return timestamps.astype(np.float64)
+
+
+class VelocityCounter:
+    """Per-key event counts and amount sums over the last ``bucket * buckets`` of time"""
+
+    def __init__(self, slots=1 << 18, bucket="15s", buckets=16):
+        self.slots = slots
+        self.bucket = _duration(bucket)
+        self.buckets = buckets
+        self._counts = np.zeros((slots, buckets), np.uint16)
+        self._sums = np.zeros((slots, buckets), np.float32)
+        self._last = np.full(slots, np.iinfo(np.int64).min // 2, np.int64)
+        self._lock = threading.Lock()
+
+    @property
+    def window(self):
+        """Longest window a query can cover, in seconds"""
+        return self.bucket * self.buckets
+
+    @property
+    def nbytes(self):
+        return self._counts.nbytes + self._sums.nbytes + self._last.nbytes
+
+    def _age(self, tick):
+        # Age in ticks of each ring bucket relative to ``tick`` (0 = current bucket).
+        return (tick[:, None] - np.arange(self.buckets)[None, :]) % self.buckets
+
+    def add(self, keys, timestamps, values=0.0):
+        """Count events (and add ``values`` to their sums) at ``timestamps``"""
+        slot = _slots(keys, self.slots)
+        if not len(slot):
+            return
+        tick = np.broadcast_to(np.floor(_seconds(timestamps) / self.bucket).astype(np.int64), slot.shape)
+        values = np.broadcast_to(np.asarray(values, np.float32), slot.shape)
+        with self._lock:
+            uniq, inv = np.unique(slot, return_inverse=True)
+            newest = np.full(len(uniq), np.iinfo(np.int64).min, np.int64)
+            np.maximum.at(newest, inv, tick)
+            newest = np.maximum(newest, self._last[uniq])
+            # Buckets not written since the slot's last tick belong to an expired lap.
+            stale = self._age(newest) < (newest - self._last[uniq])[:, None]
+            self._counts[uniq] = np.where(stale, 0, self._counts[uniq])
+            self._sums[uniq] = np.where(stale, 0, self._sums[uniq])
+            self._last[uniq] = newest
+            live = newest[inv] - tick < self.buckets
+            column = tick[live] % self.buckets
+            counts = self._counts[slot[live], column]
+            np.add.at(self._counts, (slot[live], column), (counts < np.iinfo(np.uint16).max).astype(np.uint16))
+            np.add.at(self._sums, (slot[live], column), values[live])
+
+    def query(self, keys, window, now):
+        """(counts, sums) per key over the last ``window`` (at most ``self.window``) before ``now``"""
+        slot = _slots(keys, self.slots)
+        tick = np.broadcast_to(np.floor(_seconds(now) / self.bucket).astype(np.int64), slot.shape)
+        span = min(int(np.ceil(_duration(window) / self.bucket)), self.buckets)
+        with self._lock:
+            counts, sums, last = self._counts[slot], self._sums[slot], self._last[slot]
+        age = self._age(tick)
+        valid = (age < span) & (age >= (tick - last)[:, None])
+        return (np.where(valid, counts, 0).sum(axis=1, dtype=np.int64),
+                np.where(valid, sums, 0).sum(axis=1, dtype=np.float64))
+
+
+def _exact_keys(keys):
+    """uint64 keys: integers as themselves, anything else by its 64-bit hash"""
+    keys = np.asarray(keys).ravel()
+    if keys.dtype.kind in "iu":
+        return keys.astype(np.int64, copy=False).view(np.uint64)
+    return pd.util.hash_array(keys.astype(str))
+
+
+class LastEvent:
+    """Most recent event time per key (e.g. a SIM change), NaN when never seen.
+
+    Keys are looked up exactly in sorted arrays; events older than
+    ``retention`` (None keeps everything) are dropped as new ones arrive.
+    """
+
+    def __init__(self, retention=None):
+        self.retention = None if retention is None else _duration(retention)
+        self._keys = np.empty(0, np.uint64)
+        self._times = np.empty(0, np.float64)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    @property
+    def nbytes(self):
+        return self._keys.nbytes + self._times.nbytes
+
+    def record(self, keys, timestamps):
+        keys = _exact_keys(keys)
+        t = np.broadcast_to(_seconds(timestamps), keys.shape)
+        with self._lock:
+            merged_keys = np.concatenate([self._keys, keys])
+            merged_times = np.concatenate([self._times, t])
+            if self.retention is not None and len(merged_times):
+                live = merged_times >= merged_times.max() - self.retention
+                merged_keys, merged_times = merged_keys[live], merged_times[live]
+            # Latest time per key: sort by (key, time) and keep each key's last row.
+            order = np.lexsort((merged_times, merged_keys))
+            merged_keys, merged_times = merged_keys[order], merged_times[order]
+            last = np.r_[merged_keys[1:] != merged_keys[:-1], True][:len(merged_keys)]
+            self._keys, self._times = merged_keys[last], merged_times[last]
+
+    def since(self, keys, now):
+        """Seconds since each key's last event (NaN when never seen)"""
+        keys = _exact_keys(keys)
+        with self._lock:
+            stored_keys, stored_times = self._keys, self._times
+        times = np.full(len(keys), np.nan)
+        if len(stored_keys):
+            index = np.minimum(np.searchsorted(stored_keys, keys), len(stored_keys) - 1)
+            found = stored_keys[index] == keys
+            times[found] = stored_times[index[found]]
+        return _seconds(now) - times
+
+
+class VelocityMonitor:
+    """Account and device velocity plus Telco SIM-change history for the Financial Sentinel.
+
+    ``sim_swap`` is a SIM change on the account within ``sim_swap_window``;
+    ``burst`` is ``burst_count`` or more transactions on the account (or its
+    device) within ``burst_window``.
+    """
+
+    def __init__(self, slots=1 << 18, sim_swap_window="24h", burst_window="2min", burst_count=5):
+        self.accounts = VelocityCounter(slots)
+        self.devices = VelocityCounter(slots)
+        self.sim_swap_window = _duration(sim_swap_window)
+        self.sim_changes = LastEvent(retention=self.sim_swap_window)
+        self.burst_window = burst_window
+        self.burst_count = burst_count
+
+    @property
+    def nbytes(self):
+        return self.accounts.nbytes + self.devices.nbytes + self.sim_changes.nbytes
+
+    def record_sim_change(self, accounts, timestamps):
+        self.sim_changes.record(accounts, timestamps)
+
+    def record(self, accounts, devices, amounts, timestamps):
+        """Count transactions against their accounts and devices"""
+        self.accounts.add(accounts, timestamps, amounts)
+        self.devices.add(devices, timestamps, amounts)
+
+    def assess(self, accounts, devices, now):
+        """VelocityCheck arrays for transactions about to happen at ``now``"""
+        account_count, account_amount = self.accounts.query(accounts, self.burst_window, now)
+        device_count, _ = self.devices.query(devices, self.burst_window, now)
+        since = self.sim_changes.since(accounts, now)
+        sim_swap = since <= self.sim_swap_window
+        burst = (account_count + 1 >= self.burst_count) | (device_count + 1 >= self.burst_count)
+        return VelocityCheck(sim_swap, burst, account_count, account_amount, device_count, since)
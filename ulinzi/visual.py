@@ -0,0 +1,186 @@
+"""Sovereign Sentinel visual integrity monitor: perceptual hashes against gold standards.
+
+Snapshots are fetched concurrently, decoded to grayscale rasters and
+compared with each domain's gold standard by dHash, pHash (DCT) and
+per-region pixel deviation. The combined match score drives the
+secure / hacked / restoring state machine.
+"""
+import re
+import threading
+import time
+import urllib.request
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+HASH_SIZE = 8
+REGIONS = 4
+RASTER = 64
+MATCH_THRESHOLD = 90.0
+REGION_THRESHOLD = 0.25
+
+DomainCheck = namedtuple("DomainCheck", "domain status match dhash_distance phash_distance region_deviation latency_ms")
+PollResult = namedtuple("PollResult", "checks elapsed_ms within_budget")
+Fingerprint = namedtuple("Fingerprint", "dhash phash raster")
+
+
+# --- Decoding and hashing ---
+# Binary PGM/PPM header; exactly one whitespace byte separates maxval from the pixels.
+_PNM_HEADER = re.compile(rb"P([56])\s+(\d+)\s+(\d+)\s+(\d+)\s")
+
+
+def decode_snapshot(body):
+    """Grayscale float raster from PGM/PPM bytes; other content is laid out as a byte raster.
+    Raises ValueError for an empty or truncated PGM/PPM image."""
+    header = _PNM_HEADER.match(body)
+    if header:
+        width, height, maxval = (int(field) for field in header.group(2, 3, 4))
+        data = np.frombuffer(body, np.uint8, offset=header.end())
+        if not width or not height or not maxval:
+            raise ValueError(f"empty PNM image ({width}x{height}, maxval {maxval})")
+        if len(data) < width * height * (3 if header.group(1) == b"6" else 1):
+            raise ValueError(f"truncated PNM image ({len(data)} bytes of pixels for {width}x{height})")
+        if header.group(1) == b"6":
+            rgb = data[: width * height * 3].reshape(height, width, 3).astype(float)
+            return (rgb @ np.array([0.299, 0.587, 0.114])) * (255.0 / maxval)
+        return data[: width * height].reshape(height, width).astype(float) * (255.0 / maxval)
+    data = np.frombuffer(body, np.uint8)[: RASTER * RASTER]
+    return np.pad(data, (0, RASTER * RASTER - len(data))).reshape(RASTER, RASTER).astype(float)
+
+
+def resize(image, height, width):
+    """Area-average resize using bin sums (no imaging library needed)"""
+    rows = np.linspace(0, image.shape[0], height + 1).astype(int)[:-1]
+    cols = np.linspace(0, image.shape[1], width + 1).astype(int)[:-1]
+    summed = np.add.reduceat(np.add.reduceat(image, rows, axis=0), cols, axis=1)
+    counts = np.outer(np.diff(np.append(rows, image.shape[0])), np.diff(np.append(cols, image.shape[1])))
+    return summed / counts
+
+
+def _pack(bits):
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def dhash(image):
+    """64-bit difference hash: sign of horizontal gradients on a 9x8 thumbnail"""
+    small = resize(image, HASH_SIZE, HASH_SIZE + 1)
+    return _pack(small[:, 1:] > small[:, :-1])
+
+
+_N = 32
+_DCT = np.cos(np.pi * (2 * np.arange(_N)[None, :] + 1) * np.arange(_N)[:, None] / (2 * _N))
+
+
+def phash(image):
+    """64-bit perceptual hash: low 8x8 DCT coefficients against their median"""
+    coeffs = (_DCT @ resize(image, _N, _N) @ _DCT.T)[:HASH_SIZE, :HASH_SIZE]
+    return _pack(coeffs > np.median(coeffs.ravel()[1:]))
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+def fingerprint(image):
+    return Fingerprint(dhash(image), phash(image), resize(image, RASTER, RASTER))
+
+
+def region_deviation(raster, gold):
+    """Mean absolute pixel deviation (0..1) per REGIONS x REGIONS block"""
+    step = RASTER // REGIONS
+    diff = np.abs(raster - gold) / 255.0
+    return diff.reshape(REGIONS, step, REGIONS, step).mean(axis=(1, 3))
+
+
+def compare(image, gold):
+    """(match %, dhash distance, phash distance, region deviations) for a snapshot vs its gold"""
+    current = fingerprint(image)
+    dd = hamming(current.dhash, gold.dhash)
+    dp = hamming(current.phash, gold.phash)
+    regions = region_deviation(current.raster, gold.raster)
+    # Unrelated images sit around 32 bits apart, so that distance maps to 0% hash similarity.
+    hash_similarity = max(0.0, 1.0 - (dd + dp) / (2 * 32))
+    match = 100.0 * hash_similarity * (1.0 - regions.mean())
+    return match, dd, dp, regions
+
+
+# --- State machine ---
+def next_state(state, checks):
+    """Advance secure / hacked / restoring from the latest checks.
+
+    Any defaced domain means "hacked"; a hacked grid whose domains all match
+    their gold standards again is "restoring" (recovery verified). Going
+    back to "secure" is left to the operator.
+    """
+    if any(check.status == "defaced" for check in checks):
+        return "hacked"
+    if state == "hacked" and checks and all(check.status == "secure" for check in checks):
+        return "restoring"
+    return state
+
+
+def worst_check(checks):
+    """The lowest-scoring domain check of a poll"""
+    return min(checks, key=lambda check: check.match)
+
+
+class VisualMonitor:
+    """Polls every target concurrently and scores it against its gold standard.
+
+    A target that cannot be fetched is "unreachable"; one whose snapshot
+    cannot be decoded is "corrupt". ``recent`` shares one poll between
+    every caller within ``max_age_ms``.
+    """
+
+    def __init__(self, targets, budget_ms=100, timeout=1.0, max_workers=64):
+        self.targets = dict(targets)
+        self.budget_ms = budget_ms
+        self.timeout = timeout
+        self.gold = {}
+        self.last = None  # (perf_counter() when taken, PollResult) of the latest poll
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=min(max_workers, max(len(self.targets), 1)),
+                                        thread_name_prefix="visual-monitor")
+
+    def _fetch(self, url):
+        with urllib.request.urlopen(url, timeout=self.timeout) as response:
+            return response.read()
+
+    def capture_gold(self):
+        """Fetch every target once and store its fingerprint as the gold standard"""
+        bodies = self._pool.map(self._fetch, self.targets.values())
+        self.gold = {domain: fingerprint(decode_snapshot(body)) for domain, body in zip(self.targets, bodies)}
+        return len(self.gold)
+
+    def _check(self, domain):
+        start = time.perf_counter()
+        try:
+            body = self._fetch(self.targets[domain])
+        except OSError:
+            return DomainCheck(domain, "unreachable", 0.0, None, None, None, (time.perf_counter() - start) * 1e3)
+        try:
+            image = decode_snapshot(body)
+        except ValueError:
+            return DomainCheck(domain, "corrupt", 0.0, None, None, None, (time.perf_counter() - start) * 1e3)
+        match, dd, dp, regions = compare(image, self.gold[domain])
+        defaced = match < MATCH_THRESHOLD or regions.max() > REGION_THRESHOLD
+        return DomainCheck(domain, "defaced" if defaced else "secure", match, dd, dp, regions,
+                           (time.perf_counter() - start) * 1e3)
+
+    def poll(self):
+        """Check all domains in parallel; returns PollResult(checks, elapsed_ms, within_budget)"""
+        start = time.perf_counter()
+        checks = list(self._pool.map(self._check, self.gold))
+        elapsed = (time.perf_counter() - start) * 1e3
+        result = PollResult(checks, elapsed, elapsed <= self.budget_ms)
+        self.last = (start, result)
+        return result
+
+    def recent(self, max_age_ms=1000):
+        """The latest poll if it started within ``max_age_ms``, else a fresh one; concurrent callers share it"""
+        with self._lock:
+            last = self.last
+            if last is None or (time.perf_counter() - last[0]) * 1e3 > max_age_ms:
+                return self.poll()
+            return last[1]
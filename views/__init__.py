@@ -0,0 +1,15 @@
+"""One module per operation mode, imported the first time its mode is selected.
+
+Each module exposes ``render()``; heavy libraries (pandas, pydeck, plotly
+and the NumPy engine modules) are imported by the views that use them, so
+the app shell starts without them.
+"""
+
+# Sidebar label -> module under views/
+MODES = {
+    "Dashboard Overview": "dashboard",
+    "⚔️ Sovereign Sentinel (Gov)": "sovereign",
+    "💸 Financial Sentinel (Bank)": "financial",
+    "🚨 Duress Protocol (Citizen)": "duress",
+    "🔍 Intelligence Core": "intelligence",
+}
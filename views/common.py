@@ -0,0 +1,79 @@
+"""Process-wide resources and helpers shared by the app shell and every view"""
+import os
+
+import streamlit as st
+
+from ulinzi.audit import SegmentStore
+from ulinzi.evidence import EvidenceLog
+from ulinzi.jobs import JobExecutor
+from ulinzi.metrics import Registry, format_ms
+
+# Local storage for audit segments and other persisted engine state
+DATA_DIR = os.environ.get("ULINZI_DATA_DIR", "data")
+BLOCKLIST_DIR = os.path.join(DATA_DIR, "blocklist")
+
+# Startup budget: a fresh process must import the shell and finish its first render within this
+STARTUP_BUDGET_MS = 3000
+
+
+@st.cache_resource
+def get_audit_store():
+    """Process-wide on-disk audit segments shared by every operator session"""
+    return SegmentStore(os.path.join(DATA_DIR, "audit"))
+
+@st.cache_resource
+def get_evidence_log():
+    """Process-wide hash-chained evidence log (one writer for all sessions)"""
+    return EvidenceLog(os.path.join(DATA_DIR, "evidence"))
+
+@st.cache_resource
+def get_job_executor():
+    """Background workers for recovery and duress workflows, shared across sessions"""
+    return JobExecutor(max_workers=32)
+
+@st.cache_resource
+def get_metrics():
+    """Process-wide latency histograms; served on /metrics when ULINZI_METRICS_PORT is set"""
+    registry = Registry()
+    port = os.environ.get("ULINZI_METRICS_PORT")
+    if port:
+        registry.serve(port=int(port))
+    return registry
+
+def latency(name):
+    return get_metrics().histogram(name)
+
+def percentile_line(name):
+    p50, p95, p99 = latency(name).percentiles(50, 95, 99)
+    return f"p50 {format_ms(p50)} · p95 {format_ms(p95)} · p99 {format_ms(p99)}"
+
+def add_log(event_type, message, status="INFO"):
+    st.session_state.audit_log.add(event_type, message, status)
+
+@st.cache_resource
+def get_blocklist():
+    """CIDR blocklist index, memory-mapped from DATA_DIR so every worker process shares one copy"""
+    from ulinzi.blocklist import META, BlocklistIndex, read_lists
+    from ulinzi.synthetic import generate_blocklists
+
+    if not os.path.exists(os.path.join(BLOCKLIST_DIR, META)):
+        paths = os.environ.get("ULINZI_BLOCKLISTS")  # list files separated by os.pathsep; synthetic lists otherwise
+        lists = read_lists(paths.split(os.pathsep)) if paths else generate_blocklists(seed=7)
+        BlocklistIndex.build(lists).save(BLOCKLIST_DIR)
+    return BlocklistIndex.open(BLOCKLIST_DIR)
+
+@st.cache_resource
+def get_data_plane():
+    """Threats, recent transactions and module status shared by every session (one ingestion path)"""
+    from ulinzi.plane import DataPlane
+    from ulinzi.synthetic import generate_threats, generate_transactions, live_feed
+
+    plane = DataPlane(blocklist=get_blocklist())
+    plane.publish_threats(generate_threats(n=50))
+    plane.publish_transactions(generate_transactions(n=10, span="24h"))
+    for module in ("sovereign_sentinel", "financial_sentinel", "duress_protocol", "intelligence_core"):
+        plane.set_status(module, "🟢 ACTIVE")
+    rate = os.environ.get("ULINZI_FEED_RATE")  # live threat events/second, off by default
+    if rate:
+        plane.start_feed(live_feed("threats", rate=float(rate)))
+    return plane
@@ -0,0 +1,227 @@
+"""Dashboard Overview: defense layers, national threat map and latency percentiles"""
+import pandas as pd
+import pydeck as pdk
+import streamlit as st
+
+from ulinzi.metrics import format_ms
+from ulinzi.sketch import ip_strings
+from ulinzi.synthetic import generate_threats
+from views.common import get_data_plane, get_metrics, latency
+
+# Try to import Plotly with fallback
+try:
+    import plotly.express as px
+    PLOTLY_AVAILABLE = True
+except ImportError:
+    PLOTLY_AVAILABLE = False
+
+LEVEL_HEX = {'low': '#00cc96', 'medium': '#FF9800', 'high': '#ff4b4b', 'critical': '#b71c1c'}
+# Trend window label -> (rollup resolution, window)
+TREND_WINDOWS = {"1h": ("1min", "1h"), "24h": ("1h", "24h"), "30d": ("1d", "30D")}
+
+
+# --- 1. DASHBOARD OVERVIEW ---
+def render():
+    # System Status Banner
+    col_status1, col_status2, col_status3, col_status4 = st.columns(4)
+    with col_status1:
+        p50, p95, p99 = latency("risk_scoring").percentiles(50, 95, 99)
+        st.markdown(f'<div class="metric-card"><div class="metric-val">{format_ms(p50)}</div><div class="metric-label">Response Latency p50<br>p95 {format_ms(p95)} · p99 {format_ms(p99)}</div></div>', unsafe_allow_html=True)
+    with col_status2:
+        st.markdown('<div class="metric-card"><div class="metric-val">42</div><div class="metric-label">Attacks Neutralized (24h)</div></div>', unsafe_allow_html=True)
+    with col_status3:
+        st.markdown('<div class="metric-card"><div class="metric-val">KES 1.5M</div><div class="metric-label">Fraud Prevented</div></div>', unsafe_allow_html=True)
+    with col_status4:
+        st.markdown('<div class="metric-card"><div class="metric-val">100%</div><div class="metric-label">Govt Uptime</div></div>', unsafe_allow_html=True)
+
+    with st.expander("⏱️ Latency Percentiles"):
+        st.dataframe(pd.DataFrame(
+            [(name, count, format_ms(p50), format_ms(p95), format_ms(p99))
+             for name, count, p50, p95, p99 in get_metrics().summary()],
+            columns=["Operation", "Samples", "p50", "p95", "p99"]), use_container_width=True)
+        st.download_button("📤 Export Prometheus metrics", get_metrics().prometheus(),
+                           file_name="ulinzi.prom", mime="text/plain")
+
+    st.divider()
+    
+    # System Modules Overview
+    st.subheader("🛡️ Ulinzi-AI Defense Layers")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        st.markdown("""
+        <div class="module-card">
+            <h3>🏛️ Sovereign Sentinel</h3>
+            <p>Autonomous website protection & defacement reversal</p>
+            <div style="color: #4CAF50; font-weight: bold;">🟢 ACTIVE</div>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown("""
+        <div class="module-card">
+            <h3>💸 Financial Sentinel</h3>
+            <p>Real-time fraud detection & SIM swap prevention</p>
+            <div style="color: #4CAF50; font-weight: bold;">🟢 ACTIVE</div>
+        </div>
+        """, unsafe_allow_html=True)
+        
+    with col3:
+        st.markdown("""
+        <div class="module-card">
+            <h3>🚨 Duress Protocol</h3>
+            <p>Covert emergency response & life protection</p>
+            <div style="color: #4CAF50; font-weight: bold;">🟢 ACTIVE</div>
+        </div>
+        """, unsafe_allow_html=True)
+        
+    with col4:
+        st.markdown("""
+        <div class="module-card">
+            <h3>🔍 Intelligence Core</h3>
+            <p>Attribution analysis & threat intelligence</p>
+            <div style="color: #4CAF50; font-weight: bold;">🟢 ACTIVE</div>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    st.divider()
+    
+    # Live Network Map and Analytics
+    col_map, col_analytics = st.columns([2, 1])
+    
+    with col_map:
+        st.subheader("🌍 Real-Time National Threat Map")
+        
+        # Enhanced threat visualization - views are memoized until new events arrive
+        threat_table = get_data_plane().threats
+        blocked_table = get_data_plane().blocked
+        
+        # Pre-aggregated grid cells at the selected zoom keep the payload size flat
+        map_zoom = st.select_slider("Map Zoom", options=list(range(4, 13)), value=6)
+        threat_cells = threat_table.map_payload(map_zoom)
+        
+        # Events from blocklisted sources are outlined on top of the threat cells
+        blocked_layers = [pdk.Layer(
+            'ScatterplotLayer',
+            data=blocked_table.map_payload(map_zoom),
+            get_position='[lon, lat]',
+            get_line_color=[255, 255, 255, 220],
+            get_radius='radius',
+            radius_min_pixels=7,
+            radius_max_pixels=18,
+            line_width_min_pixels=2,
+            stroked=True,
+            filled=False
+        )] if len(blocked_table) else []
+        
+        st.pydeck_chart(pdk.Deck(
+            map_style='mapbox://styles/mapbox/dark-v10',
+            initial_view_state=pdk.ViewState(
+                latitude=-1.2921,
+                longitude=36.8219,
+                zoom=map_zoom,
+                pitch=50,
+            ),
+            layers=[
+                pdk.Layer(
+                    'ScatterplotLayer',
+                    data=threat_cells,
+                    get_position='[lon, lat]',
+                    get_color='color',
+                    get_radius='radius',
+                    radius_min_pixels=5,
+                    radius_max_pixels=15,
+                    pickable=True,
+                    filled=True
+                ),
+            ] + blocked_layers,
+            tooltip={
+                "html": "<b>Threat Level:</b> {threat_level} <br/> <b>Type:</b> {type} <br/> <b>Events:</b> {count}",
+                "style": {"color": "white"}
+            }
+        ))
+        
+        st.caption("Live visualization of active threats across Kenya - Ulinzi-AI National Grid"
+                   f" · ⬜ {len(blocked_table):,} of {len(threat_table):,} events from blocklisted sources")
+    
+    with col_analytics:
+        st.subheader("📊 Threat Analytics")
+        
+        # Trends, rates and the distribution come from the incremental rollups: constant work per rerun
+        rollups = get_data_plane().rollups
+        span = st.radio("Trend Window", list(TREND_WINDOWS), horizontal=True)
+        resolution, window = TREND_WINDOWS[span]
+        rate, previous = rollups.rate(resolution, window)
+        st.metric("Event Rate", f"{rate:.1f}/min", f"{rate - previous:+.1f}/min vs previous {span}")
+        trend = rollups.series(resolution, window)
+        # Plotly or browser-drawn sparklines: st.line_chart would import Altair on the first render
+        if PLOTLY_AVAILABLE:
+            fig_trend = px.line(trend, color_discrete_map=LEVEL_HEX)
+            fig_trend.update_layout(
+                showlegend=False,
+                margin=dict(l=20, r=20, t=10, b=20),
+                height=180,
+                xaxis_title=None,
+                yaxis_title=None,
+                paper_bgcolor='rgba(0,0,0,0)',
+                plot_bgcolor='rgba(0,0,0,0)',
+                font=dict(color='white')
+            )
+            st.plotly_chart(fig_trend, use_container_width=True)
+        else:
+            st.dataframe(pd.DataFrame({
+                "Level": trend.columns,
+                "Trend": [trend[level].tolist() for level in trend.columns],
+                "Events": trend.sum().to_numpy(),
+            }), column_config={"Trend": st.column_config.LineChartColumn(f"Trend ({span})", y_min=0)},
+                hide_index=True, use_container_width=True)
+        
+        # Threat distribution
+        threat_counts = rollups.totals(resolution, window)
+        threat_counts = threat_counts[threat_counts > 0]
+        
+        if PLOTLY_AVAILABLE:
+            # Use Plotly if available
+            fig_pie = px.pie(
+                values=threat_counts.values, 
+                names=threat_counts.index,
+                color=threat_counts.index,
+                color_discrete_map=LEVEL_HEX
+            )
+            fig_pie.update_layout(
+                showlegend=True,
+                margin=dict(l=20, r=20, t=30, b=20),
+                height=250,
+                paper_bgcolor='rgba(0,0,0,0)',
+                plot_bgcolor='rgba(0,0,0,0)',
+                font=dict(color='white')
+            )
+            st.plotly_chart(fig_pie, use_container_width=True)
+        else:
+            st.warning("Plotly not detected. Using simplified view.")
+        
+        regions = rollups.totals(resolution, window, by="region").sort_values(ascending=False)
+        st.caption("By region: " + " · ".join(f"{region} {count:,}" for region, count in regions[regions > 0].items()))
+        
+        # Heavy hitters and alerts are fixed-memory summaries: a storm of millions of events renders as a few rows
+        plane = get_data_plane()
+        st.markdown("**Top Attacking Sources:**")
+        source_ips, source_events = plane.sources.top(5)
+        st.dataframe(pd.DataFrame({"Source IP": ip_strings(source_ips), "Events": source_events}),
+                     hide_index=True, use_container_width=True)
+        st.caption(f"Count-min estimates, at most +{plane.sources.sketch.error_bound:,} each")
+        
+        st.markdown("**Recent Critical Alerts:**")
+        for alert in plane.alerts.recent(3):
+            source = f" from {alert.source}" if alert.source else ""
+            repeats = f" ×{alert.count:,}" if alert.count > 1 else ""
+            st.error(f"🚨 {alert.type}{source}{repeats} · {alert.last_seen:%H:%M:%S}")
+        if plane.alerts.suppressed:
+            st.caption(f"{plane.alerts.suppressed:,} repeated alerts collapsed")
+        
+        if st.button("🌊 Simulate DDoS Storm", use_container_width=True):
+            plane.publish_threats(generate_threats(
+                n=200000, span="1min", geography=["Nairobi", "Mombasa"], level_weights=(0.1, 0.2, 0.3, 0.4),
+                type_weights=(0, 1, 0, 0, 0), n_sources=2000, source_skew=1.3))
+            st.rerun()
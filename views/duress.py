@@ -0,0 +1,167 @@
+"""Duress Protocol: covert duress PIN and the Code Red emergency response"""
+import time
+import uuid
+
+import pandas as pd
+import streamlit as st
+
+from ulinzi.duress import run_code_red
+from ulinzi.fixtures import EmergencyServices
+from ulinzi.ussd import PIN_DURESS, PIN_OK, SERVICE_CODE, UssdGateway, classify_pin
+from views.common import get_evidence_log, get_job_executor, latency, percentile_line
+
+DEMO_PHONE = "+254700000001"
+
+
+@st.cache_resource
+def get_emergency_services():
+    """Local stand-ins for the telco, National Police Service and bank endpoints"""
+    return EmergencyServices()
+
+@st.cache_resource
+def get_ussd_gateway():
+    """The *334# session gateway on its own event loop; a duress PIN starts a Code Red job"""
+    executor = get_job_executor()
+
+    def on_duress(phone, amount, origin):
+        return executor.submit("duress_protocol", duress_steps(amount, origin)).id
+
+    gateway = UssdGateway(on_duress=on_duress)
+    gateway.start_background()
+    return gateway
+
+DURESS_LINES = {
+    "locate": lambda fix: f"📍 GPS Triangulation... **[Locked: {fix['lat']}, {fix['lon']}]**",
+    "alert_police": lambda ack: f"🚓 Alerting National Police Service... **[SENT: {ack['incident']}]**",
+    "freeze_account": lambda ack: "💸 Freezing Recipient Account... **[EXECUTED]**",
+    "log_evidence": lambda receipt: f"🔗 Immutable Evidence Log... **[HASHED: {receipt.chain[:16]}]**",
+}
+
+
+def duress_steps(amount, pressed_at, lat=-1.2921, lon=36.8219):
+    """Code Red Protocol: one job step that fans the emergency actions out concurrently"""
+    def code_red(job):
+        lines = job.results.setdefault("lines", [])
+
+        def on_done(result):
+            if result.status == "ok":
+                lines.append(f"{DURESS_LINES[result.name](result.value)} ({result.finished_ms:.0f}ms)")
+            else:
+                lines.append(f"⚠️ {result.name}: **[{result.status.upper()}]** {result.error}")
+            job.update(len(lines) / len(DURESS_LINES))
+
+        report = run_code_red(get_emergency_services().endpoints, "ACC-DEMO-001", amount, lat, lon,
+                              evidence_log=get_evidence_log(), origin=pressed_at, on_done=on_done)
+        latency("duress_dispatch").record_ms(report.elapsed_ms)
+        if report.time_to_alert_ms is not None:
+            latency("duress_time_to_alert").record_ms(report.time_to_alert_ms)
+        return report
+
+    return [("code_red", code_red)]
+
+
+def render_duress_status(job):
+    """One line per settled Code Red action, in completion order"""
+    state = "error" if job.status == "failed" else "complete" if job.done else "running"
+    with st.status("Executing Code Red Protocol...", expanded=True, state=state):
+        for line in list(job.results.get("lines", [])):
+            st.write(line)
+        report = job.results.get("code_red")
+        if report is not None and report.time_to_alert_ms is not None:
+            st.write(f"⏱️ Time to alert (PIN entry → police): **{report.time_to_alert_ms:.0f}ms** "
+                     f"({percentile_line('duress_time_to_alert')})")
+        if job.status == "failed":
+            st.write(f"⚠️ Protocol failed: {job.error}")
+
+
+@st.fragment(run_every=0.2)
+def duress_progress(job_id):
+    """Poll the duress job; hand control back to the full script once it finishes"""
+    job = get_job_executor().get(job_id)
+    if job is None:  # aged out of the executor's history, e.g. in a tab left open
+        st.session_state.pop("duress_job", None)
+        st.rerun()
+    render_duress_status(job)
+    if job.done:
+        st.rerun()
+
+
+def ussd_handset():
+    """A feature phone on the *334# gateway: the same PINs, handled by the session engine"""
+    gateway = get_ussd_gateway()
+    if "ussd_session" not in st.session_state:
+        st.session_state.ussd_session = None
+    session = st.session_state.ussd_session
+    if st.button(f"📞 Dial {SERVICE_CODE}", use_container_width=True, disabled=session is not None):
+        session = st.session_state.ussd_session = {"id": f"ulinzi-{uuid.uuid4().hex[:12]}", "keys": []}
+        session["screen"] = gateway.dial(session["id"], DEMO_PHONE, "")
+    if session is not None:
+        # The handset shows nothing unusual; the Code Red job started at PIN entry shows up beside it.
+        signal = gateway.signals.get(session["id"])
+        if signal is not None:
+            st.session_state.duress_job = signal
+        st.code(session["screen"][4:], language=None)
+        if session["screen"].startswith("CON"):
+            with st.form("ussd_reply", clear_on_submit=True):
+                reply = st.text_input("Reply", max_chars=8)
+                if st.form_submit_button("Send"):
+                    session["keys"].append(reply.strip())
+                    session["screen"] = gateway.dial(session["id"], DEMO_PHONE, "*".join(session["keys"]))
+                    st.rerun()
+        elif st.button("Hang up", use_container_width=True):
+            st.session_state.ussd_session = None
+            st.rerun()
+    stats = gateway.stats()
+    pin_p99 = stats["step_ms"].get("pin", {}).get("p99")
+    st.caption(f"Gateway: {stats['active']:,} live sessions · {stats['started']:,} dialled"
+               + (f" · PIN step p99 {pin_p99:.2f}ms" if pin_p99 is not None else ""))
+
+
+# --- 4. DURESS PROTOCOL ---
+def render():
+    st.subheader("🆘 Autonomous Duress Response System")
+    st.info("This system protects citizens during physical threats by enabling covert emergency signaling.")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("#### 📱 Banking App Simulation")
+        st.markdown("You are being forced to withdraw money. **Test the logic:**")
+        st.markdown("- **Normal PIN:** `1234`")
+        st.markdown("- **Duress PIN:** `9999` (Triggers Alarm)")
+        
+        pin_input = st.text_input("Enter PIN", type="password", max_chars=4, placeholder="Enter 4-digit PIN")
+        amount = st.slider("Withdrawal Amount (KES)", 1000, 500000, 50000)
+        
+        if st.button("Process Withdrawal", use_container_width=True):
+            pin_entered_at = time.perf_counter()
+            verdict = classify_pin(pin_input)
+            if verdict == PIN_OK:
+                st.success("✅ Transaction Successful")
+                st.info(f"KES {amount:,} has been withdrawn.")
+            elif verdict == PIN_DURESS:
+                # THE COVERT RESPONSE
+                st.success("✅ Transaction Appears Successful") 
+                st.balloons()
+                
+                # THE REAL AUTONOMOUS RESPONSE - runs in the background, never blocks this session
+                st.session_state.duress_job = get_job_executor().submit(
+                    "duress_protocol", duress_steps(amount, pin_entered_at)).id
+            else:
+                st.warning("Incorrect PIN. Please try again.")
+
+        with st.expander(f"📟 USSD {SERVICE_CODE} (feature phone)"):
+            ussd_handset()
+    
+    duress_job = get_job_executor().get(st.session_state.get("duress_job"))
+    if duress_job is not None:
+        with col2:
+            st.markdown('<div class="alert-banner">🚨 SILENT DURESS SIGNAL DETECTED</div>', unsafe_allow_html=True)
+            st.markdown("**Autonomous Emergency Protocol Activated:**")
+            
+            if duress_job.done:
+                render_duress_status(duress_job)
+                st.map(pd.DataFrame({'lat': [-1.2921], 'lon': [36.8219]}), zoom=14)
+                st.caption("Live Tracking sent to DCI/Police HQ")
+            else:
+                duress_progress(duress_job.id)
@@ -0,0 +1,239 @@
+"""Financial Sentinel: real-time transaction risk scoring with behavioral and velocity signals"""
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from ulinzi.history import TransactionHistory
+from ulinzi.profiles import ProfileStore
+from ulinzi.risk import DECISIONS, LOCATION_PATTERNS, score_transaction
+from ulinzi.scoring import score_remote
+from ulinzi.synthetic import NAIROBI, TRANSACTION_STATUSES, generate_transactions
+from ulinzi.velocity import VelocityMonitor
+from views.common import DATA_DIR, add_log, get_data_plane, latency
+
+HISTORY_WINDOWS = {"Last 24 hours": "24h", "Last 7 days": "7D", "Last 30 days": "30D", "Last 90 days": "90D"}
+HISTORY_PAGE_ROWS = 50
+TRANSACTION_COLUMNS = {
+    "Time": st.column_config.DatetimeColumn(format="YYYY-MM-DD HH:mm"),
+    "Amount (KES)": st.column_config.NumberColumn(format="localized"),
+}
+
+# Base URL of a running ``python -m ulinzi.scoring`` service; unset scores in-process
+SCORING_URL = os.environ.get("ULINZI_SCORING_URL")
+
+# Try to import Plotly with fallback
+try:
+    import plotly.graph_objects as go
+    PLOTLY_AVAILABLE = True
+except ImportError:
+    PLOTLY_AVAILABLE = False
+
+
+def create_simple_gauge(risk_score):
+    """Create a simple gauge visualization without Plotly"""
+    color = "#00cc96"
+    if risk_score > 50: color = "#FF9800"
+    if risk_score > 85: color = "#ff4b4b"
+    
+    html = f"""
+    <div class="gauge-container">
+        <div style="display: flex; justify-content: space-between; margin-bottom: 10px;">
+            <span style="color: #aaa;">0</span>
+            <span style="color: white; font-size: 1.5rem; font-weight: bold;">{risk_score}/100</span>
+            <span style="color: #aaa;">100</span>
+        </div>
+        <div style="background: #333; border-radius: 10px; height: 20px;">
+            <div class="gauge-fill" style="width: {risk_score}%; background: {color};"></div>
+        </div>
+        <div style="display: flex; justify-content: space-between; margin-top: 5px;">
+            <span style="color: #00cc96;">Low</span>
+            <span style="color: #FF9800;">Medium</span>
+            <span style="color: #ff4b4b;">High</span>
+        </div>
+    </div>
+    """
+    return html
+
+def transaction_table(transactions):
+    """Typed transaction records for the Recent Transaction Logs table (sortable, formatted by TRANSACTION_COLUMNS)"""
+    return pd.DataFrame({
+        "Time": transactions["timestamp"],
+        "Account": transactions["account_id"],
+        "Amount (KES)": transactions["amount"],
+        "Location": transactions["location"].cat.rename_categories(lambda label: label.split(" (")[0]),
+        "Risk Score": transactions["risk_score"],
+        "Status": transactions["status"],
+        "Type": transactions["type"],
+    })
+
+def score(amount, hour, location, behavioral_anomaly, sim_swap, burst):
+    """(risk_score, decision) from the scoring service, falling back to the local rules if it is unreachable"""
+    if SCORING_URL:
+        try:
+            return score_remote(SCORING_URL, amount=amount, hour=hour, location=location,
+                                behavioral_anomaly=behavioral_anomaly, sim_swap=sim_swap, burst=burst)
+        except OSError as exc:
+            st.caption(f"⚠️ Scoring service unavailable ({exc}); using local rules")
+    return score_transaction(amount, hour, location, behavioral_anomaly, sim_swap, burst)
+
+@st.cache_resource
+def get_profile_store():
+    """Per-account behavioral baselines, restored from the last snapshot or built from 30 days of history"""
+    path = os.path.join(DATA_DIR, "profiles", "profiles.npz")
+    if os.path.exists(path):
+        return ProfileStore.restore(path)
+    store = ProfileStore(capacity=100000)
+    store.update_frame(generate_transactions(n=1000000, span="30d", n_accounts=100000, seed=3))
+    store.snapshot(path)
+    return store
+
+@st.cache_resource
+def get_transaction_history():
+    """Months of typed transaction history on disk; every transaction published to the data plane is appended"""
+    history = TransactionHistory(os.path.join(DATA_DIR, "transactions"))
+    if not len(history):
+        history.append(generate_transactions(n=1000000, span="90D", seed=5))
+        history.flush()
+    get_data_plane().add_sink("transactions", history.append)
+    return history
+
+@st.cache_resource
+def get_velocity_monitor():
+    """Account/device velocity counters and Telco SIM-change history shared by every session"""
+    return VelocityMonitor()
+
+
+# --- 3. FINANCIAL SENTINEL ---
+def render():
+    st.subheader("💳 Financial Sentinel - Real-time Fraud Detection & Prevention")
+    st.markdown("Simulate transactions to test the AI's real-time anomaly detection capabilities.")
+    
+    col_input, col_output = st.columns(2)
+    
+    with col_input:
+        st.markdown("#### 🎯 Transaction Simulation")
+        amount = st.slider("Transaction Amount (KES)", 0, 2000000, 50000, 1000)
+        tx_time = st.slider("Time of Day (24h)", 0, 23, 14)
+        location = st.selectbox("Location Pattern", LOCATION_PATTERNS)
+        account_id = st.number_input("Customer Account", 0, 99999, 4821)
+        device_id = st.text_input("Device / SIM", f"SIM-{account_id:05d}")
+        now = np.datetime64(pd.Timestamp.now())
+
+        # SIM swap and burst signals come from the shared velocity counters
+        velocity = get_velocity_monitor()
+        if st.button("📶 Report SIM Change (Telco API)"):
+            velocity.record_sim_change([account_id], now)
+            add_log("TELCO_API", f"SIM change reported for account {account_id}", "WARNING")
+        check = velocity.assess([account_id], [device_id], now)
+        sim_swap, burst = bool(check.sim_swap[0]), bool(check.burst[0])
+        since_change = check.since_sim_change[0]
+        st.markdown(
+            f"🔴 **SIM Swap:** {'Detected' if sim_swap else 'None'}"
+            f"{f' ({since_change / 60:.0f} min ago)' if sim_swap else ''} · "
+            f"⚡ **Velocity:** {check.account_count[0]} tx / KES {check.account_amount[0]:,.0f} in 2 min"
+            f"{' — burst' if burst else ''}")
+
+        # Behavioral anomaly comes from the account's learned baseline, not a toggle
+        profiles = get_profile_store()
+        profile = profiles.assess([account_id], [amount], [tx_time], [location], now)
+        behavioral_anomaly = bool(profile.anomaly[0])
+        st.markdown(
+            f"🎭 **Behavioral Anomaly:** {'🔴 Unusual pattern' if behavioral_anomaly else '🟢 Matches baseline'}  \n"
+            f"<small>{profile.history[0]} past transactions · amount z={profile.amount_z[0]:+.1f} · "
+            f"hour share {profile.hour_share[0]:.0%} · location share {profile.location_share[0]:.0%}</small>",
+            unsafe_allow_html=True)
+        
+        # AI Logic Calculation (Reactive) - the scoring service when configured, else the same rules in-process
+        with latency("risk_scoring").time():
+            risk_score, risk_decision = score(amount, tx_time, location, behavioral_anomaly, sim_swap, burst)
+
+        if st.button("🚀 Process Transaction", use_container_width=True):
+            add_log("FINANCIAL_SENTINEL", f"Processing KES {amount:,} transaction. Risk Score: {risk_score}", "INFO")
+            profiles.update([account_id], [amount], [tx_time], [location], now)
+            velocity.record([account_id], [device_id], [amount], now)
+            # Published to the shared plane, so every analyst's transaction log shows it
+            get_data_plane().publish_transactions({
+                "timestamp": [now], "account_id": [account_id], "amount": [amount], "hour": [tx_time],
+                "location": [location], "type": ["Transfer"], "behavioral_anomaly": [behavioral_anomaly],
+                "sim_swap": [sim_swap], "risk_score": [risk_score],
+                "status": [TRANSACTION_STATUSES[DECISIONS.index(risk_decision)]]})
+            if sim_swap and burst:
+                # Burst after a SIM change: surface it on the National Threat Map
+                get_data_plane().publish_threats([{
+                    "lat": NAIROBI[0], "lon": NAIROBI[1], "threat_level": "critical",
+                    "type": "SIM Swap", "timestamp": pd.Timestamp.now(), "account_id": account_id}])
+                add_log("FINANCIAL_SENTINEL", f"SIM swap burst on account {account_id} mapped as critical threat", "CRITICAL")
+            if risk_decision == "BLOCK":
+                st.toast("Transaction BLOCKED due to High Risk", icon="🚫")
+            elif risk_decision == "CHALLENGE":
+                st.toast("Circuit Breaker Triggered: Verification Required", icon="⚠️")
+            else:
+                st.toast("Transaction Approved", icon="✅")
+    
+    with col_output:
+        st.markdown("#### 🧠 AI Risk Assessment Engine")
+        
+        # Dynamic visualization
+        color = "#00cc96"
+        decision = "✅ APPROVE"
+        if risk_decision == "CHALLENGE":
+            color = "#FF9800"
+            decision = "⚠️ CHALLENGE"
+        if risk_decision == "BLOCK":
+            color = "#ff4b4b"
+            decision = "🚫 BLOCK"
+        
+        if PLOTLY_AVAILABLE:
+            fig = go.Figure(go.Indicator(
+                mode = "gauge+number",
+                value = risk_score,
+                domain = {'x': [0, 1], 'y': [0, 1]},
+                title = {'text': "Risk Score", 'font': {'size': 24, 'color': 'white'}},
+                gauge = {
+                    'axis': {'range': [None, 100], 'tickwidth': 1, 'tickcolor': "white"},
+                    'bar': {'color': color},
+                    'bgcolor': "white",
+                    'borderwidth': 2,
+                    'bordercolor': "gray",
+                    'steps': [
+                        {'range': [0, 50], 'color': 'rgba(0, 204, 150, 0.3)'},
+                        {'range': [50, 85], 'color': 'rgba(255, 152, 0, 0.3)'},
+                        {'range': [85, 100], 'color': 'rgba(255, 75, 75, 0.3)'}
+                    ],
+                }
+            ))
+            fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', font={'color': "white"}, height=300)
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.markdown(create_simple_gauge(risk_score), unsafe_allow_html=True)
+        
+        st.markdown(f"<h3 style='text-align: center; color: {color};'>{decision}</h3>", unsafe_allow_html=True)
+        
+        if risk_decision == "BLOCK":
+            st.error("""
+            **Critical Threat Identified:**
+            - SIM swap / Anomaly confirmed via telco API
+            - Account immediately frozen
+            - Law enforcement notified
+            """)
+            if st.checkbox("Show Liveness Check"):
+                st.image("https://placehold.co/400x300/000000/FFF?text=Live+Face+Scan+Required", caption="Biometric Challenge Active")
+
+    st.divider()
+    st.subheader("📋 Recent Transaction Logs")
+    history = get_transaction_history()
+    col_window, col_status, col_amount = st.columns(3)
+    window = col_window.selectbox("Time Window", list(HISTORY_WINDOWS), index=1)
+    statuses = col_status.multiselect("Status", TRANSACTION_STATUSES)
+    min_amount = col_amount.number_input("Minimum Amount (KES)", 0, 2000000, 0, 10000)
+    # Only the requested page is read from the memory-mapped history segments
+    selection = history.select(pd.Timestamp.now() - pd.Timedelta(HISTORY_WINDOWS[window]), None,
+                               min_amount=min_amount or None, **({"status": statuses} if statuses else {}))
+    pages = max(1, -(-len(selection) // HISTORY_PAGE_ROWS))
+    page = st.number_input(f"Page (of {pages:,})", 1, pages, 1)
+    st.dataframe(transaction_table(selection.page(page - 1, HISTORY_PAGE_ROWS)), column_config=TRANSACTION_COLUMNS,
+                 use_container_width=True, hide_index=True)
+    st.caption(f"{len(selection):,} transactions · KES {selection.sum('amount'):,} · "
+               f"{len(history):,} on record across {history.segments} segments")
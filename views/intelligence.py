@@ -0,0 +1,85 @@
+"""Intelligence Core: kill-chain correlation and transaction network analysis"""
+import pandas as pd
+import streamlit as st
+
+from ulinzi.chains import KillChainCorrelator, laundering_events, threat_events, transaction_events
+from ulinzi.graph import TransactionGraph
+from ulinzi.synthetic import generate_campaigns, generate_transfers
+from views.common import get_data_plane
+
+
+@st.cache_resource
+def get_transaction_graph():
+    """Interbank transfer graph with its funnel-account detections and traced mule chains"""
+    transfers, _ = generate_transfers(n=200000, n_accounts=50000, seed=7)
+    graph = TransactionGraph()
+    graph.add_frame(transfers)
+    funnels = graph.funnel_accounts(window="30min", limit=10)
+    chains = graph.trace_chains(funnels["account"].head(3), window="30min")
+    return graph, funnels, chains
+
+@st.cache_resource
+def get_kill_chain_correlator():
+    """Streaming kill-chain correlator, primed with the last two hours of security events and the
+    transfer graph's pass-through flows, then fed every threat and transaction published to the data plane"""
+    correlator = KillChainCorrelator(window="1h")
+    graph, _, _ = get_transaction_graph()
+    events = pd.concat([generate_campaigns(n_campaigns=12, n_noise=20000, n_accounts=50000, seed=11),
+                        laundering_events(graph, window="30min")], ignore_index=True)
+    events = events.sort_values("timestamp", kind="stable")
+    for start in range(0, len(events), 1000):
+        correlator.ingest(events.iloc[start:start + 1000])
+
+    def correlate(events):
+        if len(events):
+            correlator.ingest(events)
+
+    plane = get_data_plane()
+    plane.add_sink("threats", lambda batch: correlate(threat_events(batch)))
+    plane.add_sink("transactions", lambda frame: correlate(transaction_events(frame)))
+    return correlator
+
+
+# --- 5. INTELLIGENCE CORE ---
+def render():
+    st.subheader("🔍 Intelligence Core - Attribution & Threat Analysis")
+    st.markdown("Advanced AI-powered attribution and threat intelligence analysis.")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("#### 🌐 Chain Analysis Engine")
+        correlator = get_kill_chain_correlator()
+        chains = correlator.chains(limit=5)
+        if chains.empty:
+            st.info("No correlated kill chains in the current window.")
+        else:
+            lead = chains.iloc[0]
+            st.dataframe(correlator.stage_table(lead), use_container_width=True)
+            st.caption(f"Account {lead['account_id']}: {lead['stages']}/5 stages linked, "
+                       f"chain confidence {lead['confidence']:.1%} · {correlator.events:,} events correlated")
+        
+        st.markdown("#### 🎯 Attribution Analysis")
+        col_att1, col_att2, col_att3 = st.columns(3)
+        col_att1.metric("Confidence", "94%", "High")
+        col_att2.metric("Actor", "APT-41", "Known")
+        col_att3.metric("Method", "Res-Proxy", "Botnet")
+        
+    with col2:
+        st.markdown("#### 🕸️ Transaction Network Analysis")
+        graph, funnels, chains = get_transaction_graph()
+        col_net1, col_net2, col_net3 = st.columns(3)
+        col_net1.metric("Accounts", f"{graph.n_nodes:,}")
+        col_net2.metric("Transfers", f"{graph.n_edges:,}")
+        col_net3.metric("Funnel Accounts", len(funnels), "Flagged")
+        st.dataframe(
+            funnels[["account", "fan_in", "in_amount", "pass_share", "score"]].rename(columns={
+                "account": "Account", "fan_in": "Senders", "in_amount": "Inflow (KES)",
+                "pass_share": "Pass-through", "score": "Score"}),
+            use_container_width=True,
+            column_config={"Pass-through": st.column_config.ProgressColumn(min_value=0.0, max_value=1.0, format="%.2f")}
+        )
+        st.markdown("**Traced layering chains:**")
+        for chain in chains:
+            st.markdown("- " + " → ".join(f"`{account}`" for account in chain))
+        st.caption("Fan-in plus rapid pass-through (≥80% of inflow forwarded within 30 min) across the banking network")
@@ -0,0 +1,208 @@
+"""Sovereign Visual Sentinel: ministry website integrity monitor and autonomous recovery"""
+import os
+
+import streamlit as st
+
+from ulinzi.fixtures import FixtureSites
+from ulinzi.snapshots import RESTORE_TARGET_MS, SnapshotStore
+from ulinzi.visual import VisualMonitor, next_state, worst_check
+from ulinzi.sketch import ip_strings
+from views.common import BLOCKLIST_DIR, DATA_DIR, add_log, get_blocklist, get_data_plane, get_evidence_log, get_job_executor, latency, percentile_line
+
+
+@st.cache_resource
+def get_visual_monitor():
+    """Fixture government sites, a monitor holding their gold-standard fingerprints and a
+    snapshot store whose "gold" ref is the sites' known-good files"""
+    sites = FixtureSites()
+    monitor = VisualMonitor(sites.urls(), budget_ms=100)
+    monitor.capture_gold()
+    store = SnapshotStore(os.path.join(DATA_DIR, "snapshots"))
+    store.commit(sites.root, ref="gold")
+    return sites, monitor, store
+
+def recovery_steps(sites, monitor, store):
+    """Sovereign Sentinel recovery: measure deviation, roll back defaced sites, verify"""
+    def analyze(job):
+        poll = monitor.poll()
+        worst = worst_check(poll.checks)
+        job.update(1.0, f"🔍 Pixel deviation on {worst.domain}: {100 - worst.match:.1f}%")
+        return poll
+
+    def rollback(job):
+        defaced = [check.domain for check in job.results["analyze"].checks if check.status == "defaced"]
+        job.update(0.0, f"🔄 Rolling back {', '.join(defaced) or 'nothing'} to the gold snapshot")
+        restore = store.restore("gold", sites.root, prefixes=[f"{domain}/" for domain in defaced])
+        job.update(1.0, f"🔄 Restored {restore.chunks_rewritten} chunks ({restore.bytes_written / 1024:.0f} KiB written) "
+                        f"in {restore.elapsed_ms:.1f}ms")
+        return restore
+
+    def verify(job):
+        poll = monitor.poll()
+        job.update(1.0, f"✅ Secure snapshot verified ({worst_check(poll.checks).match:.1f}% match)")
+        return poll
+
+    return [("analyze", analyze), ("rollback", rollback), ("verify", verify)]
+
+
+def top_sources(n=3):
+    """Heaviest attacking IPs on the national grid, from the data plane's heavy-hitter sketch"""
+    return ip_strings(get_data_plane().sources.top(n)[0])
+
+def block_sources(addresses):
+    """Blocklist verdict per address; unlisted addresses are added to the sovereign_sentinel list,
+    which is saved to disk within a few seconds so the blocks survive a restart"""
+    blocklist = get_blocklist()
+    verdicts, added = [], False
+    for address in addresses:
+        listed = blocklist.explain(address)
+        if listed is None:
+            blocklist.update(add=[address], list_name="sovereign_sentinel")
+            verdicts.append(f"{address} (added to blocklist)")
+            added = True
+        else:
+            verdicts.append(f"{address} ({listed[1]} list, {listed[0]})")
+    if added:
+        blocklist.save_after(BLOCKLIST_DIR)
+    return verdicts
+
+
+@st.fragment(run_every=0.2)
+def recovery_progress(job_id):
+    """Poll the recovery job; once it finishes, record the outcome and hand control back to the full script"""
+    job = get_job_executor().get(job_id)
+    if job is None:  # aged out of the executor's history, e.g. in a tab left open
+        st.session_state.pop("recovery_job", None)
+        st.rerun()
+    st.progress(job.progress)
+    if not job.done:
+        st.info(job.message or "🚨 VISUAL ANOMALY DETECTED! AI AGENT ACTIVATED.")
+        return
+    st.session_state.pop("recovery_job", None)
+    if job.status == "failed":
+        st.session_state.recovery_error = f"Recovery failed: {job.error}"
+    else:
+        checks = job.results["verify"].checks
+        st.session_state.visual_state = next_state("hacked", checks)
+        if st.session_state.visual_state == "restoring":
+            st.session_state.last_recovery_ms = job.elapsed_ms
+            latency("sovereign_recovery").record_ms(job.elapsed_ms)
+            latency("snapshot_restore").record_ms(job.results["rollback"].elapsed_ms)
+            add_log("SOVEREIGN_SENTINEL", f"Autonomous hot-swap completed in {job.elapsed_ms:.0f}ms - Site restored", "SUCCESS")
+        else:
+            insecure = [f"{check.domain} ({check.status})" for check in checks if check.status != "secure"]
+            st.session_state.recovery_error = f"Verification failed - still not secure: {', '.join(insecure)}"
+    if "recovery_error" in st.session_state:
+        add_log("SOVEREIGN_SENTINEL", st.session_state.recovery_error, "CRITICAL")
+    st.rerun()
+
+
+# --- 2. SOVEREIGN VISUAL SENTINEL ---
+def render():
+    st.subheader("🏛️ Sovereign Visual Sentinel - Ministry Website Integrity Monitor")
+    
+    # Poll every protected domain (one poll a second, shared by every session); real scores
+    # move a secure grid to hacked, and the recovery job (not this poll) confirms the way back
+    gov_sites, visual_monitor, snapshot_store = get_visual_monitor()
+    visual_poll = visual_monitor.recent(max_age_ms=1000)
+    if st.session_state.visual_state == "secure":
+        st.session_state.visual_state = next_state("secure", visual_poll.checks)
+    worst = worst_check(visual_poll.checks)
+    
+    # Status banner
+    if st.session_state.visual_state == "secure":
+        st.markdown(f'<div class="success-banner">🛡️ ALL SYSTEMS SECURE - Monitoring {len(visual_poll.checks)} Critical Government Domains</div>', unsafe_allow_html=True)
+    elif st.session_state.visual_state == "hacked":
+        st.markdown('<div class="alert-banner">🚨 CRITICAL THREAT DETECTED - Autonomous Response Activated</div>', unsafe_allow_html=True)
+    
+    col_sim, col_log = st.columns([2, 1])
+    
+    with col_sim:
+        st.markdown("### Live Visual State Monitor")
+        
+        # Visual State Logic
+        if st.session_state.visual_state == "secure":
+            st.image("https://placehold.co/800x400/2E7D32/FFF?text=MINISTRY+OF+INTERIOR%0AOfficial+Secure+Portal%0A%0A🛡️+ULINZI-AI+PROTECTED", 
+                    caption=f"Status: SECURE (Gold Standard Match {worst.match:.1f}%) - Perceptual Hash Monitor Active")
+            
+            if st.button("🔴 SIMULATE CYBERATTACK (Inject Defacement)", key="attack_btn", use_container_width=True):
+                gov_sites.deface("interior.go.ke")
+                visual_poll = visual_monitor.poll()
+                st.session_state.visual_state = next_state(st.session_state.visual_state, visual_poll.checks)
+                worst = worst_check(visual_poll.checks)
+                sources = top_sources()
+                st.session_state.blocked_sources = block_sources(sources)
+                add_log("SOVEREIGN_SENTINEL", f"Visual anomaly detected - {worst.domain} ({worst.match:.1f}% match)", "CRITICAL")
+                st.session_state.last_evidence = get_evidence_log().append(
+                    "DEFACEMENT", {"domain": worst.domain, "match": round(worst.match, 2),
+                                   "dhash_distance": worst.dhash_distance, "phash_distance": worst.phash_distance,
+                                   "source_ip": sources[0] if sources else None})
+                st.rerun()
+            
+        elif st.session_state.visual_state == "hacked":
+            st.image("https://placehold.co/800x400/B71C1C/FFF?text=HACKED+BY+ANONYMOUS%0AGovernment+Systems+Compromised%0A%0A⚠️+NATIONAL+SECURITY+THREAT", 
+                    caption=f"Status: COMPROMISED (Visual Anomaly Detected on {worst.domain} - {worst.match:.1f}% Match)")
+            
+            # Autonomous recovery runs as a background job; the fragment below polls it.
+            # A failed or unverified recovery waits for the operator instead of resubmitting.
+            if "recovery_error" in st.session_state:
+                st.error(st.session_state.recovery_error)
+                if st.button("🔁 Retry Recovery", key="retry_recovery", use_container_width=True):
+                    del st.session_state.recovery_error
+                    st.rerun()
+            else:
+                recovery_job = get_job_executor().get(st.session_state.get("recovery_job"))
+                if recovery_job is None:
+                    recovery_job = get_job_executor().submit("sovereign_recovery", recovery_steps(gov_sites, visual_monitor, snapshot_store))
+                    st.session_state.recovery_job = recovery_job.id
+                recovery_progress(recovery_job.id)
+            
+        elif st.session_state.visual_state == "restoring":
+            st.success(f"✅ AUTONOMOUS RECOVERY VERIFIED - All Systems Secure (Gold Standard Match {worst.match:.1f}%)")
+            st.image("https://placehold.co/800x400/2E7D32/FFF?text=MINISTRY+OF+INTERIOR%0AOfficial+Secure+Portal%0A%0A✅+AUTONOMOUSLY+RESTORED", 
+                    caption=f"Status: RESTORED (Autonomous Action Completed in {st.session_state.get('last_recovery_ms', 0):.0f}ms · {percentile_line('sovereign_recovery')})")
+            
+            st.balloons()
+            if st.button("🔄 Reset Simulation", use_container_width=True):
+                st.session_state.visual_state = "secure"
+                st.session_state.pop("recovery_job", None)
+                st.session_state.pop("recovery_error", None)
+                st.rerun()
+
+    with col_log:
+        st.markdown("### 🧠 Autonomous Agent Logic")
+        
+        if st.session_state.visual_state == "secure":
+            budget_note = "within" if visual_poll.within_budget else "OVER"
+            st.code(f"""[INFO] Perceptual hash monitor (dHash/pHash): Active
+[INFO] Gold Standard Match: {worst.match:.1f}%
+[INFO] Monitoring {len(visual_poll.checks)} critical domains
+[INFO] Polling interval: {visual_monitor.budget_ms}ms
+[INFO] Last health check: {visual_poll.elapsed_ms:.0f}ms ({budget_note} budget)
+[INFO] All systems nominal""", language="bash")
+        
+        elif st.session_state.visual_state == "hacked":
+            st.code(f"""[ALERT] Visual deviation detected on {worst.domain}!
+[CRITICAL] Perceptual Match: {worst.match:.1f}% (dHash Δ{worst.dhash_distance}, pHash Δ{worst.phash_distance})
+[ACTION] Triggering autonomous response
+[ACTION] Kubernetes: Initiating hot-swap
+[ACTION] Sources blocked: {'; '.join(st.session_state.get('blocked_sources', [])) or 'none attributed'}
+[ACTION] Evidence hashed to tamper-evident log
+[ACTION] NC4 alert dispatched
+[STATUS] {'Recovery needs operator retry' if 'recovery_error' in st.session_state else 'Recovery in progress...'}""", language="bash")
+        
+        else:  # restoring
+            evidence = st.session_state.get("last_evidence")
+            evidence_line = "[INFO] No evidence recorded this session"
+            if evidence is not None:
+                sealed = "VERIFIED" if get_evidence_log().verify(evidence.index, evidence.day) else "MISMATCH"
+                evidence_line = f"[INFO] Evidence #{evidence.index} sealed: {evidence.chain[:16]}... [{sealed}]"
+            st.code(f"""[SUCCESS] Autonomous recovery complete
+[INFO] Recovery time: {st.session_state.get('last_recovery_ms', 0):.0f}ms ({percentile_line('sovereign_recovery')})
+[INFO] Snapshot restore: {percentile_line('snapshot_restore')} (target {RESTORE_TARGET_MS}ms)
+[INFO] Zero downtime achieved
+[INFO] Public access maintained
+[INFO] Threat intelligence updated
+{evidence_line}
+[INFO] Returning to monitoring mode
+[INFO] All systems secure""", language="bash")